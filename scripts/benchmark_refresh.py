@@ -0,0 +1,365 @@
+"""
+Benchmark Refresh
+=================
+Incremental refresh of vertical_benchmarks.json from SEC filings.
+
+Each comp records when it was last pulled (`retrieved_at`). A refresh:
+
+  1. finds comps older than `_meta.max_age_days` (default 90), never pulled,
+     or still holding nulls ("Needs refresh")
+  2. pulls only those tickers through sec_filings (concurrent, rate limited,
+     served from the EDGAR cache when fresh)
+  3. maps each 10-K summary onto the comp fields (revenue, operating income,
+     margins); hand-entered fields filings do not carry — unit counts, AUV,
+     employees, notes — are kept
+  4. recomputes low/mid/high (min/median/max) for every comp-backed range
+     of each vertical in one vectorized pass over all comps; ranges with
+     fewer than MIN_COMPS values keep their curated numbers
+  5. writes the file atomically and prints a diff report
+
+Usage:
+    python benchmark_refresh.py                       # refresh stale comps
+    python benchmark_refresh.py --dry-run             # report only, no write
+    python benchmark_refresh.py --vertical qsr_franchise --force
+    python benchmark_refresh.py --add SHAK "Dominos Pizza" --vertical qsr_company_owned
+    python benchmark_refresh.py --offline             # EDGAR cache only
+"""
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+DEFAULT_MAX_AGE_DAYS = 90
+MIN_COMPS = 2
+
+# Comp field -> sec_filings summary key (copied as-is)
+SUMMARY_FIELDS = {
+    "revenue":              "revenue",
+    "operating_income":     "operating_income",
+    "operating_margin_pct": "operating_margin_pct",
+}
+
+# benchmark_ranges key -> (comp field, rounding step). Ranges are recomputed
+# from comps only for these; the rest (turnover, employees per location, ...)
+# are industry estimates and stay hand-curated.
+RANGE_FIELDS = {
+    "operating_margin_pct": ("operating_margin_pct", 0.005),
+    "gross_margin_pct":     ("gross_margin_pct", 0.005),
+    "auv_system":           ("auv_system", 10_000),
+}
+
+
+def default_benchmarks_path():
+    from workspace import settings
+    return settings.data_dir / "vertical_benchmarks.json"
+
+
+def _verticals(data, only=None):
+    return [k for k, v in data.items()
+            if not k.startswith("_") and isinstance(v, dict) and (only is None or k == only)]
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Staleness
+# ---------------------------------------------------------------------------
+def stale_reason(comp, max_age_days, today, fallback_date=None):
+    """Why *comp* needs a refresh, or None if it is current."""
+    if not comp.get("ticker"):
+        return None
+    if any(comp.get(field) is None for field in SUMMARY_FIELDS):
+        return "missing values"
+    pulled = _parse_date(comp.get("retrieved_at")) or fallback_date
+    if pulled is None:
+        return "never refreshed"
+    age = (today - pulled).days
+    if age > max_age_days:
+        return f"{age} days old"
+    return None
+
+
+def find_stale(data, max_age_days=None, vertical=None, force=False, today=None):
+    """[(vertical, comp index, ticker, reason)] for comps due a refresh."""
+    meta = data.get("_meta", {})
+    max_age_days = max_age_days if max_age_days is not None else \
+        meta.get("max_age_days", DEFAULT_MAX_AGE_DAYS)
+    today = today or date.today()
+    fallback = _parse_date(meta.get("last_refreshed"))
+    stale = []
+    for key in _verticals(data, vertical):
+        for i, comp in enumerate(data[key].get("comps", [])):
+            reason = "forced" if force and comp.get("ticker") else \
+                stale_reason(comp, max_age_days, today, fallback)
+            if reason:
+                stale.append((key, i, comp["ticker"].upper(), reason))
+    return stale
+
+
+# ---------------------------------------------------------------------------
+# Mapping sec_filings output -> comp fields
+# ---------------------------------------------------------------------------
+def comp_fields(record):
+    """Comp field updates from one sec_filings output record (10-K summary)."""
+    summary = record.get("summary") or {}
+    if summary.get("most_recent_form") != "10-K":
+        return {}
+    fields = {k: summary.get(src) for k, src in SUMMARY_FIELDS.items()}
+    revenue, gross = summary.get("revenue"), summary.get("gross_profit")
+    if revenue and gross:
+        fields["gross_margin_pct"] = round(gross / revenue, 4)
+    fields = {k: v for k, v in fields.items() if v is not None}
+    if not fields:
+        return {}
+
+    period = str(summary.get("most_recent_period") or "")
+    filed = next((f.get("filed") for f in record.get("filings", []) if f.get("form") == "10-K"), None)
+    fields["period"] = f"FY{period[:4]} (10-K {filed})" if period[:4].isdigit() else period
+    fields["retrieved_at"] = record.get("retrieved_at") or date.today().isoformat()
+    if record.get("company_name"):
+        fields["company"] = record["company_name"]
+    return fields
+
+
+def apply_comp(comp, fields):
+    """Update *comp* in place; keeps the curated company name if present."""
+    if comp.get("company"):
+        fields = {k: v for k, v in fields.items() if k != "company"}
+    comp.update(fields)
+    if str(comp.get("notes", "")).startswith("Cache empty"):
+        comp["notes"] = ""
+    return comp
+
+
+# ---------------------------------------------------------------------------
+# Ranges
+# ---------------------------------------------------------------------------
+def compute_ranges(comps, fields=RANGE_FIELDS, min_comps=MIN_COMPS):
+    """
+    {range key: {"low", "mid", "high", "n", "tickers"}} over *comps*.
+
+    Builds one comps x fields matrix (NaN where a comp lacks a value) and
+    takes min / median / max down every column at once, rounded to each
+    field's step. Columns with fewer than *min_comps* values are left out.
+    """
+    import numpy as np
+
+    keys = list(fields)
+    matrix = np.full((len(comps), len(keys)), np.nan)
+    for i, comp in enumerate(comps):
+        for j, key in enumerate(keys):
+            value = comp.get(fields[key][0])
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                matrix[i, j] = value
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=0)
+    usable = counts >= max(min_comps, 1)
+    if not usable.any():
+        return {}
+
+    steps = np.array([fields[k][1] for k in keys])
+    cols = matrix[:, usable]
+    low, mid, high = (np.round(stat(cols, axis=0) / steps[usable]) * steps[usable]
+                      for stat in (np.nanmin, np.nanmedian, np.nanmax))
+    ranges = {}
+    for n, j in enumerate(np.flatnonzero(usable)):
+        digits = 0 if steps[j] >= 1 else 4
+        ranges[keys[j]] = {
+            "low":     round(float(low[n]), digits),
+            "mid":     round(float(mid[n]), digits),
+            "high":    round(float(high[n]), digits),
+            "n":       int(counts[j]),
+            "tickers": [c.get("ticker") for c, ok in zip(comps, present[:, j]) if ok],
+        }
+    return ranges
+
+
+def apply_ranges(vertical_data, ranges, today):
+    """Write computed ranges into benchmark_ranges; returns the keys updated."""
+    bench = vertical_data.setdefault("benchmark_ranges", {})
+    for key, r in ranges.items():
+        low, mid, high = (int(r[s]) if r[s] >= 1 else r[s] for s in ("low", "mid", "high"))
+        bench[key] = {
+            "low": low, "mid": mid, "high": high,
+            "source": f"{r['n']} comps ({', '.join(t for t in r['tickers'] if t)}), refreshed {today}",
+        }
+    return list(ranges)
+
+
+# ---------------------------------------------------------------------------
+# Diff + write
+# ---------------------------------------------------------------------------
+def diff(old, new, path=""):
+    """[{"path", "old", "new"}] for every leaf value that changed."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [k for k in new if k not in old]:
+            changes += diff(old.get(key), new.get(key), f"{path}.{key}" if path else key)
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new) \
+            and all(isinstance(x, dict) for x in old + new):
+        changes = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            changes += diff(a, b, f"{path}[{b.get('ticker') or i}]")
+        return changes
+    return [] if old == new else [{"path": path, "old": old, "new": new}]
+
+
+def _file_mode(path):
+    """Mode for a file replacing *path*: its current mode, else the umask default."""
+    try:
+        return path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_json_atomic(path, data):
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.chmod(tmp, _file_mode(path))   # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------------------------
+def refresh(data, cache, max_age_days=None, vertical=None, force=False, workers=4, today=None):
+    """
+    Refresh stale comps and ranges in *data* (in place).
+
+    Returns a report dict: stale comps, per-ticker results and the ranges
+    recomputed per vertical.
+    """
+    from sec_filings import pull_many
+
+    today = today or date.today()
+    stale = find_stale(data, max_age_days, vertical, force, today)
+    report = {"stale": [{"vertical": v, "ticker": t, "reason": r} for v, _, t, r in stale],
+              "pulled": {}, "ranges": {}}
+
+    records = {}
+    tickers = sorted({t for _, _, t, _ in stale})
+    if tickers:
+        for record in pull_many(tickers, cache, workers=workers):
+            records[record["ticker"]] = record
+
+    for key, i, ticker, _ in stale:
+        record = records.get(ticker, {"error": "not pulled"})
+        if "error" in record:
+            report["pulled"][ticker] = {"error": record["error"]}
+            continue
+        fields = comp_fields(record)
+        if not fields:
+            report["pulled"][ticker] = {"error": "no 10-K summary in filings"}
+            continue
+        apply_comp(data[key]["comps"][i], fields)
+        report["pulled"][ticker] = {"period": fields.get("period")}
+
+    for key in _verticals(data, vertical):
+        comps = data[key].get("comps", [])
+        if comps:
+            updated = apply_ranges(data[key], compute_ranges(comps), today.isoformat())
+            if updated:
+                report["ranges"][key] = updated
+
+    if any("error" not in r for r in report["pulled"].values()):
+        data.setdefault("_meta", {})["last_refreshed"] = today.isoformat()
+    return report
+
+
+def add_comps(data, vertical, companies):
+    """
+    Append empty comps to *vertical* for tickers or company names (names
+    resolved through the local company index), skipping ones already there.
+    """
+    from company_resolver import resolve_company
+
+    if vertical not in _verticals(data):
+        raise KeyError(f"unknown vertical {vertical!r}; available: {', '.join(_verticals(data))}")
+    comps = data[vertical].setdefault("comps", [])
+    have = {(c.get("ticker") or "").upper() for c in comps}
+    added = []
+    for query in companies:
+        match = resolve_company(query)
+        ticker = match["ticker"] if match else query.upper()
+        if ticker not in have:
+            comps.append({"company": match["name"] if match else None, "ticker": ticker, "period": None,
+                          **{k: None for k in SUMMARY_FIELDS}, "notes": ""})
+            have.add(ticker)
+            added.append(ticker)
+    return added
+
+
+def main():
+    import argparse
+    import copy
+
+    parser = argparse.ArgumentParser(description="Refresh vertical_benchmarks.json from SEC filings")
+    parser.add_argument("--file", help="Benchmarks file (default: <workspace>/.claude/data/vertical_benchmarks.json)")
+    parser.add_argument("--vertical", help="Only this vertical")
+    parser.add_argument("--add", nargs="+", metavar="TICKER_OR_NAME",
+                        help="Add comps (tickers or company names) to --vertical before refreshing")
+    parser.add_argument("--max-age-days", type=int, help="Override _meta.max_age_days")
+    parser.add_argument("--force", action="store_true", help="Refresh every comp regardless of age")
+    parser.add_argument("--workers", type=int, default=4, help="Tickers pulled concurrently (default: 4)")
+    parser.add_argument("--offline", action="store_true", default=None, help="EDGAR cache only (no network)")
+    parser.add_argument("--cache", help="EDGAR cache file (default: <workspace>/.claude/cache/edgar.sqlite)")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    args = parser.parse_args()
+
+    if args.add and not args.vertical:
+        parser.error("--add requires --vertical")
+
+    path = Path(args.file) if args.file else default_benchmarks_path()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": f"cannot read {path}: {e}"}))
+        raise SystemExit(1)
+    original = copy.deepcopy(data)
+
+    added = []
+    if args.add:
+        try:
+            added = add_comps(data, args.vertical, args.add)
+        except KeyError as e:
+            parser.error(str(e.args[0]))
+
+    from edgar_cache import EdgarCache
+    cache = EdgarCache(path=args.cache, offline=args.offline)
+    try:
+        report = refresh(data, cache, args.max_age_days, args.vertical, args.force, args.workers)
+    except ImportError as e:
+        print(json.dumps({"error": f"{e}. Install with: pip install edgartools"}))
+        raise SystemExit(1)
+
+    changes = diff(original, data)
+    if changes and not args.dry_run:
+        write_json_atomic(path, data)
+    print(json.dumps({
+        "file":    str(path),
+        "added":   added,
+        **report,
+        "changes": changes,
+        "written": bool(changes) and not args.dry_run,
+        "cache":   cache.counters,
+    }, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Company Resolver
+================
+Local ticker / company name -> CIK lookup built from SEC's ticker files.
+
+SEC publishes the ticker <-> CIK map as
+
+    https://www.sec.gov/files/company_tickers.json            (cik, ticker, title)
+    https://www.sec.gov/files/company_tickers_exchange.json   (+ exchange)
+
+build() turns either file (downloaded separately) into a compact index that
+is pickled next to the workspace caches. Lookups never touch the network:
+
+    exact ticker      "WING", "brk-b"                       dict lookup
+    exact name        "Wingstop Inc." -> "wingstop"         dict lookup
+    name prefix       "jack in"       -> Jack in the Box    bisect over sorted names
+    fuzzy name        "wing stop"     -> Wingstop           trigram postings + Dice
+
+Names are normalized (lowercase, punctuation and corporate suffixes such as
+Inc / Corp / Holdings Ltd dropped) before every comparison. The prefix step
+binary-searches a sorted name array rather than walking a node-per-letter
+trie: same results, and the index loads from one small pickle.
+
+The index is rebuilt when its source file changes; it is reported stale
+after MAX_AGE_DAYS so the source can be re-downloaded.
+
+Location: <workspace>/.claude/cache/company_index.pickle
+
+Usage:
+    python sec_filings.py --build-company-index ~/Downloads/company_tickers_exchange.json
+    python sec_filings.py --resolve "jack in the box"
+
+    from company_resolver import resolve_company
+    resolve_company("Wingstop")      # {"cik": 1636422, "ticker": "WING", "name": ..., "exchange": ...}
+"""
+import bisect
+import heapq
+import json
+import os
+import pickle
+import re
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+INDEX_VERSION = 1
+MAX_AGE_DAYS = 30
+MIN_DICE = 0.45                 # weakest fuzzy match returned
+MIN_CONFIDENT_SCORE = 0.7       # weakest prefix/fuzzy match used without asking
+SHORTLIST_SIZE = 50
+
+_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "llc", "lp", "l p", "sa", "nv", "ag", "se", "the", "holdings", "holding",
+    "group", "trust", "de", "del",
+}
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def default_index_path():
+    from workspace import settings
+    return settings.cache_dir / "company_index.pickle"
+
+
+def normalize_name(name):
+    """'The Wendy's Company' -> 'wendys'; suffix words are dropped from the end."""
+    words = _NON_WORD_RE.sub(" ", str(name).lower().replace("'", "").replace("&", " and ")).split()
+    while len(words) > 1 and words[-1] in _SUFFIXES:
+        words.pop()
+    if len(words) > 1 and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _read_source(path):
+    """[(cik, ticker, name, exchange)] from company_tickers(.json|_exchange.json)."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict) and "fields" in data and "data" in data:
+        fields = [f.lower() for f in data["fields"]]
+        rows = (dict(zip(fields, r)) for r in data["data"])
+        return [(int(r["cik"]), str(r["ticker"]).upper(), r.get("name") or "", r.get("exchange"))
+                for r in rows if r.get("ticker")]
+    rows = data.values() if isinstance(data, dict) else data
+    return [(int(r["cik_str"]), str(r["ticker"]).upper(), r.get("title") or "", r.get("exchange"))
+            for r in rows if r.get("ticker")]
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+class CompanyIndex:
+    """In-memory resolver over one ticker file (see build())."""
+
+    def __init__(self, records, source=None, stamp=None, built_at=None):
+        # records: [(cik, ticker, name, exchange)], SEC order (largest companies first)
+        self.records = records
+        self.source, self.stamp = source, stamp
+        self.built_at = built_at or time.time()
+        self.by_ticker = {}
+        self.by_cik = {}
+        self.by_name = defaultdict(list)        # normalized name -> record ids
+        for i, (cik, ticker, name, _) in enumerate(records):
+            self.by_cik.setdefault(cik, i)
+            self.by_ticker.setdefault(ticker, i)
+            self.by_ticker.setdefault(ticker.replace("-", "."), i)
+            self.by_name[normalize_name(name)].append(i)
+        self.by_name = dict(self.by_name)
+        self.names = sorted(self.by_name)       # bisect prefix search
+        self.postings = defaultdict(list)       # trigram -> name positions in self.names
+        for pos, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self.postings[gram].append(pos)
+        self.postings = dict(self.postings)
+
+    # -- persistence ---------------------------------------------------------
+    @classmethod
+    def build(cls, source, path=None):
+        """Index *source* (a company_tickers*.json file) and save it to *path*."""
+        source = Path(source)
+        st = source.stat()
+        index = cls(_read_source(source), str(source.resolve()), (st.st_mtime_ns, st.st_size))
+        index.save(path)
+        return index
+
+    def save(self, path=None):
+        path = Path(path) if path else default_index_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"version": INDEX_VERSION, "index": self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """Saved index, rebuilt first if its source file has changed; None if never built."""
+        path = Path(path) if path else default_index_path()
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        index = data["index"]
+        try:
+            st = Path(index.source).stat()
+            if (st.st_mtime_ns, st.st_size) != tuple(index.stamp):
+                index = cls.build(index.source, path)
+        except (OSError, TypeError, ValueError, KeyError):
+            pass  # source moved or unreadable: keep serving the saved index
+        return index
+
+    @property
+    def stale(self):
+        return time.time() - self.built_at > MAX_AGE_DAYS * 86_400
+
+    # -- lookups -------------------------------------------------------------
+    def _record(self, i, match, score=1.0):
+        cik, ticker, name, exchange = self.records[i]
+        return {"cik": cik, "ticker": ticker, "name": name, "exchange": exchange,
+                "match": match, "score": round(score, 3)}
+
+    def _name_ids(self, name):
+        return self.by_name.get(name, [])
+
+    def prefix(self, text, limit=10):
+        """Names starting with normalized *text*, shortest first."""
+        text = normalize_name(text)
+        if not text:
+            return []
+        lo = bisect.bisect_left(self.names, text)
+        hi = bisect.bisect_left(self.names, text + "\uffff")
+        return heapq.nsmallest(limit, self.names[lo:hi], key=lambda n: (len(n), n))
+
+    def fuzzy(self, text, limit=10):
+        """[(dice, name)] by trigram overlap with normalized *text*."""
+        text = normalize_name(text)
+        grams = _trigrams(text)
+        hits = defaultdict(int)
+        for gram in grams:
+            for pos in self.postings.get(gram, ()):
+                hits[pos] += 1
+        scored = []
+        for pos, shared in sorted(hits.items(), key=lambda kv: -kv[1])[:SHORTLIST_SIZE]:
+            name = self.names[pos]
+            dice = 2 * shared / (len(grams) + len(_trigrams(name)))
+            if dice >= MIN_DICE:
+                scored.append((dice, name))
+        scored.sort(key=lambda s: (-s[0], len(s[1]), s[1]))
+        return scored[:limit]
+
+    def search(self, query, limit=5):
+        """Ranked candidates: exact ticker or CIK, exact name, name prefix, then fuzzy name."""
+        query = str(query).strip()
+        out, seen = [], set()
+
+        def add(i, match, score=1.0):
+            if i not in seen:
+                seen.add(i)
+                out.append(self._record(i, match, score))
+
+        if query.upper() in self.by_ticker:
+            add(self.by_ticker[query.upper()], "ticker")
+        if query.isdigit() and int(query) in self.by_cik:
+            add(self.by_cik[int(query)], "cik")
+        name = normalize_name(query)
+        for i in self._name_ids(name):
+            add(i, "name")
+        for candidate in self.prefix(name, limit):
+            for i in self._name_ids(candidate):
+                add(i, "prefix", len(name) / len(candidate))
+        if len(out) < limit:
+            for dice, candidate in self.fuzzy(name, limit):
+                for i in self._name_ids(candidate):
+                    add(i, "fuzzy", dice)
+        return out[:limit]
+
+    def resolve(self, query):
+        """Best match for a ticker, CIK or company name, or None."""
+        query = str(query).strip()
+        if query.upper() in self.by_ticker:          # fast path: no name matching at all
+            return self._record(self.by_ticker[query.upper()], "ticker")
+        found = self.search(query, limit=1)
+        return found[0] if found else None
+
+
+_default_index = None
+
+
+def default_index():
+    """The workspace CompanyIndex (loaded once per process), or None if never built."""
+    global _default_index
+    if _default_index is None:
+        _default_index = CompanyIndex.load()
+    return _default_index
+
+
+def resolve_company(query, index=None):
+    """{"cik", "ticker", "name", "exchange", "match", "score"} or None (also when no index exists)."""
+    index = index or default_index()
+    return index.resolve(query) if index else None
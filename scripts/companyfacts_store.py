@@ -0,0 +1,381 @@
+"""
+Company Facts Store
+===================
+Local, indexed copy of SEC's bulk XBRL company facts (companyfacts.zip).
+
+SEC publishes every filer's XBRL facts nightly as one zip of
+CIK##########.json members:
+
+    https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+
+ingest() streams those members straight out of a local copy of the zip (no
+extraction to disk), keeps the concepts in INGEST_CONCEPTS (or all of them),
+drops facts restated by later filings (latest filed wins per period) and
+loads them into one SQLite file with indexes on CIK, ticker, concept and
+period. Member JSON is parsed on a process pool. The store is built next
+to the target and swapped in atomically, so readers never see a partial
+ingest.
+
+    companies  cik, name, ticker                (index: ticker)
+    tickers    ticker -> cik                    (from company_tickers.json)
+    facts      cik, taxonomy, concept, unit, period_start, period_end,
+               duration_days, val, fy, fp, form, filed, accn
+               (indexes: cik+concept+period_end, concept+period_end)
+
+FactsStore answers extract_from_facts-style questions (revenue, operating
+income, net income, headcount, ...) for any of the ~10k filers with one
+indexed lookup — no EDGAR round trip.
+
+Location: <workspace>/.claude/cache/companyfacts.sqlite
+
+Usage:
+    python sec_filings.py --ingest-facts ~/Downloads/companyfacts.zip \\
+                          --tickers-json ~/Downloads/company_tickers.json
+    python sec_filings.py --facts-query WING
+
+    from companyfacts_store import FactsStore
+    store = FactsStore()
+    store.summary("WING")                   # {"revenue": ..., "operating_income": ...}
+    store.facts(1636422, "Revenues", annual=True)
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+from datetime import date
+from pathlib import Path
+
+# (taxonomy, concept) kept by a default ingest. Summary keys map to candidate
+# concepts; the newest period across all of them wins and the order only breaks
+# ties (unlike KEY_CONCEPTS in sec_filings.py, which reads a single filing).
+SUMMARY_CONCEPTS = {
+    "revenue":          ("Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax",
+                         "RevenueFromContractWithCustomerIncludingAssessedTax", "SalesRevenueNet"),
+    "operating_income": ("OperatingIncomeLoss",),
+    "net_income":       ("NetIncomeLoss", "ProfitLoss"),
+    "gross_profit":     ("GrossProfit",),
+    "total_assets":     ("Assets",),
+    "equity":           ("StockholdersEquity",),
+    "employees":        ("EntityNumberOfEmployees",),
+}
+INGEST_CONCEPTS = frozenset(c for options in SUMMARY_CONCEPTS.values() for c in options) | {
+    "CostOfRevenue", "CostOfGoodsAndServicesSold", "SellingGeneralAndAdministrativeExpense",
+    "EntityCommonStockSharesOutstanding",
+}
+TAXONOMIES = ("us-gaap", "dei", "ifrs-full")
+ANNUAL_DAYS = (350, 380)          # duration window treated as a fiscal year
+
+_MEMBER_RE = re.compile(r"CIK(\d{10})\.json$")
+_BATCH_ROWS = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    cik     INTEGER PRIMARY KEY,
+    name    TEXT,
+    ticker  TEXT
+);
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker  TEXT PRIMARY KEY,
+    cik     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    cik            INTEGER NOT NULL,
+    taxonomy       TEXT NOT NULL,
+    concept        TEXT NOT NULL,
+    unit           TEXT NOT NULL,
+    period_start   TEXT,
+    period_end     TEXT NOT NULL,
+    duration_days  INTEGER,
+    val            REAL,
+    fy             INTEGER,
+    fp             TEXT,
+    form           TEXT,
+    filed          TEXT,
+    accn           TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS facts_cik_concept_period ON facts (cik, concept, period_end);
+CREATE INDEX IF NOT EXISTS facts_concept_period ON facts (concept, period_end);
+CREATE INDEX IF NOT EXISTS companies_ticker ON companies (ticker);
+"""
+
+
+def default_store_path():
+    from workspace import settings
+    return settings.cache_dir / "companyfacts.sqlite"
+
+
+def _days(start, end):
+    try:
+        return (date.fromisoformat(end) - date.fromisoformat(start)).days
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Ingest
+# ---------------------------------------------------------------------------
+_zips = {}
+
+
+def _open_zip(zip_path):
+    """ZipFile per path, opened once per process (the central directory of
+    companyfacts.zip lists ~18k members; re-reading it per member dominates)."""
+    zf = _zips.get(zip_path)
+    if zf is None:
+        zf = _zips[zip_path] = zipfile.ZipFile(zip_path)
+    return zf
+
+
+def parse_member(zip_path, member, concepts=INGEST_CONCEPTS):
+    """
+    (cik, entity name, fact rows) for one CIK##########.json member.
+
+    Streams the member out of the zip. *concepts* None keeps every concept.
+    Facts repeated across filings keep only the latest-filed value per
+    (concept, unit, start, end).
+    """
+    with _open_zip(zip_path).open(member) as f:
+        data = json.load(f)
+    cik = int(data.get("cik") or _MEMBER_RE.search(member).group(1))
+    latest = {}
+    for taxonomy, items in (data.get("facts") or {}).items():
+        if taxonomy not in TAXONOMIES:
+            continue
+        for concept, body in items.items():
+            if concepts is not None and concept not in concepts:
+                continue
+            for unit, points in (body.get("units") or {}).items():
+                for p in points:
+                    end = p.get("end")
+                    if not end or p.get("val") is None:
+                        continue
+                    start = p.get("start")
+                    key = (concept, unit, start, end)
+                    filed = p.get("filed") or ""
+                    if key in latest and latest[key][11] >= filed:
+                        continue
+                    latest[key] = (cik, taxonomy, concept, unit, start, end, _days(start, end),
+                                   p["val"], p.get("fy"), p.get("fp"), p.get("form"), filed, p.get("accn"))
+    return cik, data.get("entityName"), list(latest.values())
+
+
+def _parse_safe(zip_path, concepts, member):
+    try:
+        return parse_member(zip_path, member, concepts)
+    except (ValueError, KeyError, AttributeError, zipfile.BadZipFile) as e:
+        return member, None, str(e)
+
+
+def _load_tickers(path):
+    """[(ticker, cik)] from SEC company_tickers.json ({"0": {"cik_str", "ticker", "title"}, ...})."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    rows = data.values() if isinstance(data, dict) else data
+    return [(str(r["ticker"]).upper(), int(r["cik_str"])) for r in rows if r.get("ticker")]
+
+
+def ingest(zip_path, path=None, tickers_json=None, concepts=INGEST_CONCEPTS, workers=None):
+    """
+    Build the store from a local companyfacts.zip. Returns ingest stats.
+
+    *concepts* None ingests every concept (much larger store). Member JSON
+    is parsed on *workers* processes (default: CPU count); rows are written
+    in batches to a temporary database that replaces *path* when complete.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    t0 = time.perf_counter()
+    path = Path(path) if path else default_store_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        members = [n for n in zf.namelist() if _MEMBER_RE.search(n)]
+
+    conn = sqlite3.connect(tmp)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+    companies, rows, errors, pending = 0, 0, [], []
+
+    def flush():
+        conn.executemany("INSERT INTO facts VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", pending)
+        pending.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parse = partial(_parse_safe, str(zip_path), concepts)
+            for cik, name, facts in pool.map(parse, members, chunksize=32):
+                if name is None and isinstance(facts, str):
+                    errors.append({"member": cik, "error": facts})
+                    continue
+                conn.execute("INSERT OR REPLACE INTO companies (cik, name) VALUES (?, ?)", (cik, name))
+                companies += 1
+                rows += len(facts)
+                pending.extend(facts)
+                if len(pending) >= _BATCH_ROWS:
+                    flush()
+        flush()
+
+        ticker_rows = _load_tickers(tickers_json) if tickers_json else []
+        conn.executemany("INSERT OR REPLACE INTO tickers VALUES (?, ?)", ticker_rows)
+        # Primary ticker per company = first listed (SEC orders by market cap)
+        first = {}
+        for ticker, cik in ticker_rows:
+            first.setdefault(cik, ticker)
+        conn.executemany("UPDATE companies SET ticker = ? WHERE cik = ?", [(t, c) for c, t in first.items()])
+
+        conn.executescript(_INDEXES)
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ("source", str(Path(zip_path).resolve())),
+            ("ingested_at", date.today().isoformat()),
+            ("concepts", "all" if concepts is None else ",".join(sorted(concepts))),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+
+    return {
+        "store":     str(path),
+        "members":   len(members),
+        "companies": companies,
+        "facts":     rows,
+        "tickers":   len(ticker_rows),
+        "errors":    errors[:20],
+        "error_count": len(errors),
+        "seconds":   round(time.perf_counter() - t0, 2),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Query API
+# ---------------------------------------------------------------------------
+class FactsStore:
+    """Read-only queries over an ingested companyfacts store (thread-safe)."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_store_path()
+        self._local = threading.local()
+
+    def exists(self):
+        return self.path.exists()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def resolve(self, company):
+        """CIK for a CIK (int or digit string) or ticker; None if unknown."""
+        if isinstance(company, int) or str(company).lstrip("0").isdigit():
+            return int(company)
+        row = self._conn().execute("SELECT cik FROM tickers WHERE ticker = ?",
+                                   (str(company).upper(),)).fetchone()
+        if row is None:
+            row = self._conn().execute("SELECT cik FROM companies WHERE ticker = ?",
+                                       (str(company).upper(),)).fetchone()
+        return row[0] if row else None
+
+    def company(self, company):
+        """{"cik", "name", "ticker"} or None."""
+        cik = self.resolve(company)
+        if cik is None:
+            return None
+        row = self._conn().execute("SELECT cik, name, ticker FROM companies WHERE cik = ?",
+                                   (cik,)).fetchone()
+        return dict(zip(("cik", "name", "ticker"), row)) if row else None
+
+    def facts(self, company, concept, unit=None, annual=False, limit=None):
+        """
+        Fact rows for one concept, newest period first. *annual* keeps
+        fiscal-year durations (and instants, e.g. Assets) from 10-K filings.
+        """
+        cik = self.resolve(company)
+        if cik is None:
+            return []
+        sql = ("SELECT period_start, period_end, duration_days, val, unit, fy, fp, form, filed, accn "
+               "FROM facts WHERE cik = ? AND concept = ?")
+        params = [cik, concept]
+        if unit:
+            sql += " AND unit = ?"
+            params.append(unit)
+        if annual:
+            sql += (" AND form LIKE '10-K%' AND (duration_days IS NULL"
+                    " OR duration_days BETWEEN ? AND ?)")
+            params += ANNUAL_DAYS
+        sql += " ORDER BY period_end DESC, filed DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        cols = ("start", "end", "days", "val", "unit", "fy", "fp", "form", "filed", "accn")
+        return [dict(zip(cols, r)) for r in self._conn().execute(sql, params)]
+
+    def latest(self, company, concepts, annual=True):
+        """
+        Most recent fact row across all of *concepts*: latest period_end, then
+        latest filed, then concept order. Filers that moved from Revenues to
+        the ASC 606 concept keep the old concept's history, so the first
+        concept with data is not necessarily the current figure.
+        """
+        concepts = (concepts,) if isinstance(concepts, str) else tuple(concepts)
+        best, best_key = None, None
+        for priority, concept in enumerate(concepts):
+            rows = self.facts(company, concept, annual=annual, limit=1)
+            if not rows:
+                continue
+            key = (rows[0]["end"] or "", rows[0]["filed"] or "", -priority)
+            if best_key is None or key > best_key:
+                best, best_key = {"concept": concept, **rows[0]}, key
+        return best
+
+    def summary(self, company):
+        """
+        {key: latest annual value} for SUMMARY_CONCEPTS keys — the same
+        shape extract_from_facts returns. {} if the company is not stored.
+        """
+        cik = self.resolve(company)
+        if cik is None:
+            return {}
+        out = {}
+        for key, concepts in SUMMARY_CONCEPTS.items():
+            # Headcount is a cover-page (dei) instant, not tied to 10-K durations
+            row = self.latest(cik, concepts, annual=key != "employees")
+            out[key] = int(row["val"]) if row else None
+        return out if any(v is not None for v in out.values()) else {}
+
+    def stats(self):
+        if not self.exists():
+            return {"store": str(self.path), "exists": False}
+        conn = self._conn()
+        count = lambda table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]  # noqa: E731
+        return {
+            "store":     str(self.path),
+            "exists":    True,
+            "bytes":     self.path.stat().st_size,
+            "companies": count("companies"),
+            "tickers":   count("tickers"),
+            "facts":     count("facts"),
+            **dict(conn.execute("SELECT key, value FROM meta")),
+        }
+
+
+_default_store = None
+
+
+def default_store():
+    """Shared FactsStore for the workspace, or None if nothing has been ingested."""
+    global _default_store
+    if _default_store is None:
+        _default_store = FactsStore()
+    return _default_store if _default_store.exists() else None
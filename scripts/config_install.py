@@ -9,87 +9,250 @@ Behaviour:
   - Re-run, plugin updated, no user edits: overwrite dest, update manifest
   - Re-run, plugin updated, user edited:  save src as dest.plugin_update.json,
                                           print warning — user merges manually
+  - --validate and src fails the template config schema:
+                                          reject (exit 1), dest untouched
+
+User edits are detected against the manifest: a workspace file whose size
+and mtime still match what was recorded at install is unedited without
+being read; otherwise it is hashed (streamed, 1 MB at a time).
+
+Batch mode (--src-dir/--dest-dir) installs every matching file of a folder
+in one run: the manifest is loaded once, files are checked and copied on a
+thread pool, and the manifest is written once. Every run holds an exclusive
+lock on <manifest>.lock and replaces the manifest atomically, so concurrent
+installs cannot lose each other's entries.
 
 Usage:
     python config_install.py --src <plugin_file> --dest <workspace_file>
                              --manifest <manifest.json> --plugin-version <version>
+                             [--validate]
+    python config_install.py --src-dir <plugin_dir> --dest-dir <workspace_dir>
+                             --manifest <manifest.json> --plugin-version <version>
+                             [--pattern "*.json"] [--validate] [--workers 8]
 """
 import argparse
 import hashlib
 import json
+import os
 import shutil
 import sys
+import tempfile
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+HASH_CHUNK = 1024 * 1024
+LOCK_TIMEOUT = 30     # seconds
+
 
 def _md5(path: Path) -> str:
-    return hashlib.md5(path.read_bytes()).hexdigest()
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
 
 
-def main():
-    p = argparse.ArgumentParser(description="Version-aware config file installer")
-    p.add_argument("--src",            required=True, help="Source file (from plugin)")
-    p.add_argument("--dest",           required=True, help="Destination file (in workspace)")
-    p.add_argument("--manifest",       required=True, help="Path to template_manifest.json")
-    p.add_argument("--plugin-version", required=True, help="Current plugin version string")
-    args = p.parse_args()
+def _stamp(path: Path) -> dict:
+    st = path.stat()
+    return {"installed_size": st.st_size, "installed_mtime_ns": st.st_mtime_ns}
+
+
+def _entry(dest: Path, plugin_version: str) -> dict:
+    return {"plugin_version": plugin_version, "installed_hash": _md5(dest), **_stamp(dest)}
 
-    src     = Path(args.src)
-    dest    = Path(args.dest)
-    mf_path = Path(args.manifest)
 
+def _user_edited(dest: Path, prev: dict) -> bool:
+    """True if *dest* differs from what was installed (stat fast path, then hash)."""
+    if "installed_size" in prev and _stamp(dest) == {
+            "installed_size": prev["installed_size"], "installed_mtime_ns": prev.get("installed_mtime_ns")}:
+        return False
+    return _md5(dest) != prev.get("installed_hash", "")
+
+
+# ---------------------------------------------------------------------------
+# Manifest: exclusive lock + atomic write
+# ---------------------------------------------------------------------------
+@contextmanager
+def _locked(mf_path: Path):
+    """Hold an exclusive lock on <manifest>.lock (fcntl / msvcrt) for the block."""
+    mf_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(mf_path.with_name(mf_path.name + ".lock"), "a+b") as lock:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"manifest locked by another install: {mf_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                import msvcrt
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _read_manifest(mf_path: Path) -> dict:
+    return json.loads(mf_path.read_text(encoding="utf-8")) if mf_path.exists() else {}
+
+
+def _file_mode(path: Path) -> int:
+    """Mode for a file replacing *path*: its current mode, else the umask default."""
+    try:
+        return path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_manifest(mf_path: Path, manifest: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=mf_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.chmod(tmp, _file_mode(mf_path))   # mkstemp creates 0600
+        os.replace(tmp, mf_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Install one file
+# ---------------------------------------------------------------------------
+def install_file(src: Path, dest: Path, prev: dict, plugin_version: str, validate: bool = False):
+    """
+    Install *src* to *dest* given its previous manifest entry *prev*.
+
+    Returns (result, new manifest entry or None). Touches only *dest* (and
+    its .plugin_update.json sibling); the caller records the entry.
+    """
     if not src.exists():
-        print(json.dumps({"action": "skipped", "file": src.name, "reason": "src_missing"}))
-        return
+        return {"action": "skipped", "file": src.name, "reason": "src_missing"}, None
+
+    if validate:
+        from template_registry import validate_config
+        try:
+            errors = validate_config(json.loads(src.read_text(encoding="utf-8")))
+        except ValueError as e:
+            errors = [f"unreadable JSON: {e}"]
+        if errors:
+            return {"action": "rejected", "file": src.name, "errors": errors}, None
 
-    manifest = json.loads(mf_path.read_text(encoding="utf-8")) if mf_path.exists() else {}
     dest.parent.mkdir(parents=True, exist_ok=True)
 
     if not dest.exists():
         # Fresh install
         shutil.copy2(src, dest)
-        manifest[src.name] = {
-            "plugin_version":  args.plugin_version,
-            "installed_hash":  _md5(dest),
-        }
-        mf_path.parent.mkdir(parents=True, exist_ok=True)
-        mf_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-        print(json.dumps({"action": "installed", "file": src.name}))
-        return
-
-    prev = manifest.get(src.name, {})
+        return {"action": "installed", "file": src.name}, _entry(dest, plugin_version)
 
-    if prev.get("plugin_version") == args.plugin_version:
+    if prev.get("plugin_version") == plugin_version:
         # Plugin hasn't changed this file since last install
-        print(json.dumps({"action": "skipped", "file": src.name, "reason": "no_plugin_update"}))
-        return
+        return {"action": "skipped", "file": src.name, "reason": "no_plugin_update"}, None
 
     # Plugin has a newer version — check whether user modified the workspace copy
-    workspace_hash = _md5(dest)
-
-    if workspace_hash == prev.get("installed_hash", ""):
+    if not _user_edited(dest, prev):
         # No user edits — safe to overwrite
         shutil.copy2(src, dest)
-        manifest[src.name] = {
-            "plugin_version":  args.plugin_version,
-            "installed_hash":  _md5(dest),
-        }
-        mf_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-        print(json.dumps({"action": "updated", "file": src.name}))
-    else:
-        # User has local edits — save update alongside, don't overwrite
-        update_path = dest.with_suffix(".plugin_update.json")
-        shutil.copy2(src, update_path)
-        print(json.dumps({
-            "action":          "conflict",
-            "file":            src.name,
-            "update_saved_as": str(update_path),
-            "message":         (
-                f"{src.name} has local edits. "
-                f"Plugin update saved as {update_path.name} — "
-                "merge manually then delete the .plugin_update.json file."
-            ),
-        }))
+        return {"action": "updated", "file": src.name}, _entry(dest, plugin_version)
+
+    # User has local edits — save update alongside, don't overwrite
+    update_path = dest.with_suffix(".plugin_update.json")
+    shutil.copy2(src, update_path)
+    return {
+        "action":          "conflict",
+        "file":            src.name,
+        "update_saved_as": str(update_path),
+        "message":         (
+            f"{src.name} has local edits. "
+            f"Plugin update saved as {update_path.name} — "
+            "merge manually then delete the .plugin_update.json file."
+        ),
+    }, None
+
+
+def install_many(pairs, mf_path: Path, plugin_version: str, validate: bool = False, workers: int = 8):
+    """
+    Install [(src, dest)] with one manifest read and one atomic write, under
+    the manifest lock. Files are processed on *workers* threads. Returns the
+    per-file results in input order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _locked(mf_path):
+        manifest = _read_manifest(mf_path)
+
+        def run(pair):
+            src, dest = pair
+            return install_file(src, dest, manifest.get(src.name, {}), plugin_version, validate)
+
+        if workers > 1 and len(pairs) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(run, pairs))
+        else:
+            outcomes = [run(pair) for pair in pairs]
+
+        updates = {src.name: entry for (src, _), (_, entry) in zip(pairs, outcomes) if entry}
+        if updates:
+            manifest.update(updates)
+            _write_manifest(mf_path, manifest)
+    return [result for result, _ in outcomes]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Version-aware config file installer")
+    p.add_argument("--src",            help="Source file (from plugin)")
+    p.add_argument("--dest",           help="Destination file (in workspace)")
+    p.add_argument("--src-dir",        help="Batch mode: install every --pattern file in this plugin folder")
+    p.add_argument("--dest-dir",       help="Batch mode: workspace folder to install into")
+    p.add_argument("--pattern",        default="*.json", help="Batch mode file pattern (default: *.json)")
+    p.add_argument("--workers",        type=int, default=8, help="Batch mode threads (default: 8)")
+    p.add_argument("--manifest",       required=True, help="Path to template_manifest.json")
+    p.add_argument("--plugin-version", required=True, help="Current plugin version string")
+    p.add_argument("--validate",       action="store_true",
+                   help="Check src against the template config schema first")
+    args = p.parse_args()
+
+    mf_path = Path(args.manifest)
+
+    if args.src_dir or args.dest_dir:
+        if not (args.src_dir and args.dest_dir) or args.src or args.dest:
+            p.error("batch mode needs both --src-dir and --dest-dir (and no --src/--dest)")
+        t0 = time.perf_counter()
+        dest_dir = Path(args.dest_dir)
+        pairs = [(src, dest_dir / src.name) for src in sorted(Path(args.src_dir).glob(args.pattern))
+                 if src.is_file()]
+        results = install_many(pairs, mf_path, args.plugin_version, args.validate, args.workers)
+        counts = {}
+        for r in results:
+            counts[r["action"]] = counts.get(r["action"], 0) + 1
+        print(json.dumps({"results": results, "counts": counts,
+                          "seconds": round(time.perf_counter() - t0, 3)}, indent=2))
+        if counts.get("rejected"):
+            sys.exit(1)
+        return
+
+    if not (args.src and args.dest):
+        p.error("--src and --dest are required (or use --src-dir/--dest-dir)")
+    result, = install_many([(Path(args.src), Path(args.dest))], mf_path,
+                           args.plugin_version, args.validate, workers=1)
+    print(json.dumps(result))
+    if result["action"] == "rejected":
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -26,6 +26,9 @@ import shutil
 import sys
 from pathlib import Path
 
+# Dollar formatting — THE single standard lives in number_format.py
+from number_format import DOLLAR_FORMAT_HELP, format_dollars, replace_raw_dollars
+
 # ---------------------------------------------------------------------------
 # Graceful dependency checks
 # ---------------------------------------------------------------------------
@@ -39,43 +42,11 @@ def _require(module_name, pip_name=None):
         sys.exit(1)
 
 
-# ---------------------------------------------------------------------------
-# Dollar formatting — THE single standard
-# ---------------------------------------------------------------------------
-DOLLAR_FORMAT_HELP = """
-Dollar formatting standard:
-    $1M+       → $X.XMM   (1 decimal, uppercase MM, e.g. $21.6MM, $2.0MM)
-    $1K–$999K  → $XXXk    (integer, lowercase k, e.g. $516k, $2k)
-    Under $1K  → $XXX     (plain integer, no suffix)
-"""
-
-def format_dollars(value):
-    """Format a numeric value per Jolly dollar standards.
-
-    Returns formatted string (e.g. "$21.6MM", "$516k", "$850").
-    """
-    if value is None:
-        return ""
-    value = abs(float(value))
-
-    if value >= 1_000_000:
-        mm = value / 1_000_000
-        return f"${mm:.1f}MM"
-    elif value >= 1_000:
-        k = int(round(value / 1_000))
-        return f"${k}k"
-    else:
-        return f"${int(value)}"
-
-
 # ---------------------------------------------------------------------------
 # Bracket placeholder regex — matches any [...] token
 # ---------------------------------------------------------------------------
 BRACKET_RE = re.compile(r'\[.*?\]')
 
-# Raw dollar regex — $XXXXX+ with optional commas and decimals
-RAW_DOLLAR_RE = re.compile(r'\$[\d,]{5,}(?:\.\d+)?')
-
 
 # ---------------------------------------------------------------------------
 # Shape helpers — iterate paragraphs from text frames AND table cells
@@ -247,15 +218,8 @@ def action_format_dollars(args):
         for shape in slide.shapes:
             for para in _iter_shape_paragraphs(shape):
                 for run in para.runs:
-                    matches = RAW_DOLLAR_RE.findall(run.text)
-                    if not matches:
-                        continue
-                    new_text = run.text
-                    for m in matches:
-                        raw_num = float(m.replace("$", "").replace(",", ""))
-                        formatted = format_dollars(raw_num)
-                        new_text = new_text.replace(m, formatted, 1)
-                    if new_text != run.text:
+                    new_text, n = replace_raw_dollars(run.text)
+                    if n and new_text != run.text:
                         old = run.text
                         run.text = new_text
                         replacements_made += 1
@@ -357,15 +321,8 @@ def action_format_all(args):
         for shape in slide.shapes:
             for para in _iter_shape_paragraphs(shape):
                 for run in para.runs:
-                    matches = RAW_DOLLAR_RE.findall(run.text)
-                    if not matches:
-                        continue
-                    new_text = run.text
-                    for m_str in matches:
-                        raw_num = float(m_str.replace("$", "").replace(",", ""))
-                        formatted = format_dollars(raw_num)
-                        new_text = new_text.replace(m_str, formatted, 1)
-                    if new_text != run.text:
+                    new_text, n = replace_raw_dollars(run.text)
+                    if n and new_text != run.text:
                         old = run.text
                         run.text = new_text
                         dollar_replacements += 1
@@ -0,0 +1,269 @@
+"""
+EDGAR Cache
+===========
+Persistent on-disk cache for SEC EDGAR responses used by sec_filings.py.
+
+One SQLite file holds every cached item, keyed by (kind, key):
+
+    kind        key                 value                       default TTL
+    company     TICKER              {"cik", "name"}             30 days
+    facts       CIK                 facts summary dict          7 days
+    filings     CIK                 filing index (10-K / 10-Q)  1 day
+    statement   ACCESSION           income statement DataFrame  never expires
+    text        ACCESSION           10-K MD&A / business text   never expires
+    html        ACCESSION           10-K HTML                   never expires
+
+Filed documents never change, so accession-keyed kinds never expire; company
+facts and filing lists move when a company files, so they get short TTLs
+(vertical_benchmarks.json assumes a 90-day refresh, well inside these).
+
+In offline mode (--offline, or SEC_OFFLINE=1 in .claude/.env / environment)
+only the cache is consulted: stale entries are served and a miss raises
+CacheMiss instead of touching the network. Tests can seed a cache with
+put() and run sec_filings against it offline.
+
+Location: <workspace>/.claude/cache/edgar.sqlite
+
+Usage:
+    python edgar_cache.py --stats
+    python edgar_cache.py --clear facts
+
+    from edgar_cache import EdgarCache
+    cache = EdgarCache()
+    facts = cache.fetch("facts", cik, lambda: load_facts(company))
+"""
+import json
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+DAY = 86_400
+DEFAULT_TTLS = {
+    "company":   30 * DAY,
+    "facts":     7 * DAY,
+    "filings":   1 * DAY,
+    "statement": None,
+    "text":      None,
+    "html":      None,
+}
+
+# How each kind is stored: json (dicts/lists), pickle (DataFrames), zlib text
+ENCODINGS = {
+    "company": "json", "facts": "json", "filings": "json",
+    "statement": "pickle", "text": "json", "html": "text",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    stored_at   REAL NOT NULL,
+    encoding    TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+
+class CacheMiss(LookupError):
+    """Offline mode and the requested item is not cached."""
+
+
+def default_cache_path():
+    from workspace import settings
+    return settings.cache_dir / "edgar.sqlite"
+
+
+def offline_default():
+    from workspace import settings
+    return settings.env("SEC_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _encode(value, encoding):
+    if encoding == "json":
+        return json.dumps(value, default=str).encode("utf-8")
+    if encoding == "text":
+        return zlib.compress(value.encode("utf-8"))
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(blob, encoding):
+    if encoding == "json":
+        return json.loads(blob)
+    if encoding == "text":
+        return zlib.decompress(blob).decode("utf-8")
+    return pickle.loads(blob)
+
+
+class EdgarCache:
+    """SQLite-backed EDGAR cache with per-kind TTLs and an offline mode."""
+
+    def __init__(self, path=None, offline=None, ttls=None, enabled=True):
+        self.path = Path(path) if path else default_cache_path()
+        self.offline = offline_default() if offline is None else offline
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled or self.offline
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "stores": 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # -- connection (one per thread) -----------------------------------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # -- primitives ----------------------------------------------------------
+    def get(self, kind, key, allow_stale=False):
+        """Return the cached value, or None if missing (or expired, unless *allow_stale*)."""
+        if not self.enabled:
+            return None
+        row = self._conn().execute(
+            "SELECT stored_at, encoding, value FROM entries WHERE kind = ? AND key = ?",
+            (kind, str(key))).fetchone()
+        if row is None:
+            return None
+        stored_at, encoding, blob = row
+        ttl = self.ttls.get(kind)
+        if ttl is not None and time.time() - stored_at > ttl and not allow_stale:
+            return None
+        try:
+            return _decode(blob, encoding)
+        except Exception:
+            return None   # unreadable (e.g. pickle from another pandas) -> treat as miss
+
+    def put(self, kind, key, value):
+        """Store *value*; None is not cached."""
+        if not self.enabled or value is None:
+            return value
+        encoding = ENCODINGS.get(kind, "pickle")
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, stored_at, encoding, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, str(key), time.time(), encoding, _encode(value, encoding)))
+        self._count("stores")
+        return value
+
+    def fetch(self, kind, key, loader):
+        """
+        Return the cached value for (kind, key), calling *loader()* on a miss
+        or expiry and caching its result. Offline: serve stale entries, and
+        raise CacheMiss rather than call *loader*.
+        """
+        value = self.get(kind, key)
+        if value is not None:
+            self._count("hits")
+            return value
+        if self.offline:
+            value = self.get(kind, key, allow_stale=True)
+            if value is None:
+                self._count("misses")
+                raise CacheMiss(f"offline: no cached {kind} for {key}")
+            self._count("stale_hits")
+            return value
+        self._count("misses")
+        return self.put(kind, key, loader())
+
+    def items(self, kind):
+        """Yield (key, value) for every readable cached entry of *kind*, ignoring TTLs."""
+        if not self.path.exists():
+            return
+        rows = self._conn().execute(
+            "SELECT key, encoding, value FROM entries WHERE kind = ? ORDER BY key", (kind,)).fetchall()
+        for key, encoding, blob in rows:
+            try:
+                yield key, _decode(blob, encoding)
+            except Exception:
+                continue
+
+    # -- maintenance ---------------------------------------------------------
+    def stats(self):
+        """Per-kind entry counts, sizes, ages and expired counts."""
+        kinds = {}
+        now = time.time()
+        if self.path.exists():
+            rows = self._conn().execute(
+                "SELECT kind, COUNT(*), SUM(LENGTH(value)), MIN(stored_at), MAX(stored_at) "
+                "FROM entries GROUP BY kind").fetchall()
+            for kind, count, size, oldest, newest in rows:
+                ttl = self.ttls.get(kind)
+                expired = 0
+                if ttl is not None:
+                    expired = self._conn().execute(
+                        "SELECT COUNT(*) FROM entries WHERE kind = ? AND stored_at < ?",
+                        (kind, now - ttl)).fetchone()[0]
+                kinds[kind] = {
+                    "entries":         count,
+                    "bytes":           size or 0,
+                    "expired":         expired,
+                    "ttl_days":        None if ttl is None else round(ttl / DAY, 2),
+                    "oldest_age_days": round((now - oldest) / DAY, 2),
+                    "newest_age_days": round((now - newest) / DAY, 2),
+                }
+        return {
+            "path":       str(self.path),
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "offline":    self.offline,
+            "kinds":      kinds,
+            "session":    dict(self.counters),
+        }
+
+    def clear(self, kind=None, expired_only=False):
+        """Delete entries (all, one kind, or only expired ones). Returns rows deleted."""
+        if not self.path.exists():
+            return 0
+        conn = self._conn()
+        deleted = 0
+        with conn:
+            for k in ([kind] if kind else list(self.ttls)):
+                if expired_only:
+                    ttl = self.ttls.get(k)
+                    if ttl is None:
+                        continue
+                    cur = conn.execute("DELETE FROM entries WHERE kind = ? AND stored_at < ?",
+                                       (k, time.time() - ttl))
+                else:
+                    cur = conn.execute("DELETE FROM entries WHERE kind = ?", (k,))
+                deleted += cur.rowcount
+        return deleted
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the EDGAR cache")
+    parser.add_argument("--cache", help="Cache file (default: <workspace>/.claude/cache/edgar.sqlite)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--stats", action="store_true", help="Per-kind cache statistics (default)")
+    group.add_argument("--clear", nargs="?", const="all", metavar="KIND",
+                       help=f"Delete cached entries (all, or one of {', '.join(DEFAULT_TTLS)})")
+    group.add_argument("--prune", action="store_true", help="Delete expired entries only")
+    args = parser.parse_args()
+
+    cache = EdgarCache(path=args.cache)
+    if args.clear:
+        if args.clear != "all" and args.clear not in DEFAULT_TTLS:
+            parser.error(f"unknown kind {args.clear!r}")
+        print(json.dumps({"deleted": cache.clear(None if args.clear == "all" else args.clear)}))
+    elif args.prune:
+        print(json.dumps({"deleted": cache.clear(expired_only=True)}))
+    else:
+        print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,49 @@ CLI for reading and writing Jolly intro model Excel files.
 
 Actions:
     scan-formulas  — list every formula cell address in the workbook
+    dependents     — formula cells a cell drives (direct and transitive)
+    precedents     — cells a formula cell reads (direct and transitive)
     write-cells    — write values (and optional comments) to named cells
     read-summary   — read key inputs from the Inputs sheet
+    list-snapshots — list the undo snapshots recorded before each write
+    restore        — roll the model back to snapshot --to N (undoes N and later)
+    recalc         — recompute every supported formula and refresh cached values
 
 Usage:
     python excel_editor.py --file model.xlsx --action scan-formulas
+    python excel_editor.py --file model.xlsx --action dependents --cell Inputs!C55
     python excel_editor.py --file model.xlsx --action write-cells --cells '[{"sheet":"Inputs","cell":"E6","value":12000000,"comment":"..."}]'
+    python excel_editor.py --file model.xlsx --action write-cells --cells-file plan.ndjson
+    cat plan.ndjson | python excel_editor.py --file model.xlsx --action write-cells --cells-file -
     python excel_editor.py --file model.xlsx --action read-summary
+    python excel_editor.py --file model.xlsx --action list-snapshots
+    python excel_editor.py --file model.xlsx --action restore --to 3
+    python excel_editor.py --file model.xlsx --action recalc
+
+--cells-file takes a JSON array or NDJSON (one write object per line) from a
+file or stdin ("-"). Use it for large dry-run plans: it avoids OS argv limits
+and applies every write, across every sheet, in a single load/save.
+
+write-cells patches only the changed XML parts of the .xlsx (xlsx_patch.py),
+leaving every other part of the template byte-for-byte intact. Pass
+--engine openpyxl to force the previous full load/save round-trip.
+
+scan-formulas, dependents and precedents share a formula dependency graph
+(formula_graph.py) cached by file hash, so repeat scans of an unchanged
+template are cache hits.
+
+After a write, the formulas downstream of the written cells are recomputed
+(formula_eval.py) and their cached values saved with the write, so data_only
+readers (read-summary, qa_check) see current numbers without opening Excel.
+Pass --no-recalc to skip this.
 """
 import re as _re
+import time as _time
 from jolly_utils import load_workbook_safe, save_workbook_safe, add_comment
 
 _CTRL_CHAR_RE = _re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_CELL_REF_RE = _re.compile(r'^\$?([A-Z]{1,3})\$?([1-9][0-9]*)$')
+
 
 def _sanitize(text):
     """Strip XML-illegal control characters before openpyxl write."""
@@ -25,55 +56,350 @@ def _sanitize(text):
     return text
 
 
+def _is_formula(value):
+    return isinstance(value, str) and value.startswith("=")
+
+
+def _normalize_ref(ref):
+    """Return an A1 reference without $ anchors, or None if *ref* is invalid."""
+    m = _CELL_REF_RE.match(str(ref).strip().upper())
+    return f"{m.group(1)}{m.group(2)}" if m else None
+
+
+def _read_writes(stream):
+    """Parse write objects from a JSON array or NDJSON text stream.
+
+    NDJSON is consumed line by line. Returns (writes, errors).
+    """
+    import itertools, json
+    first, skipped = "", 0
+    for first in stream:
+        if first.strip():
+            break
+        skipped += 1
+    if not first.strip():
+        return [], []
+
+    if first.lstrip().startswith("["):
+        try:
+            writes = json.loads(first + stream.read())
+        except json.JSONDecodeError as e:
+            return [], [f"invalid JSON array: {e}"]
+        if not isinstance(writes, list):
+            return [], ["expected a JSON array of write objects"]
+        return writes, []
+
+    writes, errors = [], []
+    for lineno, line in enumerate(itertools.chain([first], stream), skipped + 1):
+        if not line.strip():
+            continue
+        try:
+            writes.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            errors.append(f"line {lineno}: {e}")
+    return writes, errors
+
+
+def _plan_writes(sheetnames, formula_cells, writes):
+    """Validate every write before anything is applied.
+
+    *formula_cells* maps a sheet name to its set of formula coordinates and is
+    called once per targeted sheet. Returns (plan, skipped, errors): *plan*
+    holds (sheet, ref, write) tuples that are safe to apply; formula targets
+    go to *skipped*; malformed entries and unknown sheets go to *errors*.
+    """
+    errors, resolved = [], []
+    for i, w in enumerate(writes):
+        if not isinstance(w, dict) or "cell" not in w or "value" not in w:
+            errors.append(f"write {i}: needs 'cell' and 'value'")
+            continue
+        ref = _normalize_ref(w["cell"])
+        sheet = w.get("sheet", "Inputs")
+        if ref is None:
+            errors.append(f"write {i}: invalid cell reference {w['cell']!r}")
+        elif sheet not in sheetnames:
+            errors.append(f"write {i}: sheet {sheet!r} not found")
+        else:
+            resolved.append((sheet, ref, w))
+
+    index = {sheet: formula_cells(sheet) for sheet in {s for s, _, _ in resolved}}
+    plan, skipped = [], []
+    for sheet, ref, w in resolved:
+        if ref in index[sheet]:
+            skipped.append(f"{sheet}!{ref}")
+        else:
+            plan.append((sheet, ref, w))
+    return plan, skipped, errors
+
+
+def _openpyxl_formula_cells(wb):
+    def formula_cells(sheet):
+        return {
+            cell.coordinate
+            for row in wb[sheet].iter_rows()
+            for cell in row
+            if _is_formula(cell.value)
+        }
+    return formula_cells
+
+
+def _ms(start):
+    return round((_time.perf_counter() - start) * 1000, 1)
+
+
+def _apply_plan(plan, set_value, set_comment):
+    """Apply a validated plan through backend callbacks; return per-sheet stats."""
+    sheets = {}
+    for sheet, ref, w in plan:
+        stats = sheets.setdefault(sheet, {"written": 0, "comments": 0})
+        set_value(sheet, ref, _sanitize(w["value"]))
+        stats["written"] += 1
+        if w.get("comment"):
+            set_comment(sheet, ref, _sanitize(w["comment"]))
+            stats["comments"] += 1
+    return sheets
+
+
+def _snapshot(path, members=None, action="write-cells"):
+    """Record the pre-write state in the model's snapshot store.
+
+    *members* maps zip member -> current bytes (None if new). Without it, the
+    whole file is snapshotted. Returns the snapshot id.
+    """
+    from snapshot_store import SnapshotStore
+    store = SnapshotStore(path)
+    if members is None:
+        return store.record_from_file(None, action)
+    return store.record(members, action)
+
+
+def _recalc_written(patcher, path, plan):
+    """Recompute the formulas downstream of *plan* on an applied patcher."""
+    from formula_eval import recalculate
+    from formula_graph import FormulaGraph, node
+    if any(_is_formula(w["value"]) for _, _, w in plan):
+        graph = FormulaGraph.from_patcher(patcher)   # the write changed formulas
+    else:
+        graph, _ = FormulaGraph.load(path)
+    return recalculate(patcher, graph, [node(sheet, ref) for sheet, ref, _ in plan])
+
+
+def _write_cells_patch(path, writes, timings, recalc=True):
+    from xlsx_patch import XlsxPatcher
+    t = _time.perf_counter()
+    patcher = XlsxPatcher(path)
+    timings["load_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    plan, skipped, errors = _plan_writes(patcher.sheetnames, patcher.formula_cells, writes)
+    timings["validate_ms"] = _ms(t)
+    if errors:
+        return plan, skipped, errors, {}, None, None
+
+    t = _time.perf_counter()
+    sheets = _apply_plan(plan, patcher.set_value, patcher.set_comment)
+    patcher.apply()
+    timings["apply_ms"] = _ms(t)
+
+    stats = None
+    if recalc:
+        t = _time.perf_counter()
+        stats = _recalc_written(patcher, path, plan)
+        patcher.apply()
+        timings["recalc_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    snap = _snapshot(path, {n: patcher.original_part(n) for n in patcher.changed_parts()})
+    timings["snapshot_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    patcher.save()
+    timings["save_ms"] = _ms(t)
+    return plan, skipped, errors, sheets, snap, stats
+
+
+def _write_cells_openpyxl(path, writes, timings, recalc=True):
+    t = _time.perf_counter()
+    wb = load_workbook_safe(path)
+    timings["load_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    plan, skipped, errors = _plan_writes(wb.sheetnames, _openpyxl_formula_cells(wb), writes)
+    timings["validate_ms"] = _ms(t)
+    if errors:
+        wb.close()
+        return plan, skipped, errors, {}, None, None
+
+    def set_value(sheet, ref, value):
+        wb[sheet][ref] = value
+
+    def set_comment(sheet, ref, text):
+        add_comment(wb[sheet], ref, text)
+
+    t = _time.perf_counter()
+    sheets = _apply_plan(plan, set_value, set_comment)
+    timings["apply_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    snap = _snapshot(path)
+    timings["snapshot_ms"] = _ms(t)
+
+    t = _time.perf_counter()
+    save_workbook_safe(wb, path)
+    wb.close()
+    timings["save_ms"] = _ms(t)
+
+    stats = None
+    if recalc:
+        # openpyxl drops every cached value on save, so recompute them all
+        t = _time.perf_counter()
+        stats = recalc_workbook(path)
+        timings["recalc_ms"] = _ms(t)
+    return plan, skipped, errors, sheets, snap, stats
+
+
+def recalc_workbook(path, snapshot=False):
+    """Recompute every supported formula in *path* and save the cached values.
+
+    With *snapshot*, the changed parts are recorded first so the recalc can
+    be undone. Returns the recalc stats (see formula_eval.recalculate).
+    """
+    from formula_eval import recalculate
+    from formula_graph import FormulaGraph
+    from xlsx_patch import XlsxPatcher
+    patcher = XlsxPatcher(path)
+    stats = recalculate(patcher, FormulaGraph.from_patcher(patcher))
+    patcher.apply()
+    if patcher.changed_parts():
+        if snapshot:
+            stats["snapshot"] = _snapshot(
+                path, {n: patcher.original_part(n) for n in patcher.changed_parts()}, "recalc")
+        patcher.save()
+    return stats
+
+
+def write_cells(path, writes, engine="patch", recalc=True):
+    """Validate and apply *writes* to the workbook at *path* in one transaction.
+
+    Nothing is written if any entry is malformed. Formula cells are skipped,
+    never overwritten. The default "patch" engine rewrites only the changed
+    XML parts (see xlsx_patch.py) and falls back to a full openpyxl
+    load/save if the workbook cannot be patched in place. Returns a result
+    dict with per-sheet stats, timings and the id of the undo snapshot
+    recorded before the write (see snapshot_store.py). With *recalc*, the
+    cached values of dependent formulas are refreshed in the same save.
+    """
+    from xlsx_patch import XlsxPatchError
+    t0 = _time.perf_counter()
+    timings, notes = {}, []
+    if engine == "patch":
+        try:
+            plan, skipped, errors, sheets, snap, stats = _write_cells_patch(
+                path, writes, timings, recalc)
+        except XlsxPatchError as e:
+            notes.append(f"patch engine unavailable ({e}); used openpyxl")
+            engine, timings = "openpyxl", {}
+    if engine == "openpyxl":
+        plan, skipped, errors, sheets, snap, stats = _write_cells_openpyxl(
+            path, writes, timings, recalc)
+    timings["total_ms"] = _ms(t0)
+
+    result = {"written": 0 if errors else len(plan), "total": len(writes),
+              "skipped": skipped, "engine": engine}
+    if errors:
+        result["errors"] = errors
+    else:
+        result["sheets"] = sheets
+        result["snapshot"] = snap
+        if stats is not None:
+            result["recalc"] = stats
+    if notes:
+        result["notes"] = notes
+    result["timings_ms"] = timings
+    return result
+
+
 def main():
     import argparse, json, sys
 
     parser = argparse.ArgumentParser(description="Excel editor for Jolly intro models")
     parser.add_argument("--file",   required=True, help="Path to Excel model file")
     parser.add_argument("--action", required=True,
-                        choices=["scan-formulas", "write-cells", "read-summary"])
+                        choices=["scan-formulas", "dependents", "precedents", "write-cells",
+                                 "read-summary", "list-snapshots", "restore", "recalc"])
     parser.add_argument("--cells", help='JSON array: [{"sheet":"Inputs","cell":"E6","value":...,"comment":"..."}]')
+    parser.add_argument("--cells-file",
+                        help='File of writes as a JSON array or NDJSON, or "-" for stdin')
+    parser.add_argument("--engine", choices=["patch", "openpyxl"], default="patch",
+                        help="write-cells backend: patch only the changed XML parts "
+                             "(default) or a full openpyxl load/save")
+    parser.add_argument("--no-recalc", action="store_true",
+                        help="write-cells: skip recomputing dependent formula values")
+    parser.add_argument("--cell",
+                        help="Cell(s) for dependents/precedents, e.g. Inputs!C55 (comma-separated)")
+    parser.add_argument("--to", type=int, help="Snapshot id to restore (restore action)")
     args = parser.parse_args()
 
     if args.action == "scan-formulas":
-        wb = load_workbook_safe(args.file, data_only=False)
-        formula_cells = []
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if isinstance(cell.value, str) and cell.value.startswith("="):
-                        formula_cells.append(f"{sheet_name}!{cell.coordinate}")
-        wb.close()
-        print(json.dumps({"formula_cells": formula_cells, "count": len(formula_cells)}))
+        from formula_graph import FormulaGraph
+        t0 = _time.perf_counter()
+        graph, cache_hit = FormulaGraph.load(args.file)
+        formula_cells = graph.formula_cells()
+        by_sheet = {}
+        for ref in formula_cells:
+            sheet = ref.rpartition("!")[0]
+            by_sheet[sheet] = by_sheet.get(sheet, 0) + 1
+        print(json.dumps({
+            "formula_cells": formula_cells,
+            "count":         len(formula_cells),
+            "by_sheet":      by_sheet,
+            "edges":         graph.edge_count(),
+            "cache":         "hit" if cache_hit else "miss",
+            "elapsed_ms":    _ms(t0),
+        }))
+
+    elif args.action in ("dependents", "precedents"):
+        if not args.cell:
+            print(f"ERROR: --cell required for {args.action} action", file=sys.stderr)
+            sys.exit(1)
+        from formula_graph import FormulaGraph
+        from xlsx_patch import XlsxPatchError
+        graph, cache_hit = FormulaGraph.load(args.file)
+        results = []
+        for text in args.cell.split(","):
+            try:
+                info = graph.describe(graph.resolve(text))
+            except XlsxPatchError as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+                sys.exit(1)
+            drop = "precedents" if args.action == "dependents" else "dependents"
+            results.append({k: v for k, v in info.items() if not k.endswith(drop)})
+        print(json.dumps({"results": results, "cache": "hit" if cache_hit else "miss"}))
 
     elif args.action == "write-cells":
-        if not args.cells:
-            print("ERROR: --cells required for write-cells action", file=sys.stderr)
+        if bool(args.cells) == bool(args.cells_file):
+            print("ERROR: write-cells needs exactly one of --cells or --cells-file", file=sys.stderr)
+            sys.exit(1)
+        t0 = _time.perf_counter()
+        if args.cells:
+            writes, parse_errors = json.loads(args.cells), []
+        elif args.cells_file == "-":
+            writes, parse_errors = _read_writes(sys.stdin)
+        else:
+            with open(args.cells_file, "r", encoding="utf-8") as f:
+                writes, parse_errors = _read_writes(f)
+        parse_ms = round((_time.perf_counter() - t0) * 1000, 1)
+        if parse_errors:
+            print(json.dumps({"written": 0, "errors": parse_errors}))
+            sys.exit(1)
+
+        result = write_cells(args.file, writes, engine=args.engine, recalc=not args.no_recalc)
+        result["timings_ms"] = {"parse_ms": parse_ms, **result["timings_ms"]}
+        for ref in result["skipped"]:
+            print(f"SKIPPED {ref}: contains formula", file=sys.stderr)
+        print(json.dumps(result))
+        if result.get("errors"):
             sys.exit(1)
-        writes = json.loads(args.cells)
-        # Create .bak backup before any writes
-        import shutil, os
-        bak = args.file + '.bak'
-        if os.path.exists(args.file):
-            shutil.copy2(args.file, bak)
-        wb = load_workbook_safe(args.file)
-        written = 0
-        for w in writes:
-            ref   = w["cell"]
-            sheet = w.get("sheet", "Inputs")
-            ws    = wb[sheet] if sheet in wb.sheetnames else wb["Inputs"]
-            current = ws[ref].value
-            if isinstance(current, str) and current.startswith("="):
-                print(f"SKIPPED {ref}: contains formula", file=sys.stderr)
-                continue
-            ws[ref] = _sanitize(w["value"])
-            if w.get("comment"):
-                add_comment(ws, ref, _sanitize(w["comment"]))
-            written += 1
-        save_workbook_safe(wb, args.file)
-        wb.close()
-        print(json.dumps({"written": written, "total": len(writes)}))
 
     elif args.action == "read-summary":
         wb = load_workbook_safe(args.file, data_only=True)
@@ -89,6 +415,29 @@ def main():
         wb.close()
         print(json.dumps(result, default=str))
 
+    elif args.action == "list-snapshots":
+        from snapshot_store import SnapshotStore
+        snapshots = SnapshotStore(args.file).list()
+        print(json.dumps({"snapshots": snapshots, "count": len(snapshots)}))
+
+    elif args.action == "restore":
+        if args.to is None:
+            print("ERROR: --to required for restore action", file=sys.stderr)
+            sys.exit(1)
+        from snapshot_store import SnapshotStore
+        try:
+            result = SnapshotStore(args.file).restore(args.to)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result))
+
+    elif args.action == "recalc":
+        t0 = _time.perf_counter()
+        result = recalc_workbook(args.file, snapshot=True)
+        result["elapsed_ms"] = _ms(t0)
+        print(json.dumps(result))
+
 
 if __name__ == "__main__":
     main()
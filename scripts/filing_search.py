@@ -0,0 +1,337 @@
+"""
+Filing Search
+=============
+Full-text search over saved 10-K filings (SQLite FTS5, one index per
+workspace).
+
+10-K HTML — files written by `sec_filings.py --save-pdf` or filings held in
+the EDGAR cache — is streamed through an HTML-to-text parser in 64 KB
+pieces. The text is split into paragraph chunks tagged with their 10-K
+section (business, risk_factors, mda, ...), and the chunks are indexed into
+an FTS5 table. A document whose source stamp is unchanged is skipped.
+
+search() returns BM25-ranked snippets plus the numbers found next to the
+query keywords ("approximately 1,200 team members", "2,385 restaurants").
+Research can then read store counts, franchise mix and headcount without
+loading whole filings.
+
+Location: <workspace>/.claude/cache/filing_search.sqlite
+
+Usage:
+    python sec_filings.py --index-text                        # every cached 10-K
+    python sec_filings.py --index-text "Clients/Acme/4. Reports/2. Public Filings"
+    python sec_filings.py --search-text employees --ticker WING --section business
+
+    from filing_search import FilingSearch
+    FilingSearch().search("restaurants franchised", ticker="WING")
+"""
+import codecs
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import date
+from html.parser import HTMLParser
+from pathlib import Path
+
+READ_CHUNK = 64 * 1024          # bytes of HTML fed to the parser at a time
+CHUNK_CHARS = 1200              # target size of an indexed text chunk
+SNIPPET_TOKENS = 32
+NUMBER_WINDOW = 80              # chars searched before/after a keyword for numbers
+
+# 10-K item number -> section tag. Other items are tagged item_<n>.
+SECTIONS = {
+    "1": "business", "1a": "risk_factors", "1b": "unresolved_staff_comments",
+    "1c": "cybersecurity", "2": "properties", "3": "legal_proceedings",
+    "5": "market", "7": "mda", "7a": "market_risk", "8": "financial_statements",
+}
+
+_BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section"}
+_SKIP_TAGS = {"script", "style", "head", "title"}
+_ITEM_RE = re.compile(r"^\s*item\s*(\d{1,2}[a-c]?)\s*[.:\-—–]?\s*(.{0,120})$", re.I)
+_NUMBER_RE = re.compile(r"(?<![\w.$])(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)(\s*(?:thousand|million))?(?![\w%]|\.\d)", re.I)
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id          INTEGER PRIMARY KEY,
+    source      TEXT UNIQUE NOT NULL,
+    stamp       TEXT NOT NULL,
+    ticker      TEXT,
+    period      TEXT,
+    accession   TEXT,
+    chunk_count INTEGER,
+    indexed_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_ticker ON documents (ticker);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    section, text, doc_id UNINDEXED, tokenize = 'porter unicode61'
+);
+"""
+
+
+def default_index_path():
+    from workspace import settings
+    return settings.cache_dir / "filing_search.sqlite"
+
+
+# ---------------------------------------------------------------------------
+# HTML -> sectioned text chunks
+# ---------------------------------------------------------------------------
+class _TextExtractor(HTMLParser):
+    """Collects text lines from fed HTML; a block-level tag ends a line."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self._buf = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self._end_line()
+        elif tag == "td":
+            self._buf.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def _end_line(self):
+        line = " ".join("".join(self._buf).split())
+        self._buf = []
+        if line:
+            self.lines.append(line)
+
+    def close(self):
+        super().close()
+        self._end_line()
+
+
+def _section_of(line):
+    """Section tag if *line* is a 10-K item heading, else None."""
+    m = _ITEM_RE.match(line)
+    if not m:
+        return None
+    item = m.group(1).lower()
+    return SECTIONS.get(item, f"item_{item}")
+
+
+def iter_chunks(stream, chunk_chars=CHUNK_CHARS):
+    """
+    Yield (section, text) chunks from a binary or text HTML stream, reading
+    READ_CHUNK at a time. Lines accumulate into ~*chunk_chars* chunks that
+    never span a section heading. Text before the first heading is "cover".
+    """
+    parser = _TextExtractor()
+    section, parts, size = "cover", [], 0
+
+    def drain():
+        nonlocal section, parts, size
+        for line in parser.lines:
+            heading = _section_of(line) if len(line) <= 140 else None
+            if heading or size + len(line) > chunk_chars:
+                if parts:
+                    yield section, " ".join(parts)
+                parts, size = [], 0
+                section = heading or section
+            parts.append(line)
+            size += len(line) + 1
+        parser.lines = []
+
+    # Incremental decode: a multibyte character split across two reads
+    # (—, ’, ® are common in 10-Ks) is held back until its last byte arrives
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        block = stream.read(READ_CHUNK)
+        if not block:
+            break
+        parser.feed(decoder.decode(block) if isinstance(block, bytes) else block)
+        yield from drain()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from drain()
+    if parts:
+        yield section, " ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Numbers near keywords
+# ---------------------------------------------------------------------------
+def _keywords(query):
+    """Plain words of an FTS query (operators and column filters dropped)."""
+    words = [w.lower() for w in _WORD_RE.findall(query)
+             if w.upper() not in ("AND", "OR", "NOT", "NEAR") and ":" not in w]
+    return list(dict.fromkeys(words))
+
+
+def _stem(word):
+    for suffix in ("ies", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)]
+    return word
+
+
+def _to_number(digits, scale):
+    value = float(digits.replace(",", ""))
+    if scale:
+        value *= 1_000 if "thousand" in scale.lower() else 1_000_000
+    return int(value) if value.is_integer() else value
+
+
+def numbers_near(text, keywords, window=NUMBER_WINDOW):
+    """
+    [{"keyword", "value", "context"}] — for each keyword occurrence, the
+    closest number within *window* chars, preferring one before the keyword
+    (years and percentages skipped).
+    """
+    found, seen = [], set()
+    lowered = text.lower()
+    for keyword in keywords:
+        stem = _stem(keyword)
+        for m in re.finditer(rf"\b{re.escape(stem)}\w*", lowered):
+            lo, hi = max(0, m.start() - window), min(len(text), m.end() + window)
+            best = None
+            for n in _NUMBER_RE.finditer(text, lo, hi):
+                digits, scale = n.group(1), n.group(2)
+                if "," not in digits and not scale and "." not in digits and 1900 <= int(digits) <= 2100:
+                    continue  # a year
+                # "1,200 employees" is the usual order: numbers after the keyword only if none before
+                before = n.end() <= m.start()
+                distance = (0, m.start() - n.end()) if before else (1, n.start() - m.end())
+                if best is None or distance < best[0]:
+                    best = (distance, n)
+            if best is None:
+                continue
+            n = best[1]
+            start, end = min(n.start(), m.start()), max(n.end(), m.end())
+            key = (keyword, n.start())
+            if key in seen:
+                continue
+            seen.add(key)
+            found.append({
+                "keyword": keyword,
+                "value":   _to_number(n.group(1), n.group(2)),
+                "context": " ".join(text[max(0, start - 30):end + 30].split()),
+            })
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+class FilingSearch:
+    """FTS5 index of 10-K text chunks for one workspace."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_index_path()
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # -- indexing ------------------------------------------------------------
+    def index_stream(self, source, stream, stamp, ticker=None, period=None, accession=None, force=False):
+        """
+        Index one filing from an HTML *stream*. Returns the chunk count, or
+        None if *source* is already indexed with the same *stamp*.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT id, stamp FROM documents WHERE source = ?", (source,)).fetchone()
+        if row and row[1] == stamp and not force:
+            return None
+        with conn:
+            if row:
+                conn.execute("DELETE FROM chunks WHERE doc_id = ?", (row[0],))
+                conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            doc_id = conn.execute(
+                "INSERT INTO documents (source, stamp, ticker, period, accession, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, stamp, ticker and ticker.upper(), period, accession, date.today().isoformat()),
+            ).lastrowid
+            count = 0
+            batch = []
+            for section, text in iter_chunks(stream):
+                batch.append((section, text, doc_id))
+                if len(batch) >= 500:
+                    conn.executemany("INSERT INTO chunks (section, text, doc_id) VALUES (?, ?, ?)", batch)
+                    count += len(batch)
+                    batch = []
+            conn.executemany("INSERT INTO chunks (section, text, doc_id) VALUES (?, ?, ?)", batch)
+            count += len(batch)
+            conn.execute("UPDATE documents SET chunk_count = ? WHERE id = ?", (count, doc_id))
+        return count
+
+    def index_file(self, path, ticker=None, period=None, accession=None, force=False):
+        """Index a saved HTML file; ticker/period default from 10K_<TICKER>_<period>.html."""
+        path = Path(path)
+        m = re.match(r"10K_([A-Za-z.\-]+)_(.+)\.html?$", path.name)
+        if m:
+            ticker, period = ticker or m.group(1), period or m.group(2)
+        st = path.stat()
+        with open(path, "rb") as f:
+            return self.index_stream(str(path.resolve()), f, f"{st.st_mtime_ns}:{st.st_size}",
+                                     ticker, period, accession, force)
+
+    def index_text(self, source, html, ticker=None, period=None, accession=None, force=False):
+        """Index HTML already in memory (e.g. from the EDGAR cache)."""
+        import io
+        stamp = hashlib.sha1(html.encode("utf-8", errors="replace")).hexdigest()
+        return self.index_stream(source, io.StringIO(html), stamp, ticker, period, accession, force)
+
+    # -- queries -------------------------------------------------------------
+    def search(self, query, ticker=None, section=None, limit=10):
+        """
+        BM25-ranked chunks matching an FTS5 *query*, each with a snippet and
+        the numbers next to the query keywords.
+        """
+        sql = ("SELECT d.ticker, d.period, d.accession, chunks.section, "
+               f"snippet(chunks, 1, '[', ']', ' … ', {SNIPPET_TOKENS}), chunks.text, bm25(chunks) "
+               "FROM chunks JOIN documents d ON d.id = chunks.doc_id WHERE chunks MATCH ?")
+        filters, params = "", []
+        if ticker:
+            filters += " AND d.ticker = ?"
+            params.append(ticker.upper())
+        if section:
+            filters += " AND chunks.section = ?"
+            params.append(section)
+        tail = " ORDER BY bm25(chunks) LIMIT ?"
+        try:
+            rows = self._conn().execute(sql + filters + tail, [query, *params, limit]).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS5 syntax: search the words as plain terms (any of them)
+            terms = " OR ".join(f'"{w}"' for w in _keywords(query)) or '""'
+            rows = self._conn().execute(sql + filters + tail, [terms, *params, limit]).fetchall()
+
+        keywords = _keywords(query)
+        return [{
+            "ticker":    t,
+            "period":    p,
+            "accession": a,
+            "section":   s,
+            "snippet":   snip,
+            "score":     round(-score, 3),
+            "numbers":   numbers_near(text, keywords),
+        } for t, p, a, s, snip, text, score in rows]
+
+    def documents(self):
+        rows = self._conn().execute(
+            "SELECT ticker, period, accession, source, chunk_count, indexed_at FROM documents "
+            "ORDER BY ticker, period").fetchall()
+        cols = ("ticker", "period", "accession", "source", "chunks", "indexed_at")
+        return [dict(zip(cols, r)) for r in rows]
@@ -0,0 +1,524 @@
+"""
+Formula Eval
+============
+Incremental formula recalculation for Jolly intro models.
+
+openpyxl never calculates formulas, so after a write the cached values that
+data_only readers see (qa_check M3/M4, read-summary, cross-validation) are
+stale until the model is opened and saved in Excel. This module evaluates
+the intro-model formula subset in pure Python and writes the results back as
+cached <v> values, recomputing only the formula cells downstream of the cells
+that changed (using the formula_graph.py dependency graph).
+
+Supported:
+    arithmetic  + - * / ^ %, unary minus, & (text concatenation)
+    comparison  = <> < > <= >=
+    references  A1, $A$1, ranges, cross-sheet ('Sheet Name'!A1), defined names
+    functions   SUM SUMPRODUCT MIN MAX AVERAGE COUNT COUNTA IF IFERROR AND OR
+                NOT ROUND ROUNDUP ROUNDDOWN ABS CONCATENATE
+
+Cells using anything else (e.g. data tables, lookups) keep their existing
+cached value and are reported as unsupported, along with every formula
+downstream of them, so nothing is silently computed from stale inputs.
+
+Usage (via excel_editor.py):
+    python excel_editor.py --file model.xlsx --action write-cells --cells-file plan.ndjson
+    python excel_editor.py --file model.xlsx --action recalc
+"""
+import math
+import re
+from collections import deque
+from decimal import ROUND_DOWN, ROUND_HALF_UP, ROUND_UP, Decimal
+
+from formula_graph import _expand, _sheet_extent, node
+from xlsx_patch import CellError
+
+DIV0 = CellError("#DIV/0!")
+VALUE = CellError("#VALUE!")
+REF = CellError("#REF!")
+NAME = CellError("#NAME?")
+NUM = CellError("#NUM!")
+NA = CellError("#N/A")
+_ERRORS = {e: e for e in (DIV0, VALUE, REF, NAME, NUM, NA, CellError("#NULL!"))}
+
+_SHEET = r"(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)"
+_CELL = r"\$?[A-Z]{1,3}\$?[0-9]+"
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r'(?P<str>"(?:[^"]|"")*")'
+    r"|(?P<err>#DIV/0!|#VALUE!|#REF!|#NAME\?|#NUM!|#N/A|#NULL!)"
+    rf"|(?P<ref>(?:{_SHEET}!)?(?:{_CELL}(?::{_CELL})?|\$?[A-Z]{{1,3}}:\$?[A-Z]{{1,3}}|\$?[0-9]+:\$?[0-9]+))(?![\w(])"
+    r"|(?P<num>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)"
+    r"|(?P<func>[A-Za-z_][\w.]*)\s*\("
+    r"|(?P<name>[A-Za-z_\\][\w.]*)"
+    r"|(?P<op><=|>=|<>|[-+*/^&=<>%(),])"
+    r")"
+)
+_ROUNDING = {"ROUND": ROUND_HALF_UP, "ROUNDUP": ROUND_UP, "ROUNDDOWN": ROUND_DOWN}
+
+
+class Unsupported(Exception):
+    """Raised for formulas outside the supported subset."""
+
+
+class _Raise(Exception):
+    """Carries an Excel error value up through nested evaluation."""
+
+    def __init__(self, error):
+        super().__init__(error)
+        self.error = error
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+def tokenize(formula):
+    """Split a formula (without the leading '=') into (kind, text) tokens."""
+    tokens, pos, text = [], 0, formula.strip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise Unsupported(f"cannot parse near {text[pos:pos + 20]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing nested tuples.
+
+    Precedence (low to high): comparison, &, + -, * /, ^, %, unary minus.
+    """
+
+    def __init__(self, tokens):
+        self.tokens, self.i = tokens, 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        tok = self.peek()
+        if tok[0] is None or (text is not None and tok != ("op", text)):
+            raise Unsupported(f"expected {text or 'a token'}")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        expr = self.comparison()
+        if self.i != len(self.tokens):
+            raise Unsupported(f"unexpected {self.peek()[1]!r}")
+        return expr
+
+    def _binary(self, ops, operand):
+        left = operand()
+        while self.peek()[0] == "op" and self.peek()[1] in ops:
+            op = self.take()[1]
+            left = ("bin", op, left, operand())
+        return left
+
+    def comparison(self):
+        return self._binary(("=", "<>", "<", ">", "<=", ">="), self.concat)
+
+    def concat(self):
+        return self._binary(("&",), self.additive)
+
+    def additive(self):
+        return self._binary(("+", "-"), self.term)
+
+    def term(self):
+        return self._binary(("*", "/"), self.power)
+
+    def power(self):
+        return self._binary(("^",), self.percent)
+
+    def percent(self):
+        expr = self.unary()
+        while self.peek() == ("op", "%"):
+            self.take()
+            expr = ("pct", expr)
+        return expr
+
+    def unary(self):
+        if self.peek() in (("op", "-"), ("op", "+")):
+            op = self.take()[1]
+            operand = self.unary()
+            return ("neg", operand) if op == "-" else operand
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "num":
+            return ("lit", float(text))
+        if kind == "str":
+            return ("lit", text[1:-1].replace('""', '"'))
+        if kind == "err":
+            return ("lit", _ERRORS[text])
+        if kind == "ref":
+            sheet, _, ref = text.rpartition("!")
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+            return ("ref", sheet or None, ref.replace("$", ""))
+        if kind == "name":
+            if text.upper() in ("TRUE", "FALSE"):
+                return ("lit", text.upper() == "TRUE")
+            return ("name", text)
+        if kind == "func":
+            args = []
+            if self.peek() != ("op", ")"):
+                while True:
+                    if self.peek() in (("op", ","), ("op", ")")):
+                        args.append(("lit", None))   # omitted argument
+                    else:
+                        args.append(self.comparison())
+                    if self.peek() != ("op", ","):
+                        break
+                    self.take(",")
+            self.take(")")
+            return ("func", text.upper(), args)
+        if (kind, text) == ("op", "("):
+            expr = self.comparison()
+            self.take(")")
+            return expr
+        raise Unsupported(f"unexpected {text!r}")
+
+
+def parse(formula):
+    """Parse formula text (with or without the leading '=') into a tree."""
+    return _Parser(tokenize(formula[1:] if formula.startswith("=") else formula)).parse()
+
+
+# ---------------------------------------------------------------------------
+# Coercion
+# ---------------------------------------------------------------------------
+def _check(value):
+    if isinstance(value, CellError):
+        raise _Raise(value)
+    return value
+
+
+def to_number(value):
+    value = _check(value)
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value.strip().replace(",", ""))
+    except ValueError:
+        raise _Raise(VALUE)
+
+
+def to_text(value):
+    value = _check(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        value = _clean_number(float(value))
+        return str(value) if isinstance(value, int) else f"{value:.15g}"
+    return value
+
+
+def to_bool(value):
+    value = _check(value)
+    if isinstance(value, str):
+        if value.upper() in ("TRUE", "FALSE"):
+            return value.upper() == "TRUE"
+        raise _Raise(VALUE)
+    return bool(to_number(value))
+
+
+def _clean_number(value):
+    """Round to Excel's 15 significant digits; integral values become int."""
+    if math.isnan(value) or math.isinf(value):
+        raise _Raise(NUM)
+    value = float(f"{value:.15g}")
+    if value.is_integer() and abs(value) < 1e15:
+        return int(value)
+    return value
+
+
+def _compare(op, a, b):
+    a, b = _check(a), _check(b)
+    if a is None:
+        a = "" if isinstance(b, str) else (False if isinstance(b, bool) else 0)
+    if b is None:
+        b = "" if isinstance(a, str) else (False if isinstance(a, bool) else 0)
+
+    def rank(v):   # Excel orders numbers < text < booleans
+        if isinstance(v, bool):
+            return 2, v
+        if isinstance(v, str):
+            return 1, v.lower()
+        return 0, float(v)
+
+    ka, kb = rank(a), rank(b)
+    return {
+        "=": ka == kb, "<>": ka != kb, "<": ka < kb,
+        ">": ka > kb, "<=": ka <= kb, ">=": ka >= kb,
+    }[op]
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+class _Evaluator:
+    """Evaluates parsed formulas against a workbook value lookup."""
+
+    def __init__(self, lookup, sheets, extents, names):
+        self.lookup = lookup                      # (sheet, ref) -> value
+        self.sheets = {s.lower(): s for s in sheets}
+        self.extents = extents
+        self.names = {k.upper(): v for k, v in names.items()}
+
+    def _sheet(self, sheet, current):
+        if sheet is None:
+            return current
+        resolved = self.sheets.get(sheet.lower())
+        if resolved is None:
+            raise _Raise(REF)
+        return resolved
+
+    def cells(self, tree, sheet):
+        """Values of a reference node as a flat list (ranges), or None."""
+        if tree[0] == "name":
+            target = self.names.get(tree[1].upper())
+            if target is None:
+                raise _Raise(NAME)
+            tree = parse(target)
+        if tree[0] != "ref":
+            return None
+        ref_sheet = self._sheet(tree[1], sheet)
+        return [self.lookup(ref_sheet, r) for r in _expand(tree[2], self.extents[ref_sheet])]
+
+    def value(self, tree, sheet):
+        kind = tree[0]
+        if kind == "lit":
+            return tree[1]
+        if kind in ("ref", "name"):
+            values = self.cells(tree, sheet)
+            if values is None:                      # name bound to a formula
+                return self.value(parse(self.names[tree[1].upper()]), sheet)
+            if len(values) != 1:
+                raise _Raise(VALUE)                 # implicit intersection
+            return values[0]
+        if kind == "neg":
+            return -to_number(self.value(tree[1], sheet))
+        if kind == "pct":
+            return to_number(self.value(tree[1], sheet)) / 100
+        if kind == "bin":
+            return self.binary(tree[1], self.value(tree[2], sheet), self.value(tree[3], sheet))
+        if kind == "func":
+            return self.call(tree[1], tree[2], sheet)
+        raise Unsupported(kind)
+
+    @staticmethod
+    def binary(op, a, b):
+        if op == "&":
+            return to_text(a) + to_text(b)
+        if op in ("=", "<>", "<", ">", "<=", ">="):
+            return _compare(op, a, b)
+        x, y = to_number(a), to_number(b)
+        if op == "+":
+            return x + y
+        if op == "-":
+            return x - y
+        if op == "*":
+            return x * y
+        if op == "/":
+            if y == 0:
+                raise _Raise(DIV0)
+            return x / y
+        if op == "^":
+            try:
+                result = x ** y
+            except (OverflowError, ZeroDivisionError):
+                raise _Raise(NUM)
+            if isinstance(result, complex):
+                raise _Raise(NUM)
+            return result
+        raise Unsupported(op)
+
+    def _numbers(self, args, sheet, count_text=False):
+        """Collect SUM-style arguments: ranges skip text/blanks, literals coerce."""
+        out = []
+        for arg in args:
+            values = self.cells(arg, sheet)
+            if values is None:
+                v = self.value(arg, sheet)
+                out.append(to_number(v) if not count_text else v)
+                continue
+            for v in values:
+                _check(v)
+                if count_text:
+                    if v is not None and v != "":
+                        out.append(v)
+                elif isinstance(v, (int, float)) and not isinstance(v, bool):
+                    out.append(float(v))
+        return out
+
+    def call(self, name, args, sheet):
+        ev = lambda a: self.value(a, sheet)   # noqa: E731
+        if name == "IF":
+            if not 1 <= len(args) <= 3:
+                raise _Raise(VALUE)
+            if to_bool(ev(args[0])):
+                return ev(args[1]) if len(args) > 1 else True
+            return ev(args[2]) if len(args) > 2 else False
+        if name == "IFERROR":
+            if len(args) != 2:
+                raise _Raise(VALUE)
+            try:
+                return _check(ev(args[0]))
+            except _Raise:
+                return ev(args[1])
+        if name in ("SUM", "MIN", "MAX", "AVERAGE", "COUNT"):
+            nums = self._numbers(args, sheet)
+            if name == "SUM":
+                return math.fsum(nums)
+            if name == "COUNT":
+                return len(nums)
+            if name == "AVERAGE":
+                if not nums:
+                    raise _Raise(DIV0)
+                return math.fsum(nums) / len(nums)
+            return (min if name == "MIN" else max)(nums) if nums else 0
+        if name == "COUNTA":
+            return len(self._numbers(args, sheet, count_text=True))
+        if name == "SUMPRODUCT":
+            arrays = [self.cells(a, sheet) or [ev(a)] for a in args]
+            if len({len(a) for a in arrays}) != 1:
+                raise _Raise(VALUE)
+            total = 0.0
+            for row in zip(*arrays):
+                prod = 1.0
+                for v in row:
+                    _check(v)
+                    prod *= float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else 0.0
+                total += prod
+            return total
+        if name in ("AND", "OR"):
+            flags = []
+            for arg in args:
+                values = self.cells(arg, sheet)
+                if values is None:
+                    flags.append(to_bool(ev(arg)))
+                else:
+                    flags.extend(to_bool(v) for v in values if v is not None and not isinstance(v, str))
+            if not flags:
+                raise _Raise(VALUE)
+            return all(flags) if name == "AND" else any(flags)
+        if name == "NOT":
+            return not to_bool(ev(args[0]))
+        if name in _ROUNDING:
+            x = to_number(ev(args[0]))
+            digits = int(to_number(ev(args[1]))) if len(args) > 1 else 0
+            q = Decimal(1).scaleb(-digits)
+            return float(Decimal(repr(x)).quantize(q, rounding=_ROUNDING[name]))
+        if name == "ABS":
+            return abs(to_number(ev(args[0])))
+        if name == "CONCATENATE":
+            return "".join(to_text(ev(a)) for a in args)
+        raise Unsupported(f"function {name}")
+
+    def evaluate(self, formula, sheet):
+        """Evaluate one formula; errors come back as CellError values."""
+        try:
+            result = _check(self.value(parse(formula), sheet))
+            if isinstance(result, float):
+                result = _clean_number(result)
+            return result
+        except _Raise as e:
+            return e.error
+
+
+# ---------------------------------------------------------------------------
+# Recalculation
+# ---------------------------------------------------------------------------
+def _order(graph, dirty):
+    """Topologically sort *dirty* formula nodes; return (order, cyclic)."""
+    pending = {n: sum(1 for p in graph.precedents.get(n, ()) if p in dirty) for n in dirty}
+    queue = deque(n for n, k in pending.items() if k == 0)
+    order = []
+    while queue:
+        n = queue.popleft()
+        order.append(n)
+        for d in graph.dependents.get(n, ()):
+            if d in pending:
+                pending[d] -= 1
+                if pending[d] == 0:
+                    queue.append(d)
+    cyclic = sorted(n for n in dirty if pending[n] > 0)
+    return order, cyclic
+
+
+def recalculate(patcher, graph, changed=None):
+    """Recompute formula cells and queue their cached values on *patcher*.
+
+    *changed* lists the nodes ("Sheet!A1") whose values were edited; only
+    formulas downstream of them are recomputed. Pass None to recompute every
+    formula. Call patcher.apply()/save() afterwards to persist. Returns stats.
+    """
+    if changed is None:
+        dirty = set(graph.formulas)
+    else:
+        dirty, queue = set(), deque(changed)
+        while queue:
+            for d in graph.dependents.get(queue.popleft(), ()):
+                if d not in dirty:
+                    dirty.add(d)
+                    queue.append(d)
+        dirty.update(n for n in changed if n in graph.formulas)
+    if not dirty:
+        return {"computed": 0, "changed": 0, "unsupported": [], "stale": [], "cycles": []}
+
+    sheets = patcher.sheetnames
+    stored, extents = {}, {}
+
+    def sheet_values(sheet):
+        if sheet not in stored:
+            stored[sheet] = patcher.cell_values(sheet)
+            extents[sheet] = _sheet_extent(patcher.read_part(patcher.sheet_part(sheet)))
+        return stored[sheet]
+
+    computed = {}
+
+    def lookup(sheet, ref):
+        n = node(sheet, ref)
+        if n in computed:
+            return computed[n]
+        return sheet_values(sheet).get(ref)
+
+    for sheet in sheets:
+        sheet_values(sheet)
+    evaluator = _Evaluator(lookup, sheets, extents, patcher.defined_names())
+
+    order, cycles = _order(graph, dirty)
+    unsupported, stale, changes = {}, set(cycles), 0
+    for n in order:
+        if any(p in stale for p in graph.precedents.get(n, ())):
+            stale.add(n)
+            continue
+        sheet, _, ref = n.rpartition("!")
+        try:
+            value = evaluator.evaluate(graph.formulas[n], sheet)
+        except Unsupported as e:
+            unsupported[n] = str(e)
+            stale.add(n)
+            continue
+        computed[n] = value
+        if value != stored[sheet].get(ref) or type(value) is not type(stored[sheet].get(ref)):
+            patcher.set_cached_value(sheet, ref, value)
+            changes += 1
+
+    return {
+        "computed":    len(computed),
+        "changed":     changes,
+        "unsupported": [{"cell": n, "reason": r} for n, r in sorted(unsupported.items())],
+        "stale":       sorted(stale - set(unsupported) - set(cycles)),
+        "cycles":      cycles,
+    }
@@ -0,0 +1,353 @@
+"""
+Formula Graph
+=============
+Cross-sheet formula dependency graph for Jolly intro models.
+
+Reads formulas straight from the worksheet XML (no openpyxl load), resolves
+shared formulas, defined names and ranges, and records for every formula cell
+the cells it reads (precedents). Dependents are the reverse edges, so
+"what does Inputs!C55 drive" is a breadth-first walk over edges only.
+
+Graphs are cached as JSON keyed by the SHA-256 of the workbook bytes, so
+re-scanning an unchanged template is a cache hit:
+
+    <workspace>/.claude/cache/formula_graph/<sha256>.json
+
+Every write-cells changes the hash, so the folder keeps only the
+CACHE_MAX_ENTRIES most recently used graphs (a hit refreshes the entry's
+mtime; the oldest are deleted after each new entry).
+
+Usage (via excel_editor.py):
+    python excel_editor.py --file model.xlsx --action scan-formulas
+    python excel_editor.py --file model.xlsx --action dependents --cell Inputs!C55
+    python excel_editor.py --file model.xlsx --action precedents --cell Campaigns!F12
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import deque
+from pathlib import Path
+
+from xlsx_patch import XlsxPatcher, split_ref
+
+GRAPH_VERSION = 1
+CACHE_MAX_ENTRIES = 32
+
+_STRING_RE = re.compile(r'"(?:[^"]|"")*"')
+_SHEET = r"(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)"
+_CELL = r"\$?[A-Z]{1,3}\$?[0-9]+"
+_REF_RE = re.compile(
+    rf"(?<![\w.$'!])(?:(?P<sheet>{_SHEET})!)?"
+    rf"(?P<ref>{_CELL}(?::{_CELL})?|\$?[A-Z]{{1,3}}:\$?[A-Z]{{1,3}}|\$?[0-9]+:\$?[0-9]+)"
+    rf"(?![\w(!])"
+)
+_NAME_RE = re.compile(r"(?<![\w.$'!])([A-Za-z_\\][\w.]*)(?![\w(!])")
+_CELL_PARTS_RE = re.compile(r"(\$?)([A-Z]{1,3})(\$?)([0-9]+)")
+_DIMENSION_RE = re.compile(r'<dimension\b[^>]*\sref="([^"]+)"')
+_CELL_REF_ATTR_RE = re.compile(r'<c\b[^>]*?\sr="([A-Z]{1,3})([0-9]+)"')
+
+
+def _mask_strings(formula):
+    """Blank out string literals so their contents never parse as references."""
+    return _STRING_RE.sub(lambda m: '"' + " " * (len(m.group(0)) - 2) + '"', formula)
+
+
+def _col_letters(n):
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def node(sheet, ref):
+    return f"{sheet}!{ref}"
+
+
+def parse_node(text, default_sheet="Inputs"):
+    """Parse 'Inputs!$C$55' / "'My Sheet'!c55" / 'C55' into a canonical node."""
+    sheet, _, ref = text.rpartition("!")
+    sheet = sheet.strip()
+    if len(sheet) > 1 and sheet[0] == sheet[-1] == "'":
+        sheet = sheet[1:-1].replace("''", "'")
+    ref = ref.replace("$", "").strip().upper()
+    split_ref(ref)
+    return node(sheet or default_sheet, ref)
+
+
+def _node_key(sheet_order):
+    def key(n):
+        sheet, _, ref = n.rpartition("!")
+        row, col = split_ref(ref)
+        return (sheet_order.get(sheet, len(sheet_order)), sheet, row, col)
+    return key
+
+
+# ---------------------------------------------------------------------------
+# Formula text helpers
+# ---------------------------------------------------------------------------
+def translate_formula(formula, drow, dcol):
+    """Shift the relative references in *formula* by (drow, dcol).
+
+    Used to expand shared-formula children from their master cell.
+    """
+    def shift_cell(text):
+        def sub(m):
+            c_abs, col, r_abs, row = m.groups()
+            if not c_abs:
+                col = _col_letters(max(1, split_ref(f"{col}1")[1] + dcol))
+            if not r_abs:
+                row = str(max(1, int(row) + drow))
+            return f"{c_abs}{col}{r_abs}{row}"
+        return _CELL_PARTS_RE.sub(sub, text)
+
+    def shift_span(text):
+        out = []
+        for part in text.split(":"):
+            absolute = part.startswith("$")
+            bare = part.lstrip("$")
+            if bare.isdigit():
+                out.append(part if absolute else str(max(1, int(bare) + drow)))
+            else:
+                out.append(part if absolute else
+                           _col_letters(max(1, split_ref(f"{bare}1")[1] + dcol)))
+        return ":".join(out)
+
+    masked = _mask_strings(formula)
+    out, pos = [], 0
+    for m in _REF_RE.finditer(masked):
+        ref = m.group("ref")
+        out.append(formula[pos:m.start("ref")])
+        out.append(shift_cell(ref) if _CELL_PARTS_RE.match(ref) else shift_span(ref))
+        pos = m.end("ref")
+    out.append(formula[pos:])
+    return "".join(out)
+
+
+def iter_references(formula, sheet):
+    """Yield (sheet, ref_text) for every reference in *formula*."""
+    for m in _REF_RE.finditer(_mask_strings(formula)):
+        ref_sheet = m.group("sheet")
+        if ref_sheet is None:
+            ref_sheet = sheet
+        elif ref_sheet.startswith("'"):
+            ref_sheet = ref_sheet[1:-1].replace("''", "'")
+        yield ref_sheet, m.group("ref").replace("$", "")
+
+
+def _expand(ref, extent, limit=10_000):
+    """Expand 'C5', 'C5:D9', 'C:C' or '5:5' into cell refs.
+
+    Whole-column/row spans, and explicit ranges larger than *limit* cells,
+    are clipped to the sheet's used range (*extent*).
+    """
+    if ":" not in ref:
+        return [ref]
+    max_row, max_col = extent
+    a, b = ref.split(":")
+    if a.isdigit():
+        r1, r2, c1, c2 = int(a), int(b), 1, max_col
+    elif a.isalpha():
+        r1, r2 = 1, max_row
+        c1, c2 = split_ref(f"{a}1")[1], split_ref(f"{b}1")[1]
+    else:
+        (r1, c1), (r2, c2) = split_ref(a), split_ref(b)
+    r1, r2 = sorted((r1, r2))
+    c1, c2 = sorted((c1, c2))
+    if a.isdigit() or a.isalpha() or (r2 - r1 + 1) * (c2 - c1 + 1) > limit:
+        r2, c2 = min(r2, max(max_row, r1)), min(c2, max(max_col, c1))
+    return [f"{_col_letters(c)}{r}" for r in range(r1, r2 + 1) for c in range(c1, c2 + 1)]
+
+
+# ---------------------------------------------------------------------------
+# Graph
+# ---------------------------------------------------------------------------
+class FormulaGraph:
+    """Formula cells, their formulas, and precedent/dependent edges."""
+
+    def __init__(self, sheets, formulas, precedents):
+        self.sheets = list(sheets)
+        self.formulas = formulas        # node -> "=formula"
+        self.precedents = precedents    # node -> [node, ...]
+        self._dependents = None
+        self._key = _node_key({s: i for i, s in enumerate(self.sheets)})
+
+    # -- construction ------------------------------------------------------
+    @classmethod
+    def build(cls, path):
+        """Parse every worksheet of the .xlsx at *path* into a graph."""
+        return cls.from_patcher(XlsxPatcher(path))
+
+    @classmethod
+    def from_patcher(cls, patcher):
+        """Build a graph from an open XlsxPatcher, including applied edits."""
+        sheets = patcher.sheetnames
+        extents = {s: _sheet_extent(patcher.read_part(patcher.sheet_part(s))) for s in sheets}
+        names = {k.upper(): v for k, v in patcher.defined_names().items()}
+        formulas, precedents = {}, {}
+
+        for sheet in sheets:
+            cells = list(patcher.iter_formulas(sheet))
+            masters = {
+                attrs["si"]: (ref, text) for ref, text, attrs in cells
+                if attrs.get("t") == "shared" and text and "si" in attrs
+            }
+            for ref, text, attrs in cells:
+                kind = attrs.get("t")
+                if kind == "shared" and not text and attrs.get("si") in masters:
+                    mref, mtext = masters[attrs["si"]]
+                    (mr, mc), (r, c) = split_ref(mref), split_ref(ref)
+                    text = translate_formula(mtext, r - mr, c - mc)
+                elif kind == "dataTable":
+                    text = "TABLE({},{})".format(attrs.get("r1", ""), attrs.get("r2", ""))
+                n = node(sheet, ref)
+                formulas[n] = "=" + text
+                precedents[n] = cls._references(text, sheet, extents, names)
+
+        return cls(sheets, formulas, precedents)
+
+    @staticmethod
+    def _references(text, sheet, extents, names):
+        # Sheet names are case-insensitive in Excel
+        lookup = {s.lower(): s for s in extents}
+        refs = list(iter_references(text, sheet))
+        for m in _NAME_RE.finditer(_mask_strings(text)):
+            target = names.get(m.group(1).upper())
+            if target:
+                refs.extend(iter_references(target.lstrip("="), sheet))
+        deps = set()
+        for ref_sheet, ref in refs:
+            ref_sheet = lookup.get(ref_sheet.lower())
+            if ref_sheet:
+                deps.update(node(ref_sheet, c) for c in _expand(ref, extents[ref_sheet]))
+        return sorted(deps)
+
+    # -- cache -------------------------------------------------------------
+    def to_dict(self):
+        return {
+            "version":    GRAPH_VERSION,
+            "sheets":     self.sheets,
+            "formulas":   self.formulas,
+            "precedents": self.precedents,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["sheets"], data["formulas"], data["precedents"])
+
+    @classmethod
+    def load(cls, path, cache_dir=None):
+        """Return (graph, cache_hit) for the workbook at *path*.
+
+        The graph is read from the cache when the file's content hash has
+        been seen before; otherwise it is built and cached.
+        """
+        cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        cache_path = cache_dir / f"{file_sha256(path)}.json"
+        if cache_path.exists():
+            try:
+                data = json.loads(cache_path.read_text(encoding="utf-8"))
+                if data.get("version") == GRAPH_VERSION:
+                    os.utime(cache_path)   # most recently used survives pruning
+                    return cls.from_dict(data), True
+            except (json.JSONDecodeError, OSError, KeyError):
+                pass
+        graph = cls.build(path)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(graph.to_dict(), f)
+            os.replace(tmp, cache_path)
+            _prune_cache(cache_dir)
+        except OSError:
+            pass  # cache is best-effort
+        return graph, False
+
+    # -- queries -----------------------------------------------------------
+    @property
+    def dependents(self):
+        """node -> [formula nodes that read it] (built once, O(edges))."""
+        if self._dependents is None:
+            deps = {}
+            for n, precs in self.precedents.items():
+                for p in precs:
+                    deps.setdefault(p, []).append(n)
+            self._dependents = deps
+        return self._dependents
+
+    def resolve(self, text, default_sheet="Inputs"):
+        """Parse a user-supplied cell reference into this graph's node form."""
+        n = parse_node(text, default_sheet)
+        sheet, _, ref = n.rpartition("!")
+        lookup = {s.lower(): s for s in self.sheets}
+        return node(lookup.get(sheet.lower(), sheet), ref)
+
+    def formula_cells(self):
+        """All formula nodes in sheet, row, column order."""
+        return sorted(self.formulas, key=self._key)
+
+    def edge_count(self):
+        return sum(len(v) for v in self.precedents.values())
+
+    def _walk(self, start, edges):
+        seen, queue = set(), deque(edges.get(start, ()))
+        while queue:
+            n = queue.popleft()
+            if n in seen:
+                continue
+            seen.add(n)
+            queue.extend(edges.get(n, ()))
+        seen.discard(start)
+        return sorted(seen, key=self._key)
+
+    def describe(self, cell):
+        """Summarize one cell: formula status, direct and transitive edges."""
+        return {
+            "cell":               cell,
+            "is_formula":         cell in self.formulas,
+            "formula":            self.formulas.get(cell),
+            "direct_precedents":  sorted(self.precedents.get(cell, ()), key=self._key),
+            "direct_dependents":  sorted(self.dependents.get(cell, ()), key=self._key),
+            "all_precedents":     self._walk(cell, self.precedents),
+            "all_dependents":     self._walk(cell, self.dependents),
+        }
+
+
+def _sheet_extent(xml):
+    """Return (max_row, max_col) of a sheet's used range."""
+    m = _DIMENSION_RE.search(xml)
+    if m and ":" in m.group(1):
+        return split_ref(m.group(1).split(":")[1].replace("$", ""))
+    max_row = max_col = 1
+    for col, row in _CELL_REF_ATTR_RE.findall(xml):
+        r, c = split_ref(f"{col}{row}")
+        max_row, max_col = max(max_row, r), max(max_col, c)
+    return max_row, max_col
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _prune_cache(cache_dir, keep=CACHE_MAX_ENTRIES):
+    """Delete all but the *keep* most recently used graphs in *cache_dir*."""
+    entries = []
+    for p in cache_dir.glob("*.json"):
+        try:
+            entries.append((p.stat().st_mtime_ns, p))
+        except OSError:
+            pass   # removed by a concurrent prune
+    for _, p in sorted(entries, reverse=True)[keep:]:
+        p.unlink(missing_ok=True)
+
+
+def default_cache_dir():
+    from workspace import settings
+    return settings.cache_dir / "formula_graph"
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+jolly — single entry point for the Jolly workflow scripts.
+==========================================================
+Dispatches to the existing script CLIs. Subcommand modules (and their
+heavy dependencies: openpyxl, python-pptx, edgartools, numpy) are imported
+only when that subcommand runs, so `jolly --help` and metadata commands
+start in a few tens of milliseconds.
+
+Usage:
+    python3 jolly.py --help
+    python3 jolly.py <command> [options]        (options as for the script)
+    python3 jolly.py qa --company "Acme"
+    python3 jolly.py excel --file model.xlsx --action recalc
+    python3 jolly.py paths
+    python3 jolly.py bench-startup --budget-ms 150
+
+Commands:
+    deck       deck_engine.py        deck operations (fill-banners, format-all, ...)
+    qa         qa_check.py           QA checks on the model and vF deck
+    excel      excel_editor.py       read/write/recalc the Excel model
+    scan       template_scanner.py   detect template structure, match configs
+    sec        sec_filings.py        pull SEC financials for a ticker
+    sec-cache  edgar_cache.py        inspect, prune or clear the local EDGAR cache
+    benchmarks benchmark_refresh.py  refresh stale comps in vertical_benchmarks.json
+    install    config_install.py     version-aware config file install
+    scenario   scenario_engine.py    scenario, sensitivity and Monte Carlo math
+    paths      (built-in)            print resolved workspace paths as JSON
+    bench-startup (built-in)         fail if startup exceeds a millisecond budget
+"""
+import sys
+
+# command -> (module, summary). Modules are imported only when run.
+COMMANDS = {
+    "deck":       ("deck_engine",       "Deck operations (fill-banners, format-dollars, format-all, ...)"),
+    "qa":         ("qa_check",          "QA checks on the Excel model and vF deck"),
+    "excel":      ("excel_editor",      "Read, write and recalc the Excel model"),
+    "scan":       ("template_scanner",  "Detect template structure and match configs"),
+    "sec":        ("sec_filings",       "Pull SEC financials for a ticker"),
+    "sec-cache":  ("edgar_cache",       "Inspect, prune or clear the local EDGAR cache"),
+    "benchmarks": ("benchmark_refresh", "Refresh stale comps and ranges in vertical_benchmarks.json"),
+    "install":    ("config_install",    "Version-aware config file install"),
+    "scenario":   ("scenario_engine",   "Scenario, sensitivity grid and Monte Carlo math"),
+}
+BUILTINS = {
+    "paths":         "Print resolved workspace paths as JSON",
+    "bench-startup": "Time cold startup of --help and paths against a budget",
+}
+
+# Modules that must never be imported by --help or metadata commands
+HEAVY_MODULES = ("openpyxl", "pptx", "edgar", "numpy", "pandas", "requests")
+DEFAULT_BUDGET_MS = 150
+
+
+def _usage():
+    width = max(len(c) for c in (*COMMANDS, *BUILTINS))
+    lines = ["usage: jolly <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += [f"  {name:<{width}}  {summary}" for name, summary in BUILTINS.items()]
+    lines += ["", "Run 'jolly <command> --help' for a command's options."]
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Built-in commands
+# ---------------------------------------------------------------------------
+def cmd_paths(argv):
+    import json
+    from workspace import settings
+    print(json.dumps({
+        "workspace":       str(settings.root),
+        "claude_dir":      str(settings.claude_dir),
+        "clients_dir":     str(settings.clients_dir),
+        "templates_dir":   str(settings.templates_dir),
+        "config_found":    settings.config_path.exists(),
+        "env_found":       settings.env_path.exists(),
+    }, indent=2))
+
+
+def _time_command(args, runs):
+    """Median wall time (ms) of `python jolly.py *args` in fresh processes."""
+    import statistics
+    import subprocess
+    import time
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, __file__, *args], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 1)
+
+
+def _heavy_imports(args):
+    """Heavy modules a command imports, checked in a fresh interpreter."""
+    import json
+    import subprocess
+    probe = (
+        "import sys, json, contextlib, io\n"
+        f"sys.path.insert(0, {str(__import__('os').path.dirname(__file__))!r})\n"
+        "import jolly\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        f"        jolly.main({list(args)!r})\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def cmd_bench_startup(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(prog="jolly bench-startup",
+                                     description=BUILTINS["bench-startup"])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Max median startup per command (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (default: 5)")
+    args = parser.parse_args(argv)
+
+    results, failed = {}, False
+    for label, cmd in (("--help", ["--help"]), ("paths", ["paths"])):
+        ms = _time_command(cmd, args.runs)
+        heavy = _heavy_imports(cmd)
+        ok = ms <= args.budget_ms and not heavy
+        failed |= not ok
+        results[label] = {"median_ms": ms, "heavy_imports": heavy, "ok": ok}
+    print(json.dumps({"budget_ms": args.budget_ms, "runs": args.runs,
+                      "results": results, "passed": not failed}, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(_usage())
+        return
+    command, rest = argv[0], argv[1:]
+
+    if command == "paths":
+        return cmd_paths(rest)
+    if command == "bench-startup":
+        return cmd_bench_startup(rest)
+    if command not in COMMANDS:
+        print(f"jolly: unknown command '{command}'\n\n{_usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    import importlib
+    module = importlib.import_module(COMMANDS[command][0])
+    sys.argv = [f"jolly {command}", *rest]
+    return module.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,45 +2,36 @@
 Shared utilities for all Jolly agents.
 Consolidates duplicated functions from populate scripts.
 """
-import os
-import json
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.comments import Comment
+
+from workspace import settings
 
 # ---------------------------------------------------------------------------
-# Paths — resolved from JOLLY_WORKSPACE env var + workspace_config.json
+# Paths — resolved lazily from JOLLY_WORKSPACE + workspace_config.json
 # ---------------------------------------------------------------------------
-BASE_DIR = Path(os.getenv("JOLLY_WORKSPACE", ".")).resolve()
+# BASE_DIR, CLIENTS_DIR, TEMPLATES_DIR, CLAUDE_DIR and the *_TEMPLATE paths are
+# computed on first access (see __getattr__ below), so importing this module
+# does no filesystem I/O. .claude/.env is read by settings.env(), and is
+# exported into os.environ (settings.export_env()) only before edgartools loads.
+_LAZY_PATHS = {
+    "BASE_DIR":              lambda: settings.root,
+    "CLIENTS_DIR":           lambda: settings.clients_dir,
+    "TEMPLATES_DIR":         lambda: settings.templates_dir,
+    "CLAUDE_DIR":            lambda: settings.claude_dir,
+    "QSR_MODEL_TEMPLATE":    lambda: settings.template_paths("qsr")[0],
+    "QSR_PPT_TEMPLATE":      lambda: settings.template_paths("qsr")[1],
+    "MFG_MODEL_TEMPLATE":    lambda: settings.template_paths("manufacturing")[0],
+    "MFG_PPT_TEMPLATE":      lambda: settings.template_paths("manufacturing")[1],
+    "RETAIL_MODEL_TEMPLATE": lambda: settings.template_paths("retail")[0],
+    "RETAIL_PPT_TEMPLATE":   lambda: settings.template_paths("retail")[1],
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_PATHS:
+        return _LAZY_PATHS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Read client_root and templates_root from workspace config if available
-_ws_config_path = BASE_DIR / ".claude" / "data" / "workspace_config.json"
-_ws_config = {}
-if _ws_config_path.exists():
-    try:
-        _ws_config = json.loads(_ws_config_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        pass
-
-CLIENTS_DIR = BASE_DIR / _ws_config.get("client_root", "Clients")
-TEMPLATES_DIR = BASE_DIR / _ws_config.get("templates_root", "Templates")
-CLAUDE_DIR = BASE_DIR / ".claude"
-
-# Load .env if present
-_env_path = CLAUDE_DIR / ".env"
-if _env_path.exists():
-    for _line in _env_path.read_text().splitlines():
-        if "=" in _line and not _line.startswith("#"):
-            _k, _v = _line.split("=", 1)
-            os.environ.setdefault(_k.strip(), _v.strip())
-
-# Template paths
-QSR_MODEL_TEMPLATE = TEMPLATES_DIR / "QSR" / "QSR Intro Model Template.xlsx"
-QSR_PPT_TEMPLATE = TEMPLATES_DIR / "QSR" / "QSR Intro Template.pptx"
-MFG_MODEL_TEMPLATE = TEMPLATES_DIR / "Manufacturing" / "Manufacturing Intro Template.xlsx"
-MFG_PPT_TEMPLATE = TEMPLATES_DIR / "Manufacturing" / "Manufacturing Intro Template.pptx"
-RETAIL_MODEL_TEMPLATE = TEMPLATES_DIR / "Retail" / "Retail Intro Model Template.xlsx"
-RETAIL_PPT_TEMPLATE = TEMPLATES_DIR / "Retail" / "Retail Intro Template.pptx"
 
 # Comment defaults
 COMMENT_AUTHOR = "Jolly Research"
@@ -79,6 +70,7 @@ QSR_HIRING_COST_CAP = 3500
 def add_comment(ws, cell, text, author=COMMENT_AUTHOR, width=COMMENT_WIDTH,
                 height=COMMENT_HEIGHT):
     """Add a formatted comment to an Excel cell."""
+    from openpyxl.comments import Comment
     c = Comment(text, author)
     c.width = width
     c.height = height
@@ -117,6 +109,7 @@ def set_scenario_cells(ws, row, values, comment_text=None):
 # ---------------------------------------------------------------------------
 def load_workbook_safe(path, data_only=False):
     """Load an openpyxl workbook with clear error messaging."""
+    from openpyxl import load_workbook
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Model not found: {path}")
@@ -233,6 +226,31 @@ def round_to_standard(value, field_type):
     return value
 
 
+def round_to_standard_array(values, field_type):
+    """Vectorized round_to_standard for a NumPy array (or sequence) of values.
+
+    Applies the same rules element-wise and returns a float array; None/NaN
+    stay NaN. Requires numpy.
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+
+    steps = {"menu_price": 4, "ebitda_per_hour": 4, "turnover_pct": 20, "reduction_pct": 40}
+    if field_type in steps:
+        return np.round(values * steps[field_type]) / steps[field_type]
+    if field_type == "employees_50":
+        return np.round(values / 50) * 50
+    if field_type == "hiring_cost_500":
+        return np.round(values / 500) * 500
+    if field_type == "margin_pct":
+        return np.round(values, 2)
+
+    ndigits = ROUNDING_RULES.get(field_type)
+    if ndigits is not None:
+        return np.round(values, ndigits)
+    return values
+
+
 # ---------------------------------------------------------------------------
 # EBITDA calculations
 # ---------------------------------------------------------------------------
@@ -256,18 +274,7 @@ def calculate_orders_per_store_per_day(revenue, stores, aov):
 # ---------------------------------------------------------------------------
 def get_template_paths(template_type):
     """Return (model_template, ppt_template) paths for a template type."""
-    templates = {
-        "qsr": (QSR_MODEL_TEMPLATE, QSR_PPT_TEMPLATE),
-        "manufacturing": (MFG_MODEL_TEMPLATE, MFG_PPT_TEMPLATE),
-        "retail": (RETAIL_MODEL_TEMPLATE, RETAIL_PPT_TEMPLATE),
-    }
-    result = templates.get(template_type.lower())
-    if not result:
-        raise ValueError(
-            f"Unknown template type '{template_type}'. "
-            f"Available: {list(templates.keys())}"
-        )
-    return result
+    return settings.template_paths(template_type)
 
 
 def resolve_client_path(company_name, folder_override=None):
@@ -277,4 +284,4 @@ def resolve_client_path(company_name, folder_override=None):
     use that relative to CLIENTS_DIR.  Otherwise use company_name directly.
     """
     rel = folder_override or company_name
-    return CLIENTS_DIR / rel
+    return settings.clients_dir / rel
@@ -0,0 +1,227 @@
+"""
+Number Format
+=============
+Batch number formatting and rounding for Jolly decks and models.
+
+One home for the Jolly display standards, shared by deck_engine (dollar
+reformatting), qa_check (report lines) and scenario_engine (formatted
+exports). Every function accepts a scalar, a sequence or a NumPy array:
+repeated values are formatted once per call, and a module-level LRU cache
+carries formatted values across calls, so formatting a whole sensitivity
+table is a single call.
+
+Dollar standard:
+    $1M+       -> $X.XMM   (1 decimal, uppercase MM, e.g. $21.6MM, $2.0MM)
+    $1K-$999K  -> $XXXk    (integer, lowercase k, e.g. $516k, $2k)
+    Under $1K  -> $XXX     (plain integer, no suffix)
+
+Usage:
+    from number_format import format_dollars, format_batch, replace_raw_dollars
+    format_batch([21_600_000, 516_000, 850], "dollars")   # ['$21.6MM', '$516k', '$850']
+    format_batch(grid, "rops")                            # nested lists, same shape
+    text, n = replace_raw_dollars("Saves $1,234,567 a year")
+"""
+import re
+from functools import lru_cache
+
+DOLLAR_FORMAT_HELP = """
+Dollar formatting standard:
+    $1M+       → $X.XMM   (1 decimal, uppercase MM, e.g. $21.6MM, $2.0MM)
+    $1K–$999K  → $XXXk    (integer, lowercase k, e.g. $516k, $2k)
+    Under $1K  → $XXX     (plain integer, no suffix)
+"""
+
+# Raw dollar amounts — $XXXXX+ with optional commas and decimals
+RAW_DOLLAR_RE = re.compile(r'\$[\d,]{5,}(?:\.\d+)?')
+
+CACHE_SIZE = 4096
+
+
+# ---------------------------------------------------------------------------
+# Scalar formatters (cached)
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=CACHE_SIZE)
+def _dollars(value):
+    value = abs(value)
+    if value >= 1_000_000:
+        return f"${value / 1_000_000:.1f}MM"
+    if value >= 1_000:
+        return f"${int(round(value / 1_000))}k"
+    return f"${int(value)}"
+
+
+def format_dollars(value):
+    """Format a numeric value per Jolly dollar standards.
+
+    Returns formatted string (e.g. "$21.6MM", "$516k", "$850").
+    """
+    if value is None:
+        return ""
+    return _dollars(float(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _format(value, kind):
+    if kind == "dollars":
+        return _dollars(value)
+    if kind == "whole_dollars":  # hiring costs ($3,500)
+        return f"${value:,.0f}"
+    if kind == "cents":          # unit prices, EBITDA per hour
+        return f"${value:,.2f}"
+    if kind == "pct":
+        text = f"{value * 100:.1f}".rstrip("0").rstrip(".")
+        return f"{text}%"
+    if kind == "multiple":       # ROPS
+        return f"{value:.0f}x"
+    if kind == "integer":
+        return f"{value:,.0f}"
+    raise ValueError(f"Unknown format kind {kind!r}; expected one of {sorted(FORMAT_KINDS)}")
+
+
+FORMAT_KINDS = {"dollars", "whole_dollars", "cents", "pct", "multiple", "integer"}
+
+# Rounding field types (jolly_utils.ROUNDING_RULES) -> display kind
+FIELD_KINDS = {
+    "revenue":         "dollars",
+    "revenue_500k":    "dollars",
+    "hiring_cost_100": "whole_dollars",
+    "hiring_cost_500": "whole_dollars",
+    "incentive":       "cents",
+    "menu_price":      "cents",
+    "ebitda_per_hour": "cents",
+    "margin_pct":      "pct",
+    "turnover_pct":    "pct",
+    "reduction_pct":   "pct",
+    "stores":          "integer",
+    "orders":          "integer",
+    "employees_100":   "integer",
+    "employees_50":    "integer",
+    "rops":            "multiple",
+    "ebitda_uplift":   "dollars",
+    "accretion_pct":   "pct",
+}
+
+
+def _kind(field_type):
+    if field_type in FORMAT_KINDS:
+        return field_type
+    try:
+        return FIELD_KINDS[field_type]
+    except KeyError:
+        raise ValueError(f"Unknown field type {field_type!r}") from None
+
+
+# ---------------------------------------------------------------------------
+# Batch API
+# ---------------------------------------------------------------------------
+def _is_nested(v):
+    return isinstance(v, (list, tuple)) or getattr(v, "ndim", 0) > 0
+
+
+def _flatten(values):
+    """Return (flat list, shape) for a scalar, nested sequence (any depth) or NumPy array.
+
+    Nested sequences must be rectangular; ragged input raises ValueError.
+    """
+    if hasattr(values, "tolist") and hasattr(values, "shape"):
+        return list(values.ravel().tolist()), tuple(values.shape)
+    if isinstance(values, (list, tuple)):
+        if not any(_is_nested(v) for v in values):
+            return list(values), (len(values),)
+        parts = [_flatten(v) for v in values]
+        inner = parts[0][1]
+        if any(shape != inner for _, shape in parts):
+            raise ValueError("ragged input: every nested sequence needs the same shape")
+        return [v for flat, _ in parts for v in flat], (len(parts), *inner)
+    return [values], ()
+
+
+def _reshape(flat, shape):
+    if shape == ():
+        return flat[0]
+    if len(shape) == 1:
+        return flat
+    inner = 1
+    for n in shape[1:]:
+        inner *= n
+    if inner == 0:
+        return [_reshape([], shape[1:]) for _ in range(shape[0])]
+    return [_reshape(flat[i:i + inner], shape[1:]) for i in range(0, len(flat), inner)]
+
+
+def _is_missing(v):
+    return v is None or v != v   # NaN
+
+
+def format_batch(values, field_types):
+    """Format many values at once.
+
+    *field_types* is one field type / format kind for every value, or a
+    sequence aligned with *values*. This is a Python loop with a dedupe
+    dict, not a vectorized formatter: each distinct (value, type) pair is
+    formatted once, which is what makes large tables with repeated values
+    cheap. Returns strings in the same shape as *values* (nested lists for
+    multi-dimensional input, at any depth); None/NaN become "".
+    """
+    flat, shape = _flatten(values)
+    types = [field_types] * len(flat) if isinstance(field_types, str) else _flatten(field_types)[0]
+    if len(types) != len(flat):
+        raise ValueError(f"{len(types)} field types for {len(flat)} values")
+
+    seen = {}
+    out = []
+    for v, t in zip(flat, types):
+        key = (v, t)
+        if key not in seen:
+            seen[key] = "" if _is_missing(v) else _format(float(v), _kind(t))
+        out.append(seen[key])
+    return _reshape(out, shape)
+
+
+def round_batch(values, field_types):
+    """Round many values per Jolly standards (see jolly_utils.round_to_standard).
+
+    With a single field type and NumPy installed, rounding is vectorized;
+    otherwise each distinct value is rounded once. Returns the same shape
+    as *values*.
+    """
+    from jolly_utils import round_to_standard, round_to_standard_array
+    if isinstance(field_types, str) and hasattr(values, "shape"):
+        return round_to_standard_array(values, field_types)
+    flat, shape = _flatten(values)
+    types = [field_types] * len(flat) if isinstance(field_types, str) else _flatten(field_types)[0]
+    seen = {}
+    out = []
+    for v, t in zip(flat, types):
+        key = (v, t)
+        if key not in seen:
+            seen[key] = None if _is_missing(v) else round_to_standard(v, t)
+        out.append(seen[key])
+    return _reshape(out, shape)
+
+
+def format_values(values, field_types):
+    """Round then format: returns (formatted strings, rounded values).
+
+    Display-only types (rops, ebitda_uplift, accretion_pct) pass through
+    rounding unchanged.
+    """
+    rounded = round_batch(values, field_types)
+    return format_batch(rounded, field_types), rounded
+
+
+# ---------------------------------------------------------------------------
+# Text helpers
+# ---------------------------------------------------------------------------
+def replace_raw_dollars(text):
+    """Reformat every raw dollar amount ($1234567, $1,234,567.00) in *text*.
+
+    Returns (new_text, number_of_amounts_replaced).
+    """
+    return RAW_DOLLAR_RE.subn(
+        lambda m: _dollars(float(m.group(0)[1:].replace(",", ""))), text)
+
+
+def cache_info():
+    """LRU statistics for the scalar formatters."""
+    return {"dollars": _dollars.cache_info()._asdict(), "format": _format.cache_info()._asdict()}
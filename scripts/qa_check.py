@@ -21,39 +21,21 @@ Checks:
         D7  Executive audience rule violations
     Cross:  key values approximately match between Excel and PPT
 """
-import sys, os, re, argparse
+import sys, re, argparse
 
 sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
-try:
-    from openpyxl import load_workbook
-except ImportError:
-    print("ERROR: openpyxl not installed. Run: pip install openpyxl"); sys.exit(1)
-try:
-    from pptx import Presentation
-    from pptx.dml.color import RGBColor
-except ImportError:
-    print("ERROR: python-pptx not installed. Run: pip install python-pptx"); sys.exit(1)
-
 import json as _json
-from pathlib import Path as _Path
 
-# Resolve CLIENTS_DIR from JOLLY_WORKSPACE env var + workspace_config.json
-_ws = _Path(os.environ.get("JOLLY_WORKSPACE", ".")).resolve()
-_cfg_path = _ws / ".claude" / "data" / "workspace_config.json"
-_cfg = {}
-if _cfg_path.exists():
-    try:
-        _cfg = _json.loads(_cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-CLIENTS_DIR = _ws / _cfg.get("client_root", "Clients")
+# Client folders resolve from JOLLY_WORKSPACE + workspace_config.json on first use
+from workspace import settings
 
 # Import shared utils (formula counts, count helper, accretion bounds)
 from jolly_utils import FORMULA_COUNTS, ACCRETION_BOUNDS, count_formulas
+from number_format import format_batch, format_dollars
 
 PASS, FAIL, WARN = "[PASS]", "[FAIL]", "[WARN]"
-RED = RGBColor(0xFF, 0x00, 0x00)
+RED = None  # RGBColor(0xFF, 0x00, 0x00), set by _load_dependencies()
 PLACEHOLDER_RE = re.compile(r"\[.*?\]")
 RAW_DOLLAR_RE = re.compile(r"\$[\d,]{5,}")
 UPPERCASE_K_RE = re.compile(r"\$\d+K\b")
@@ -77,6 +59,24 @@ EXEC_AUDIENCE_PATTERNS = [
 ]
 
 
+def _load_dependencies():
+    """Import openpyxl and python-pptx on first use (exit with a hint if missing).
+
+    Deferred so path errors and --help don't pay for the heavy imports.
+    """
+    global load_workbook, Presentation, RED
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        print("ERROR: openpyxl not installed. Run: pip install openpyxl"); sys.exit(1)
+    try:
+        from pptx import Presentation
+        from pptx.dml.color import RGBColor
+    except ImportError:
+        print("ERROR: python-pptx not installed. Run: pip install python-pptx"); sys.exit(1)
+    RED = RGBColor(0xFF, 0x00, 0x00)
+
+
 def _iter_shape_paragraphs(shape):
     """Yield every paragraph in a shape, covering text frames and tables."""
     if shape.has_text_frame:
@@ -101,7 +101,7 @@ def _get_shape_text(shape):
 
 def find_file(company: str, subfolder: str, pattern: str) -> str:
     """Find the most-recent file matching *pattern* inside the client folder."""
-    folder = CLIENTS_DIR / company / subfolder
+    folder = settings.clients_dir / company / subfolder
     matches = sorted(folder.glob(pattern))
     if not matches:
         raise FileNotFoundError(f"No file matching '{pattern}' in {folder}")
@@ -110,7 +110,7 @@ def find_file(company: str, subfolder: str, pattern: str) -> str:
 
 def find_vf_deck(company: str) -> str:
     """Locate the vF PowerPoint deck (searches subfolders recursively)."""
-    folder = CLIENTS_DIR / company / "2. Presentations"
+    folder = settings.clients_dir / company / "2. Presentations"
     for pat in ("**/*vF*.pptx", "**/*vf*.pptx"):
         matches = sorted(folder.glob(pat))
         if matches:
@@ -124,13 +124,22 @@ def find_vf_deck(company: str) -> str:
 
 
 def _load_template_config(company: str):
-    """Load template_config.json for a company, or return None."""
-    config_path = CLIENTS_DIR / company / "4. Reports" / "template_config.json"
+    """Load template_config.json for a company, or return None.
+
+    Schema problems (see template_registry.CONFIG_SCHEMA) are printed as a
+    warning; the config is still used for whatever keys it does have.
+    """
+    from template_registry import validate_config
+    config_path = settings.clients_dir / company / "4. Reports" / "template_config.json"
     if config_path.exists():
         try:
-            return _json.loads(config_path.read_text(encoding="utf-8"))
+            config = _json.loads(config_path.read_text(encoding="utf-8"))
         except Exception:
-            pass
+            return None
+        errors = validate_config(config)
+        if errors:
+            print(f"  WARNING: template_config.json schema: {'; '.join(errors)}")
+        return config
     return None
 
 
@@ -151,6 +160,7 @@ def check_excel(company: str) -> dict:
     try:
         model_path = find_file(company, "1. Model", "*.xlsx")
         print(f"File: {model_path}")
+        _load_dependencies()
     except FileNotFoundError as e:
         print(f"  {FAIL} Model file not found: {e}"); return {}
 
@@ -206,12 +216,15 @@ def check_excel(company: str) -> dict:
                 rops_col = col
                 break
         if rops_col:
+            out_of_range = []
             for row in range(2, ws_c.max_row + 1):
                 camp_name = ws_c.cell(row=row, column=1).value
                 rops_val = ws_c.cell(row=row, column=rops_col).value
                 if camp_name and isinstance(rops_val, (int, float)) and rops_val > 0:
                     if rops_val < rops_lo or rops_val > rops_hi:
-                        rops_issues.append(f"{camp_name}: {rops_val:.0f}x")
+                        out_of_range.append((camp_name, rops_val))
+            labels = format_batch([v for _, v in out_of_range], "rops")
+            rops_issues = [f"{name}: {label}" for (name, _), label in zip(out_of_range, labels)]
             if not rops_issues:
                 print(f"  {PASS} M3: All campaign ROPS within {rops_lo}x-{rops_hi}x")
                 results["M3"] = True
@@ -246,7 +259,8 @@ def check_excel(company: str) -> dict:
             pct = total_accretion / annual_ebitda
             ok = pct <= accretion_ceiling
             status = PASS if ok else WARN
-            print(f"  {status} M4: Accretion = {pct:.1%} of ${annual_ebitda/1e6:.1f}MM EBITDA "
+            sign = "-" if annual_ebitda < 0 else ""   # format_dollars drops the sign
+            print(f"  {status} M4: Accretion = {pct:.1%} of {sign}{format_dollars(annual_ebitda)} EBITDA "
                   f"(ceiling: {accretion_ceiling:.0%})")
             results["M4"] = True if ok else None
         else:
@@ -327,6 +341,7 @@ def check_ppt(company: str) -> dict:
     try:
         vf_path = find_vf_deck(company)
         print(f"File: {vf_path}")
+        _load_dependencies()
     except FileNotFoundError as e:
         print(f"  {FAIL} vF deck not found: {e}"); return {}
 
@@ -444,6 +459,7 @@ def check_cross_validation(company: str) -> dict:
     excel_values = {}
     try:
         model_path = find_file(company, "1. Model", "*.xlsx")
+        _load_dependencies()
         wb = load_workbook(model_path, data_only=True)
         if "Inputs" in wb.sheetnames:
             ws = wb["Inputs"]
@@ -0,0 +1,700 @@
+"""
+Scenario Engine
+===============
+NumPy-backed campaign math for Jolly intro models.
+
+Computes per-campaign EBITDA uplift, incentive cost, ROPS and total accretion
+for the Base/Upside/Downside scenarios in one vectorized call, plus full
+two-way sensitivity grids, so assumption combinations can be explored before
+any value is written to the workbook.
+
+Campaign mechanics follow campaign_mechanic_map in the template configs:
+    revenue_uplift         revenue x sales_uplift_pct x contribution_margin_pct
+    hiring_cost_avoidance  employees x turnover_rate x referral_success_rate
+                           x (hiring_cost - incentive), incentive = hiring_cost / 10
+    hours_recovery         employees x hours_per_employee x hours_lost_pct
+                           x campaign_reduction_pct x ebitda_per_hour
+
+ROPS = EBITDA uplift / incentive cost. Revenue and hours campaigns take their
+incentive cost from an explicit incentive_cost assumption, or from a per-event
+cost: revenue campaigns pay incentive_per_unit per upsell, with upsells =
+uplift revenue / unit_price (default: average order value, i.e. annual orders
+x sales_uplift_pct); hours campaigns pay incentive_per_hour per hour saved.
+load_model_inputs() reads the per-event costs from the config's
+campaign_economics_rows ("Cost Per Beverage Upsell" -> Campaign 1 - Beverage
+Upsell). A campaign with no incentive input gets null ROPS and a note saying so.
+
+Every assumption may be a scalar, a [base, upside, downside] triple, or any
+NumPy array; results broadcast, which is what the grid and simulation modes
+rely on.
+
+--simulate N draws N samples of every assumption (triangular over the
+Base/Upside/Downside range, widened to the vertical's benchmark range from
+vertical_benchmarks.json) and reports percentiles of uplift, ROPS and
+accretion plus the probability of breaching each ACCRETION_BOUNDS limit.
+
+Usage:
+    python scenario_engine.py --file model.xlsx --config template_config.json
+    python scenario_engine.py --file model.xlsx --config template_config.json \\
+        --grid "Campaign 1" sales_uplift_pct 0.01:0.05:5 contribution_margin_pct 0.5:0.8:4
+    python scenario_engine.py --assumptions assumptions.json
+    python scenario_engine.py --file model.xlsx --config template_config.json \
+        --simulate 200000 --vertical qsr_franchise --workers 4
+
+Requires: pip install numpy
+"""
+import json
+import re
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # reported by main(); library callers need numpy anyway
+    np = None
+
+from jolly_utils import ACCRETION_BOUNDS, round_to_standard_array
+
+SCENARIOS = ("Base", "Upside", "Downside")
+
+# Inputs-sheet labels (column B) -> assumption keys used by the mechanics
+LABEL_KEYS = {
+    "Sales Uplift %":              "sales_uplift_pct",
+    "Contribution Margin %":       "contribution_margin_pct",
+    "Turnover Rate":               "turnover_rate",
+    "Referral Success Rate":       "referral_success_rate",
+    "Hiring Cost":                 "hiring_cost",
+    "Total Hours per Employee/Yr": "hours_per_employee",
+    "Hours Lost to Tardiness %":   "hours_lost_pct",
+    "Campaign Reduction %":        "campaign_reduction_pct",
+    "EBITDA per Hour Saved":       "ebitda_per_hour",
+}
+
+# Company-level Inputs labels -> keys
+COMPANY_LABELS = {
+    "Total Annual Revenue":     "revenue",
+    "Total Employees":          "employees",
+    "Annual EBITDA":            "annual_ebitda",
+    "Number of Stores":         "stores",
+    "Orders Per Store Per Day": "orders_per_store_per_day",
+    "Average Order Value":      "aov",
+}
+
+# campaign_economics_rows value -> per-event incentive key, by mechanic
+ECONOMICS_KEYS = {
+    "revenue_uplift": "incentive_per_unit",
+    "hours_recovery": "incentive_per_hour",
+}
+
+# Assumption key -> jolly_utils rounding field type
+FIELD_TYPES = {
+    "contribution_margin_pct": "margin_pct",
+    "turnover_rate":           "turnover_pct",
+    "hiring_cost":             "hiring_cost_100",
+    "ebitda_per_hour":         "ebitda_per_hour",
+    "campaign_reduction_pct":  "reduction_pct",
+}
+
+HIRING_INCENTIVE_RATIO = 0.10
+
+
+def _key(label):
+    """Map an Inputs label to an assumption key ('Sales Uplift %' -> sales_uplift_pct)."""
+    if label in LABEL_KEYS:
+        return LABEL_KEYS[label]
+    return re.sub(r"[^a-z0-9]+", "_", label.lower().replace("%", "pct")).strip("_")
+
+
+def _arr(value):
+    return np.asarray(value if value is not None else np.nan, dtype=float)
+
+
+def _need(a, *keys):
+    missing = [k for k in keys if k not in a]
+    if missing:
+        raise KeyError(f"missing assumptions: {', '.join(missing)}")
+    return [_arr(a[k]) for k in keys]
+
+
+def average_order_value(company):
+    """company["aov"], else revenue / (stores x orders per store per day x 365); NaN if unknown."""
+    if company.get("aov") is not None:
+        return _arr(company["aov"])
+    stores, orders = company.get("stores"), company.get("orders_per_store_per_day")
+    if stores is None or orders is None:
+        return _arr(np.nan)
+    denom = _arr(stores) * _arr(orders) * 365
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, _arr(company["revenue"]) / denom, np.nan)
+
+
+# ---------------------------------------------------------------------------
+# Mechanics — each returns (ebitda_uplift, incentive_cost) arrays
+# ---------------------------------------------------------------------------
+def _revenue_uplift(company, a):
+    uplift_pct, margin = _need(a, "sales_uplift_pct", "contribution_margin_pct")
+    revenue_gain = _arr(company["revenue"]) * uplift_pct
+    if "incentive_cost" in a:
+        incentive = _arr(a["incentive_cost"])
+    elif "incentive_per_unit" in a:
+        price = _arr(a["unit_price"]) if "unit_price" in a else average_order_value(company)
+        incentive = revenue_gain / price * _arr(a["incentive_per_unit"])
+    else:
+        incentive = np.full_like(revenue_gain, np.nan)
+    return revenue_gain * margin, incentive
+
+
+def _hiring_cost_avoidance(company, a):
+    turnover, success, hiring_cost = _need(a, "turnover_rate", "referral_success_rate", "hiring_cost")
+    hires = _arr(company["employees"]) * turnover * success
+    per_hire = _arr(a["incentive_cost_per_hire"]) if "incentive_cost_per_hire" in a \
+        else hiring_cost * HIRING_INCENTIVE_RATIO
+    return hires * (hiring_cost - per_hire), hires * per_hire
+
+
+def _hours_recovery(company, a):
+    hours, lost, reduction = _need(a, "hours_per_employee", "hours_lost_pct", "campaign_reduction_pct")
+    if "ebitda_per_hour" in a:
+        rate = _arr(a["ebitda_per_hour"])
+    else:
+        rate = ebitda_per_hour(company["revenue"], company["employees"], hours,
+                               company.get("ebitda_margin"))
+    saved = _arr(company["employees"]) * hours * lost * reduction
+    if "incentive_cost" in a:
+        incentive = _arr(a["incentive_cost"])
+    elif "incentive_per_hour" in a:
+        incentive = saved * _arr(a["incentive_per_hour"])
+    else:
+        incentive = np.full_like(saved, np.nan)
+    return saved * rate, incentive
+
+
+MECHANICS = {
+    "revenue_uplift":        _revenue_uplift,
+    "hiring_cost_avoidance": _hiring_cost_avoidance,
+    "hours_recovery":        _hours_recovery,
+}
+
+
+# ---------------------------------------------------------------------------
+# Vectorized jolly_utils calculations
+# ---------------------------------------------------------------------------
+def ebitda_per_hour(revenue, employees, hours_per_year, ebitda_margin):
+    """Array form of jolly_utils.calculate_ebitda_per_hour (0 where undefined)."""
+    denom = _arr(employees) * _arr(hours_per_year)
+    numer = _arr(revenue) * _arr(ebitda_margin)
+    numer, denom = np.broadcast_arrays(numer, denom)
+    raw = np.divide(numer, denom, out=np.zeros(denom.shape), where=denom != 0)
+    return round_to_standard_array(raw, "ebitda_per_hour")
+
+
+def orders_per_store_per_day(revenue, stores, aov):
+    """Array form of jolly_utils.calculate_orders_per_store_per_day."""
+    denom = _arr(stores) * 365 * _arr(aov)
+    out = np.zeros(np.broadcast(denom, _arr(revenue)).shape)
+    return np.round(np.divide(_arr(revenue), denom, out=out, where=denom != 0))
+
+
+def round_assumptions(assumptions):
+    """Round every assumption with a known field type to Jolly standards."""
+    return {
+        k: (round_to_standard_array(v, FIELD_TYPES[k]) if k in FIELD_TYPES else v)
+        for k, v in assumptions.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+def _annual_ebitda(company):
+    if company.get("annual_ebitda") is not None:
+        return _arr(company["annual_ebitda"])
+    return _arr(company["revenue"]) * _arr(company.get("ebitda_margin"))
+
+
+def evaluate(company, campaigns, rounding=True):
+    """Evaluate every campaign for all scenarios at once.
+
+    *company* holds revenue, employees and annual_ebitda (or ebitda_margin).
+    *campaigns* maps campaign name -> {"mechanic": ..., "assumptions": {...}}.
+    Arrays in the result have shape (n_campaigns, *scenario_shape); totals
+    drop the campaign axis. Raises ValueError when *campaigns* is empty.
+    """
+    if not campaigns:
+        raise ValueError("no campaigns to evaluate")
+    names, uplifts, incentives = [], [], []
+    for name, spec in campaigns.items():
+        a = round_assumptions(spec["assumptions"]) if rounding else spec["assumptions"]
+        uplift, incentive = MECHANICS[spec["mechanic"]](company, a)
+        names.append(name)
+        uplifts.append(uplift)
+        incentives.append(incentive)
+
+    arrays = np.broadcast_arrays(*uplifts, *incentives)
+    uplift, incentive = np.stack(arrays[:len(names)]), np.stack(arrays[len(names):])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rops = np.where(incentive > 0, uplift / incentive, np.nan)
+        total = uplift.sum(axis=0)
+        accretion = total / _annual_ebitda(company)
+    return {
+        "campaigns":      names,
+        "ebitda_uplift":  uplift,
+        "incentive_cost": incentive,
+        "rops":           rops,
+        "total_uplift":   total,
+        "accretion_pct":  accretion,
+    }
+
+
+def sensitivity_grid(company, campaigns, campaign, row, col, scenario=0, rounding=False):
+    """Two-way sensitivity of one campaign's assumptions.
+
+    *row* and *col* are (assumption_key, values) pairs. Other campaigns are
+    held at *scenario* (index into Base/Upside/Downside). Returns 2-D arrays
+    (len(row values) x len(col values)) of the campaign's uplift and ROPS and
+    of total accretion. Grids are unrounded by default so every point stays
+    distinct.
+    """
+    (row_key, row_values), (col_key, col_values) = row, col
+    pick = lambda v: _arr(v)[..., scenario] if _arr(v).ndim else _arr(v)   # noqa: E731
+    fixed = {
+        name: {"mechanic": spec["mechanic"],
+               "assumptions": {k: pick(v) for k, v in spec["assumptions"].items()}}
+        for name, spec in campaigns.items()
+    }
+    target = fixed[campaign]["assumptions"]
+    target[row_key] = _arr(row_values)[:, None]
+    target[col_key] = _arr(col_values)[None, :]
+
+    result = evaluate(company, fixed, rounding=rounding)
+    i = result["campaigns"].index(campaign)
+    return {
+        "campaign":      campaign,
+        "rows":          {row_key: _arr(row_values)},
+        "cols":          {col_key: _arr(col_values)},
+        "ebitda_uplift": result["ebitda_uplift"][i],
+        "rops":          result["rops"][i],
+        "accretion_pct": result["accretion_pct"],
+    }
+
+
+def rops_gaps(result):
+    """Notes for campaigns whose ROPS is null in every scenario (no incentive cost input)."""
+    return [
+        f"{name}: ROPS not computed — no incentive cost input (set incentive_cost, "
+        f"incentive_per_unit or incentive_per_hour, or add a campaign_economics_rows entry)"
+        for name, rops in zip(result["campaigns"], result["rops"])
+        if np.isnan(rops).all()
+    ]
+
+
+def check_bounds(result):
+    """Flag scenario results outside ACCRETION_BOUNDS."""
+    rops_lo, rops_hi = ACCRETION_BOUNDS["rops_per_campaign"]
+    acc_lo, acc_hi = ACCRETION_BOUNDS["total_pct"]
+    rops = result["rops"]
+    return {
+        "rops_out_of_range": ~np.isnan(rops) & ((rops < rops_lo) | (rops > rops_hi)),
+        "accretion_over":    result["accretion_pct"] > acc_hi,
+        "accretion_under":   result["accretion_pct"] < acc_lo,
+    }
+
+
+def _clean(value):
+    """Convert NumPy values to JSON-safe Python (NaN -> None)."""
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _clean(value.tolist())
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 4)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def format_result(result):
+    """Deck-formatted strings for every array in an evaluate()/grid result.
+
+    One batched number_format call per metric, whatever the array shape.
+    """
+    from number_format import format_batch
+    kinds = {"ebitda_uplift": "ebitda_uplift", "incentive_cost": "dollars",
+             "rops": "rops", "total_uplift": "ebitda_uplift", "accretion_pct": "accretion_pct"}
+    return {key: format_batch(np.asarray(result[key]), kind)
+            for key, kind in kinds.items() if key in result}
+
+
+def _per_scenario(result, n):
+    """*result* with every array broadcast to n scenarios (campaign arrays to (campaigns, n))."""
+    k = len(result["campaigns"])
+    out = dict(result)
+    for key in ("ebitda_uplift", "incentive_cost", "rops"):
+        out[key] = np.broadcast_to(np.reshape(result[key], (k, -1)), (k, n))
+    for key in ("total_uplift", "accretion_pct"):
+        out[key] = np.broadcast_to(np.reshape(result[key], -1), (n,))
+    return out
+
+
+def summarize(result, scenarios=SCENARIOS, formatted=False):
+    """JSON-friendly per-scenario summary of an evaluate() result.
+
+    With *formatted*, each figure also gets its deck string (e.g. "$8.4MM",
+    "17x") under "formatted". Scenario-independent results (every
+    assumption a scalar) are repeated across *scenarios*.
+    """
+    result = _per_scenario(result, len(scenarios))
+    flags = check_bounds(result)
+    text = format_result(result) if formatted else None
+    out = {"scenarios": {}}
+    for j, label in enumerate(scenarios):
+        campaigns = {}
+        for i, name in enumerate(result["campaigns"]):
+            campaigns[name] = {
+                "ebitda_uplift":  result["ebitda_uplift"][i, j],
+                "incentive_cost": result["incentive_cost"][i, j],
+                "rops":           result["rops"][i, j],
+                "rops_in_range":  (None if np.isnan(result["rops"][i, j])
+                                   else not flags["rops_out_of_range"][i, j]),
+            }
+            if text:
+                campaigns[name]["formatted"] = {
+                    k: text[k][i][j] for k in ("ebitda_uplift", "incentive_cost", "rops")}
+        out["scenarios"][label] = {
+            "campaigns":     campaigns,
+            "total_uplift":  result["total_uplift"][j],
+            "accretion_pct": result["accretion_pct"][j],
+            "accretion_over_ceiling": flags["accretion_over"][j],
+        }
+        if text:
+            out["scenarios"][label]["formatted"] = {
+                k: text[k][j] for k in ("total_uplift", "accretion_pct")}
+    return _clean(out)
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo simulation
+# ---------------------------------------------------------------------------
+# Assumption keys -> vertical_benchmarks.json benchmark_ranges keys
+BENCHMARK_KEYS = {
+    "turnover_rate": "turnover_rate",
+}
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def load_benchmarks(vertical, path=None):
+    """Return benchmark_ranges for *vertical* from vertical_benchmarks.json."""
+    if path is None:
+        from workspace import settings
+        path = settings.data_dir / "vertical_benchmarks.json"
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if vertical not in data or vertical.startswith("_"):
+        verticals = [k for k in data if not k.startswith("_")]
+        raise KeyError(f"unknown vertical {vertical!r}; available: {', '.join(verticals)}")
+    return data[vertical].get("benchmark_ranges", {})
+
+
+def sample_ranges(campaigns, benchmarks=None):
+    """Derive (low, mode, high) per assumption from its Base/Upside/Downside values.
+
+    The Base value is the mode and the scenario spread the range; where the
+    vertical has a benchmark range for the assumption, the range is widened
+    to cover it. Assumptions with no spread stay fixed (low == high).
+    """
+    benchmarks = benchmarks or {}
+    ranges = {}
+    for name, spec in campaigns.items():
+        out = {}
+        for key, value in spec["assumptions"].items():
+            values = np.atleast_1d(_arr(value))
+            low, mode, high = float(values.min()), float(values[0]), float(values.max())
+            bench = benchmarks.get(BENCHMARK_KEYS.get(key, ""))
+            if isinstance(bench, dict) and bench.get("low") is not None and bench.get("high") is not None:
+                low, high = min(low, bench["low"]), max(high, bench["high"])
+            out[key] = (low, mode, high)
+        ranges[name] = out
+    return ranges
+
+
+def _simulate_chunk(job):
+    """Draw one chunk of samples and evaluate it (top-level so it pickles)."""
+    company, campaigns, ranges, n, seed = job
+    rng = np.random.default_rng(seed)
+    drawn = {}
+    for name, spec in campaigns.items():
+        assumptions = {}
+        for key, (low, mode, high) in ranges[name].items():
+            assumptions[key] = rng.triangular(low, mode, high, n) if high > low else np.full(n, low)
+        drawn[name] = {"mechanic": spec["mechanic"], "assumptions": assumptions}
+    result = evaluate(company, drawn, rounding=False)
+    return result["ebitda_uplift"], result["rops"], result["accretion_pct"]
+
+
+def _distribution(values):
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    pct = np.percentile(values, PERCENTILES)
+    return {"mean": values.mean(), **{f"p{p}": v for p, v in zip(PERCENTILES, pct)}}
+
+
+def _probability(mask, valid):
+    return float(mask[valid].mean()) if valid.any() else None
+
+
+def simulate(company, campaigns, draws=100_000, seed=None, benchmarks=None,
+             workers=1, chunk_size=50_000):
+    """Monte Carlo distribution of campaign uplift, ROPS and accretion.
+
+    Samples every assumption from a triangular distribution over the range
+    from sample_ranges(), evaluates all draws vectorized in chunks of
+    *chunk_size* (spread over *workers* processes), and reports percentiles
+    and the probability of breaching each ACCRETION_BOUNDS limit (ROPS
+    probabilities are null, with a rops_note, for campaigns that have no
+    incentive cost input — see load_model_inputs). Chunk seeds
+    come from *seed*, so results are reproducible for any worker count.
+    """
+    ranges = sample_ranges(campaigns, benchmarks)
+    sizes = [min(chunk_size, draws - i) for i in range(0, draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(company, campaigns, ranges, n, s) for n, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_chunk, jobs))
+    else:
+        parts = [_simulate_chunk(job) for job in jobs]
+
+    uplift = np.concatenate([p[0] for p in parts], axis=1)
+    rops = np.concatenate([p[1] for p in parts], axis=1)
+    accretion = np.concatenate([p[2] for p in parts])
+
+    rops_lo, rops_hi = ACCRETION_BOUNDS["rops_per_campaign"]
+    acc_lo, acc_hi = ACCRETION_BOUNDS["total_pct"]
+    per_campaign = {}
+    for i, name in enumerate(campaigns):
+        valid = ~np.isnan(rops[i])
+        per_campaign[name] = {
+            "ebitda_uplift": _distribution(uplift[i]),
+            "rops":          _distribution(rops[i]),
+            "p_rops_below":  _probability(rops[i] < rops_lo, valid),
+            "p_rops_above":  _probability(rops[i] > rops_hi, valid),
+        }
+        if not valid.any():
+            per_campaign[name]["rops_note"] = "no incentive cost input; ROPS bounds not checked"
+    valid = ~np.isnan(accretion)
+    return _clean({
+        "draws":          draws,
+        "ranges":         ranges,
+        "campaigns":      per_campaign,
+        "total_uplift":   _distribution(uplift.sum(axis=0)),
+        "accretion_pct":  _distribution(accretion),
+        "p_accretion_below": _probability(accretion < acc_lo, valid),
+        "p_accretion_above": _probability(accretion > acc_hi, valid),
+        "bounds": {"total_pct": [acc_lo, acc_hi], "rops_per_campaign": [rops_lo, rops_hi]},
+    })
+
+
+# ---------------------------------------------------------------------------
+# Loading assumptions from a model + template config
+# ---------------------------------------------------------------------------
+def _campaign_mechanics(config):
+    """Map 'Campaign 1' -> (mechanic, title) from campaign_mechanic_map keys like 'Campaign 1 - Title'."""
+    out = {}
+    for full_name, info in (config.get("campaign_mechanic_map") or {}).items():
+        short, _, title = full_name.partition(" - ")
+        out[short.strip()] = (info.get("mechanic"), title.strip())
+    return out
+
+
+def _first_number(values, row):
+    nums = [values.get(f"{c}{row}") for c in ("C", "D", "E")]
+    nums = [n for n in nums if isinstance(n, (int, float)) and not isinstance(n, bool)]
+    return nums[0] if nums else None
+
+
+def _economics_for(title, economics):
+    """Value of the campaign_economics_rows label naming *title* ('Cost Per Beverage Upsell')."""
+    title = title.lower()
+    for label, value in economics.items():
+        if title and title in label.lower():
+            return label, value
+    return None, None
+
+
+_SECTION_HEADER = re.compile(r'=?"?(Campaign [^:"]+):')
+
+
+def _section_rows(label_rows, name):
+    """{label: row} of the column-B labels under the '<name>: ...' scenario assumptions header."""
+    out, inside = {}, False
+    for row, text in sorted(label_rows.items()):
+        header = _SECTION_HEADER.match(text)
+        if header:
+            inside = header.group(1).strip() == name
+        elif inside:
+            out.setdefault(text, row)
+    return out
+
+
+def load_model_inputs(model_path, config):
+    """Read company basics, campaign economics and C/D/E scenario assumptions from a model.
+
+    Rows are matched by their column-B labels (assumptions within their
+    campaign's "Campaign N: ..." section); the config's row numbers are the
+    fallback. Uses cached values, so run after excel_editor's recalc.
+    Returns (company, campaigns, notes).
+    """
+    from xlsx_patch import XlsxPatcher
+    values = XlsxPatcher(model_path).cell_values("Inputs")
+    cols = config.get("scenarios") or ["C", "D", "E"]
+
+    company, notes = {}, []
+    label_rows = {int(ref[1:]): str(v).strip() for ref, v in values.items()
+                  if re.fullmatch(r"B\d+", ref) and isinstance(v, str)}
+    labels = {label: f"B{row}" for row, label in sorted(label_rows.items(), reverse=True)}
+    for label, key in COMPANY_LABELS.items():
+        ref = labels.get(label)
+        if ref:
+            value = _first_number(values, ref[1:])
+            if value is not None:
+                company[key] = value
+
+    economics = {}
+    for label, row in (config.get("campaign_economics_rows") or {}).items():
+        row = labels[label][1:] if label in labels else row
+        value = _first_number(values, row)
+        if value is not None:
+            economics[label] = value
+        else:
+            notes.append(f"{label} (row {row}) is not numeric")
+
+    mechanics = _campaign_mechanics(config)
+    campaigns = {}
+    for name, rows in (config.get("scenario_assumptions") or {}).items():
+        mechanic, title = mechanics.get(name, (None, ""))
+        if mechanic not in MECHANICS:
+            notes.append(f"{name}: no supported mechanic ({mechanic}); skipped")
+            continue
+        assumptions, section = {}, _section_rows(label_rows, name)
+        for label, row in rows.items():
+            if label == "header_row":
+                continue
+            row = section.get(label, row)
+            cells = [values.get(f"{c}{row}") for c in cols]
+            if all(isinstance(v, (int, float)) for v in cells):
+                assumptions[_key(label)] = cells
+            else:
+                notes.append(f"{name}: {label} (row {row}) is not numeric in {'/'.join(cols)}")
+        label, cost = _economics_for(title, economics)
+        if cost is not None and mechanic in ECONOMICS_KEYS:
+            assumptions[ECONOMICS_KEYS[mechanic]] = cost
+            if mechanic == "revenue_uplift" and company.get("aov") is None:
+                notes.append(f"{name}: incentive from {label}; upsells = revenue gain / "
+                             f"average order value (revenue / stores / orders per day / 365)")
+        campaigns[name] = {"mechanic": mechanic, "assumptions": assumptions}
+    return company, campaigns, notes
+
+
+def _parse_range(text):
+    """'0.01:0.05:5' -> linspace; '0.01,0.02,0.03' -> explicit values."""
+    if ":" in text:
+        lo, hi, n = text.split(":")
+        return np.linspace(float(lo), float(hi), int(n))
+    return np.array([float(x) for x in text.split(",")])
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vectorized scenario and sensitivity engine")
+    parser.add_argument("--file", help="Model .xlsx to read assumptions from")
+    parser.add_argument("--config", help="template_config.json for the model")
+    parser.add_argument("--assumptions",
+                        help='JSON file: {"company": {...}, "campaigns": {name: {"mechanic", "assumptions"}}}')
+    parser.add_argument("--revenue", type=float, help="Override annual revenue")
+    parser.add_argument("--employees", type=float, help="Override total employees")
+    parser.add_argument("--ebitda", type=float, help="Override annual EBITDA")
+    parser.add_argument("--no-rounding", action="store_true",
+                        help="Evaluate raw assumptions without Jolly rounding")
+    parser.add_argument("--grid", nargs=5, metavar=("CAMPAIGN", "ROW_KEY", "ROW_RANGE", "COL_KEY", "COL_RANGE"),
+                        help="Sensitivity grid; ranges are lo:hi:n or comma lists")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="Base",
+                        help="Scenario other campaigns are held at for --grid")
+    parser.add_argument("--formatted", action="store_true",
+                        help="Add deck-formatted strings ($8.4MM, 17x, 12.5%%) to the output")
+    parser.add_argument("--simulate", type=int, metavar="N",
+                        help="Monte Carlo mode: number of draws (e.g. 100000)")
+    parser.add_argument("--vertical", help="vertical_benchmarks.json key used to widen --simulate ranges")
+    parser.add_argument("--benchmarks", help="Path to vertical_benchmarks.json (default: workspace copy)")
+    parser.add_argument("--seed", type=int, help="Random seed for --simulate")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for --simulate")
+    args = parser.parse_args()
+
+    if np is None:
+        print(json.dumps({"error": "numpy not installed. Run: python -m pip install numpy"}))
+        sys.exit(1)
+
+    notes = []
+    if args.assumptions:
+        with open(args.assumptions, encoding="utf-8") as f:
+            data = json.load(f)
+        company, campaigns = data.get("company", {}), data["campaigns"]
+    elif args.file and args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+        company, campaigns, notes = load_model_inputs(args.file, config)
+    else:
+        print("ERROR: pass --assumptions, or --file with --config", file=sys.stderr)
+        sys.exit(1)
+    if not campaigns:
+        print(json.dumps({"error": "no campaigns to evaluate (config has no scenario_assumptions?)",
+                          "notes": notes}))
+        sys.exit(1)
+
+    for key, value in (("revenue", args.revenue), ("employees", args.employees),
+                       ("annual_ebitda", args.ebitda)):
+        if value is not None:
+            company[key] = value
+    missing = [k for k in ("revenue", "employees") if company.get(k) is None]
+    if missing or (company.get("annual_ebitda") is None and company.get("ebitda_margin") is None):
+        print(json.dumps({"error": "missing company inputs", "missing": missing or ["annual_ebitda"],
+                          "notes": notes}))
+        sys.exit(1)
+
+    try:
+        if args.simulate:
+            import time
+            t0 = time.perf_counter()
+            benchmarks = load_benchmarks(args.vertical, args.benchmarks) if args.vertical else None
+            out = simulate(company, campaigns, draws=args.simulate, seed=args.seed,
+                           benchmarks=benchmarks, workers=args.workers)
+            out["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        elif args.grid:
+            name, row_key, row_range, col_key, col_range = args.grid
+            grid = sensitivity_grid(company, campaigns, name,
+                                    (row_key, _parse_range(row_range)),
+                                    (col_key, _parse_range(col_range)),
+                                    scenario=SCENARIOS.index(args.scenario))
+            out = _clean(grid)
+            if args.formatted:
+                out["formatted"] = format_result(grid)
+        else:
+            result = evaluate(company, campaigns, rounding=not args.no_rounding)
+            out = summarize(result, formatted=args.formatted)
+            notes += rops_gaps(result)
+        if args.simulate:
+            notes += rops_gaps(evaluate(company, campaigns, rounding=False))
+    except KeyError as e:
+        print(json.dumps({"error": str(e).strip("'\""), "notes": notes}))
+        sys.exit(1)
+    if notes:
+        out["notes"] = notes
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,19 @@ sec_filings.py - Pull financial data for a public company via EdgarTools
 Usage:
   python .claude/scripts/sec_filings.py --ticker WING
   python .claude/scripts/sec_filings.py --ticker WING --output .claude/data/sec_WING.json
+  python .claude/scripts/sec_filings.py --ticker WING --offline     # cache only, no network
+  python .claude/scripts/sec_filings.py --cache-stats
+  python .claude/scripts/sec_filings.py --ingest-facts companyfacts.zip --tickers-json company_tickers.json
+  python .claude/scripts/sec_filings.py --facts-query WING              # offline, from the bulk store
+  python .claude/scripts/sec_filings.py --company "Jack in the Box"   # name -> ticker, offline
+  python .claude/scripts/sec_filings.py --resolve "wing stop"
+  python .claude/scripts/sec_filings.py --build-company-index company_tickers_exchange.json
+  python .claude/scripts/sec_filings.py --index-text                  # index cached 10-Ks for search
+  python .claude/scripts/sec_filings.py --search-text employees --ticker WING --section business
+  python .claude/scripts/sec_filings.py --bench-parse               # time parsing of cached statements
+  python .claude/scripts/sec_filings.py --check-rate-limit          # verify 10 req/s against a local stub server
+  python .claude/scripts/sec_filings.py --tickers WING JACK SHAK --output-dir .claude/data/sec
+  python .claude/scripts/sec_filings.py --tickers-file comps.txt --workers 6   # NDJSON on stdout
 
 Output: JSON with revenue, operating income, net income across last 4 filings,
         plus growth trend and EBITDA margin estimate.
@@ -12,32 +25,53 @@ Requires: pip install edgartools
 SEC_IDENTITY must be set in .claude/.env  (e.g.  SEC_IDENTITY=you@company.com)
 
 API strategy (per edgartools docs — Choosing the Right API):
+  0. local companyfacts store  — bulk companyfacts.zip ingested with
+                                 --ingest-facts; no network (companyfacts_store.py)
   1. company.get_facts()     — fastest, cached, for summary metrics
   2. company.get_financials() — multi-period standardized statements
   3. Per-filing fallback      — filing.obj().financials.income_statement()
+
+Every EDGAR response (company lookup, facts, filing index, statements, 10-K
+text/HTML) goes through the on-disk EdgarCache (.claude/cache/edgar.sqlite,
+per-kind TTLs — see edgar_cache.py), so a repeat lookup of the same ticker
+is served locally. --refresh re-fetches; --no-cache bypasses it.
+
+Multi-ticker mode pulls tickers (and each ticker's filings) concurrently.
+Every HTTP request edgartools sends (not every logical call, which may send
+several) waits on one shared token bucket capped at SEC's 10 requests/second,
+and throttled (429) or transient failures are retried with exponential
+backoff.
 """
 import sys
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
 import argparse
 import json
-import os
+import random
+import sqlite3
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+from company_resolver import MIN_CONFIDENT_SCORE, default_index, resolve_company
+from companyfacts_store import default_store
+from edgar_cache import DEFAULT_TTLS, CacheMiss, EdgarCache
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 def get_identity():
-    ws = Path(os.environ.get('JOLLY_WORKSPACE', '.')).resolve()
-    env_path = ws / '.claude' / '.env'
-    if env_path.exists():
-        for line in env_path.read_text(encoding='utf-8').splitlines():
-            if line.startswith('SEC_IDENTITY='):
-                return line.split('=', 1)[1].strip()
-    return os.environ.get('SEC_IDENTITY', 'research@company.com')
+    from workspace import settings
+    return settings.env('SEC_IDENTITY', 'research@company.com')
+
+
+def export_edgar_env():
+    """Export .claude/.env into os.environ; edgartools reads EDGAR_* settings from it at import."""
+    from workspace import settings
+    settings.export_env()
 
 
 def safe_pct(a, b):
@@ -63,8 +97,17 @@ def safe_int(val):
         return None
 
 
-def extract_from_facts(company):
-    """Use Company Facts API (fastest, cached) for summary metrics."""
+def extract_from_facts(company, store=None):
+    """
+    Summary metrics from company facts: the local bulk store when it holds
+    the company (see companyfacts_store.py), else the Company Facts API.
+    """
+    store = store or default_store()
+    cik = getattr(company, 'cik', None)
+    if store is not None and cik:
+        summary = store.summary(int(cik))
+        if summary:
+            return summary, None
     try:
         facts = company.get_facts()
         return {
@@ -104,13 +147,18 @@ def extract_from_filing(filing):
         return None, f'filing parse error: {e}'
 
 
-# Key XBRL concepts for the per-filing fallback approach
+# Key XBRL concepts for the per-filing fallback approach. A tuple lists
+# fallbacks in priority order: the first concept present in the statement
+# wins (ASC 606 filers report RevenueFromContract... instead of Revenues).
 KEY_CONCEPTS = {
-    'revenue':          'us-gaap_Revenues',
+    'revenue':          ('us-gaap_Revenues',
+                         'us-gaap_RevenueFromContractWithCustomerExcludingAssessedTax',
+                         'us-gaap_RevenueFromContractWithCustomerIncludingAssessedTax',
+                         'us-gaap_SalesRevenueNet'),
     'operating_income': 'us-gaap_OperatingIncomeLoss',
-    'net_income':       'us-gaap_NetIncomeLoss',
+    'net_income':       ('us-gaap_NetIncomeLoss', 'us-gaap_ProfitLoss'),
     'gross_profit':     'us-gaap_GrossProfit',
-    'cost_of_revenue':  'us-gaap_CostOfRevenue',
+    'cost_of_revenue':  ('us-gaap_CostOfRevenue', 'us-gaap_CostOfGoodsAndServicesSold'),
     'sga':              'us-gaap_SellingGeneralAndAdministrativeExpense',
 }
 
@@ -120,67 +168,465 @@ METADATA_COLS = {
     'dimension_member_label', 'dimension_label', 'balance', 'weight',
     'preferred_sign', 'parent_concept', 'parent_abstract_concept',
 }
+FLAG_COLS = ('abstract', 'dimension', 'is_breakdown')
 
 
-def parse_df_to_financials(df):
-    """Extract key financials from a statement DataFrame."""
+def _candidates(concepts):
+    """{key: (concept, ...)} with single concepts wrapped in a tuple."""
+    return {key: (c,) if isinstance(c, str) else tuple(c) for key, c in concepts.items()}
+
+
+def parse_df_to_financials(df, concepts=None):
+    """
+    Extract key financials from a statement DataFrame.
+
+    Returns {key: {period column: int or None}} for each key in *concepts*
+    (default KEY_CONCEPTS) found in the statement. One mask picks the
+    top-level rows of every candidate concept, the matching rows are taken
+    in a single selection, and the period block is converted to integers
+    in one vectorized pass (NaN and non-numeric cells -> None). Fallback
+    concepts cost no extra passes.
+    """
+    import numpy as np
+    import pandas as pd
+
+    candidates = _candidates(KEY_CONCEPTS if concepts is None else concepts)
     period_cols = [c for c in df.columns if c not in METADATA_COLS]
+    all_concepts = list(dict.fromkeys(c for options in candidates.values() for c in options))
+
+    # One mask: top-level, non-segmented rows (NaN flags are not False) of a wanted concept
+    concept_col = df['concept'] if 'concept' in df.columns else df.index.to_series(index=df.index)
+    mask = concept_col.isin(all_concepts).to_numpy()
+    flags = [c for c in FLAG_COLS if c in df.columns]
+    if flags:
+        mask = mask & (df[flags] == False).all(axis=1).to_numpy()  # noqa: E712
+    first = {}                                                 # first row per concept
+    for concept, pos in zip(concept_col.to_numpy()[mask], np.flatnonzero(mask)):
+        first.setdefault(concept, pos)
+    if not first:
+        return {}
 
-    # Top-level, non-segmented rows only
+    # All period columns at once: float matrix, NaN/non-numeric -> None, truncate like int()
+    order = [c for c in all_concepts if c in first]
+    block = df.iloc[[first[c] for c in order]][period_cols]
+    if not all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in block.dtypes):
+        block = block.apply(pd.to_numeric, errors='coerce')
+    values = np.trunc(block.to_numpy(dtype=float, na_value=np.nan))
+    missing = np.isnan(values)
+    by_concept = {
+        concept: [None if miss else int(v) for v, miss in zip(values[i], missing[i])]
+        for i, concept in enumerate(order)
+    }
+
+    result = {}
+    for key, options in candidates.items():
+        concept = next((c for c in options if c in by_concept), None)
+        if concept is not None:
+            result[key] = dict(zip(period_cols, by_concept[concept]))
+    return result
+
+
+def _parse_df_per_concept(df, concepts=None):
+    """Row-by-row reference parser (one filter and safe_int loop per concept); used by --bench-parse."""
+    candidates = _candidates(KEY_CONCEPTS if concepts is None else concepts)
+    period_cols = [c for c in df.columns if c not in METADATA_COLS]
     mask = True
-    for col in ['abstract', 'dimension', 'is_breakdown']:
+    for col in FLAG_COLS:
         if col in df.columns:
-            mask = mask & (df[col] == False)
+            mask = mask & (df[col] == False)  # noqa: E712
     clean = df[mask] if not isinstance(mask, bool) else df
 
     result = {}
-    for key, concept in KEY_CONCEPTS.items():
-        row = clean[clean['concept'] == concept] if 'concept' in clean.columns else clean[clean.index == concept]
-        if not row.empty:
-            result[key] = {
-                col: safe_int(row.iloc[0][col])
-                for col in period_cols
-            }
-
+    for key, options in candidates.items():
+        for concept in options:
+            row = clean[clean['concept'] == concept] if 'concept' in clean.columns else clean[clean.index == concept]
+            if not row.empty:
+                result[key] = {col: safe_int(row.iloc[0][col]) for col in period_cols}
+                break
     return result
 
 
+def bench_parse(frames, runs=20):
+    """
+    Time parse_df_to_financials against the per-concept reference on
+    recorded statement frames and check both give identical results.
+    """
+    import statistics
+
+    def median_ms(fn):
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            for df in frames:
+                fn(df)
+            samples.append((time.perf_counter() - t0) * 1000)
+        return round(statistics.median(samples), 3)
+
+    mismatches = [i for i, df in enumerate(frames)
+                  if parse_df_to_financials(df) != _parse_df_per_concept(df)]
+    vectorized, reference = median_ms(parse_df_to_financials), median_ms(_parse_df_per_concept)
+    return {
+        'frames':          len(frames),
+        'runs':            runs,
+        'vectorized_ms':   vectorized,
+        'per_concept_ms':  reference,
+        'speedup':         round(reference / vectorized, 2) if vectorized else None,
+        'mismatches':      mismatches,
+    }
+
+
 # ---------------------------------------------------------------------------
-# Main
+# Rate limiting (SEC fair-access policy: at most 10 requests per second)
 # ---------------------------------------------------------------------------
 
-def main():
-    parser = argparse.ArgumentParser(description='Pull SEC financials via EdgarTools')
-    parser.add_argument('--ticker', required=True, help='Stock ticker (e.g. WING)')
-    parser.add_argument('--output', help='Write JSON output to this file path')
-    parser.add_argument('--include-text', action='store_true',
-                        help='Extract MD&A and business section text from most recent 10-K')
-    parser.add_argument('--save-pdf', action='store_true',
-                        help='Save most recent 10-K as HTML for human reference (requires --output)')
-    args = parser.parse_args()
+SEC_MAX_RPS = 10
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5     # seconds; doubles per attempt, plus jitter
+RETRY_STATUS = {429, 500, 502, 503, 504}
+ARRIVAL_JITTER = 0.02      # seconds; --check-rate-limit window slack
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: *rate* tokens per second, bursts up to *capacity*.
+
+    The default capacity of 1 spaces calls 1/rate apart, and the bucket
+    starts with at most one token, so no window of one second ever sees
+    more than *rate* calls, not even the first.
+    """
+
+    def __init__(self, rate=SEC_MAX_RPS, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity or 1)
+        self._tokens = min(1.0, self.capacity)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _EdgarRequestLimiter:
+    """pyrate_limiter-style face of a TokenBucket for edgartools' HTTP transport."""
 
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def try_acquire(self, name=None, weight=1):
+        for _ in range(max(1, int(weight))):
+            self.bucket.acquire()
+        return True
+
+    async def try_acquire_async(self, name=None, weight=1):
+        import asyncio
+        await asyncio.to_thread(self.try_acquire, name, weight)   # sleep off the event loop
+        return True
+
+
+_http_bucket = None
+_http_bucket_lock = threading.Lock()
+
+
+def install_http_limiter(bucket):
+    """
+    Make *bucket* edgartools' per-HTTP-request rate limiter. Returns True
+    when installed (False: edgartools missing or without HTTP_MGR).
+
+    edgartools sends every request through one httpx client whose transport
+    takes a limiter token per request, below its response cache, so one
+    logical call (Company(), get_filings(), filing.obj(), ...) pays one
+    token per request it actually sends and cached responses pay nothing.
+    """
+    global _http_bucket
+    export_edgar_env()
     try:
-        from edgar import Company, set_identity
-    except ImportError:
-        print(json.dumps({'error': 'edgartools not installed. Run: python -m pip install edgartools'}))
-        sys.exit(1)
+        from edgar import httpclient
+        mgr = httpclient.HTTP_MGR
+    except (ImportError, AttributeError):
+        return False
+    with _http_bucket_lock:
+        if _http_bucket is not bucket:
+            mgr.rate_limiter = _EdgarRequestLimiter(bucket)
+            mgr.rate_limiter_enabled = True
+            if getattr(mgr, '_client', None) is not None:   # transport holds the old limiter
+                mgr._client.close()
+                mgr._client = None
+            _http_bucket = bucket
+    return True
+
 
+def check_rate_limit(requests=40, rate=SEC_MAX_RPS, threads=8):
+    """
+    Send *requests* GETs from *threads* threads through edgartools' HTTP
+    client, limited by a fresh TokenBucket(*rate*), to a stub HTTP server on
+    127.0.0.1 that records when each request arrives. Reports the most
+    requests seen in any one-second window (less ARRIVAL_JITTER: requests
+    sent exactly 1/rate apart arrive a few ms early or late) and the
+    smallest gap between arrivals; ok when the peak is <= *rate*.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    if not install_http_limiter(TokenBucket(rate)):
+        raise ImportError('edgartools not installed. Run: pip install edgartools')
+    from edgar import set_identity
+    from edgar.httpclient import http_client
     set_identity(get_identity())
 
-    # --- Look up company ---
+    arrivals = []
+
+    class Stub(BaseHTTPRequestHandler):
+        def do_GET(self):
+            arrivals.append(time.monotonic())
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/check'
+    t0 = time.monotonic()
     try:
-        company = Company(args.ticker.upper())
-    except Exception as e:
-        print(json.dumps({'error': f'Company not found for ticker {args.ticker}: {e}', 'is_public': False}))
-        sys.exit(0)
+        with http_client() as client, ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(lambda i: client.get(f'{url}/{i}').status_code, range(requests)))
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.monotonic() - t0
 
-    if not company:
-        print(json.dumps({'error': f'No EDGAR record for ticker {args.ticker}', 'is_public': False}))
-        sys.exit(0)
+    arrivals.sort()
+    peak, lo = 0, 0
+    for hi, stamp in enumerate(arrivals):
+        while stamp - arrivals[lo] >= 1.0 - ARRIVAL_JITTER:
+            lo += 1
+        peak = max(peak, hi - lo + 1)
+    return {
+        'requests':          len(arrivals),
+        'failed':            sum(status != 200 for status in statuses),
+        'rate':              rate,
+        'threads':           threads,
+        'max_in_any_second': peak,
+        'min_gap_ms':        round(min(map(float.__sub__, arrivals[1:], arrivals), default=0) * 1000, 1),
+        'seconds':           round(elapsed, 3),
+        'ok':                peak <= rate and len(arrivals) == requests,
+    }
+
+
+def is_retryable(exc):
+    """True for throttling (429), 5xx and connection/timeout errors."""
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(exc, 'status_code', None)
+    if status is not None:
+        return status in RETRY_STATUS
+    name = type(exc).__name__.lower()
+    text = str(exc).lower()
+    return (any(k in name for k in ('timeout', 'connect', 'remoteprotocol'))
+            or '429' in text or 'too many requests' in text)
+
+
+def call_with_retry(fn, limiter=None, attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY):
+    """
+    Call *fn*, retrying retryable errors with exponential backoff. *limiter*
+    (if any) is taken once per attempt; EdgarSource passes one only when the
+    per-request limiter cannot be installed.
+    """
+    for attempt in range(attempts):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            time.sleep(base_delay * 2 ** attempt + random.uniform(0, base_delay))
+
+
+# ---------------------------------------------------------------------------
+# Cached EDGAR access
+# ---------------------------------------------------------------------------
+
+class CompanyNotFound(LookupError):
+    pass
+
+
+def _unwrap(result):
+    """(value, error) from the extract_* helpers -> value, raising on error."""
+    value, err = result
+    if err:
+        raise RuntimeError(err)
+    return value
+
+
+def _accession(filing):
+    return getattr(filing, 'accession_no', None) or getattr(filing, 'accession_number', None)
+
+
+class EdgarSource:
+    """
+    Lazily-connected EdgarTools company, fronted by an EdgarCache.
+
+    Nothing is imported or requested from EDGAR until a cache miss needs it,
+    so a fully cached ticker runs without edgartools or network access.
+    A *limiter* (TokenBucket) is installed as edgartools' per-HTTP-request
+    limiter on the first cache miss (see install_http_limiter); one limiter
+    can be shared by many sources across threads. Cache misses are retried
+    with backoff on throttling / transient errors.
+    """
+
+    def __init__(self, ticker, cache, limiter=None):
+        self.ticker = ticker.upper()
+        self.cache = cache
+        self.limiter = limiter
+        self._call_limiter = None     # per-call fallback when per-request limiting is unavailable
+        self._limiter_ready = limiter is None
+        self._company = None
+        self._filings = {}    # accession -> edgartools Filing
+        self._lock = threading.Lock()
+
+    @property
+    def company(self):
+        with self._lock:
+            if self._company is None:
+                export_edgar_env()
+                try:
+                    from edgar import Company, set_identity
+                except ImportError:
+                    raise ImportError('edgartools not installed. Run: python -m pip install edgartools')
+                set_identity(get_identity())
+                known = resolve_company(self.ticker)
+                # A known CIK skips edgartools' remote ticker lookup
+                ident = known['cik'] if known and known['match'] == 'ticker' else self.ticker
+                try:
+                    company = call_with_retry(lambda: Company(ident), self._request_limiter())
+                except Exception as e:
+                    raise CompanyNotFound(f'Company not found for ticker {self.ticker}: {e}')
+                if not company:
+                    raise CompanyNotFound(f'No EDGAR record for ticker {self.ticker}')
+                self._company = company
+        return self._company
+
+    def _request_limiter(self):
+        """Install self.limiter per HTTP request; the per-call fallback (or None) to pass on."""
+        if not self._limiter_ready:
+            if not install_http_limiter(self.limiter):
+                self._call_limiter = self.limiter
+            self._limiter_ready = True
+        return self._call_limiter
+
+    def _cached(self, kind, key, loader):
+        remote = lambda: call_with_retry(loader, self._request_limiter())
+        return self.cache.fetch(kind, key, remote) if key else remote()
+
+    def info(self):
+        """{'cik', 'name'} for the ticker (from the local company index when it knows the ticker)."""
+        known = resolve_company(self.ticker)
+        if known and known['match'] == 'ticker':
+            return {'cik': str(known['cik']), 'name': known['name']}
+        return self._cached('company', self.ticker, lambda: {
+            'cik': str(getattr(self.company, 'cik', '') or ''),
+            'name': self.company.name,
+        })
+
+    def facts(self, cik):
+        store = default_store()
+        if store is not None and cik:
+            summary = store.summary(int(cik))    # bulk store: no EDGAR round trip at all
+            if summary:
+                return summary
+        return self._cached('facts', cik, lambda: _unwrap(extract_from_facts(self.company, store)))
+
+    def filing_index(self, cik):
+        """Latest 10-K and three 10-Qs as [{form, period, filed, filing_url, accession}]."""
+        def load():
+            annual = self.company.get_filings(form='10-K').latest(1)
+            quarters = self.company.get_filings(form='10-Q').latest(3)
+            index = []
+            for filing, form_type in [(annual, '10-K')] + [(q, '10-Q') for q in quarters]:
+                accession = _accession(filing)
+                if accession:
+                    self._filings[accession] = filing
+                index.append({
+                    'form':       form_type,
+                    'period':     str(getattr(filing, 'period_of_report', 'unknown')),
+                    'filed':      str(getattr(filing, 'filing_date', 'unknown')),
+                    'filing_url': getattr(filing, 'filing_url', None),
+                    'accession':  accession,
+                })
+            return index
+        return self._cached('filings', cik, load)
+
+    def filing(self, meta):
+        """edgartools Filing for an index entry (re-listed from EDGAR if needed)."""
+        accession = meta.get('accession')
+        if accession not in self._filings:
+            for filing in self.company.get_filings(form=meta['form']):
+                if _accession(filing) == accession:
+                    self._filings[accession] = filing
+                    break
+            else:
+                raise LookupError(f"filing {accession} not found for {self.ticker}")
+        return self._filings[accession]
+
+    def statement(self, meta):
+        """Income statement DataFrame for a filing."""
+        return self._cached('statement', meta.get('accession'),
+                            lambda: _unwrap(extract_from_filing(self.filing(meta))))
+
+    def filing_text(self, meta):
+        """MD&A and business sections of a 10-K (first 8,000 chars each)."""
+        def load():
+            report = self.filing(meta).obj()
+            # edgartools TenK exposes section text as attributes
+            return {
+                'mda':      str(getattr(report, 'mda',      None) or '')[:8000],
+                'business': str(getattr(report, 'business', None) or '')[:8000],
+            }
+        return self._cached('text', meta.get('accession'), load)
+
+    def filing_html(self, meta):
+        def load():
+            html = self.filing(meta).html()
+            if not html:
+                raise ValueError('filing.html() returned empty content')
+            return html
+        return self._cached('html', meta.get('accession'), load)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def pull_financials(ticker, cache, include_text=False, html_dir=None, limiter=None, filing_workers=1):
+    """
+    Build the sec_filings JSON output for one ticker.
+
+    Statements of the ticker's filings are fetched on up to *filing_workers*
+    threads (all sharing *limiter*, default a fresh SEC_MAX_RPS bucket).
+
+    Raises ImportError (edgartools missing), CompanyNotFound, or CacheMiss
+    (offline and the company itself is not cached).
+    """
+    source = EdgarSource(ticker, cache, limiter or TokenBucket())
+    info = source.info()
+    cik = info.get('cik')
 
     output = {
-        'ticker':         args.ticker.upper(),
-        'company_name':   company.name,
+        'ticker':         source.ticker,
+        'company_name':   info['name'],
         'is_public':      True,
         'retrieved_at':   datetime.today().strftime('%Y-%m-%d'),
         'filings':        [],
@@ -191,37 +637,50 @@ def main():
     }
 
     # --- Approach 1: Company Facts API (fastest, cached) ---
-    facts_data, facts_err = extract_from_facts(company)
-    if facts_err:
-        output['notes'].append(f'Facts API: {facts_err}')
-    else:
-        output['facts_summary'] = facts_data
+    try:
+        output['facts_summary'] = source.facts(cik)
+    except ImportError:
+        raise
+    except Exception as e:
+        output['notes'].append(f'Facts API: {e}')
 
     # --- Approach 2: Get filing metadata for per-filing details ---
     revenues_by_period = {}
     try:
-        annual_filing = company.get_filings(form='10-K').latest(1)
-        quarters      = company.get_filings(form='10-Q').latest(3)
-        all_filings   = [(annual_filing, '10-K')] + [(q, '10-Q') for q in quarters]
+        all_filings = source.filing_index(cik)
+    except ImportError:
+        raise
     except Exception as e:
         output['notes'].append(f'Could not retrieve filings: {e}')
         all_filings = []
 
-    for filing, form_type in all_filings:
-        period   = str(getattr(filing, 'period_of_report', 'unknown'))
-        filed_on = str(getattr(filing, 'filing_date',       'unknown'))
+    def load_statement(meta):
+        try:
+            return source.statement(meta), None
+        except ImportError:
+            raise
+        except Exception as e:
+            return None, str(e)
+
+    if filing_workers > 1 and len(all_filings) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=filing_workers) as pool:
+            statements = list(pool.map(load_statement, all_filings))
+    else:
+        statements = [load_statement(meta) for meta in all_filings]
 
+    for meta, (df, err) in zip(all_filings, statements):
+        form_type, period = meta['form'], meta['period']
         entry = {
             'form':          form_type,
             'period':        period,
-            'filed':         filed_on,
-            'filing_url':    getattr(filing, 'filing_url', None),
+            'filed':         meta['filed'],
+            'filing_url':    meta['filing_url'],
             'financials':    {},
             'parse_error':   None,
         }
 
-        # Use per-filing extraction with modern API
-        df, err = extract_from_filing(filing)
+        # Per-filing extraction with modern API (loaded above)
         if err:
             entry['parse_error'] = err
             output['notes'].append(f'{form_type} {period}: {err}')
@@ -299,41 +758,336 @@ def main():
     ])
 
     # --- Optional: extract filing text (MD&A + business) for unit/employee count ---
-    if args.include_text and all_filings:
-        annual_filing = next((f for f, ft in all_filings if ft == '10-K'), None)
-        if annual_filing:
+    annual = next((m for m in all_filings if m['form'] == '10-K'), None)
+    if include_text and all_filings:
+        if annual:
             try:
-                report = annual_filing.obj()
-                # edgartools TenK exposes section text as attributes
-                mda      = str(getattr(report, 'mda',      None) or '')[:8000]
-                business = str(getattr(report, 'business', None) or '')[:8000]
-                output['filing_text'] = {'mda': mda, 'business': business}
+                output['filing_text'] = source.filing_text(annual)
+            except ImportError:
+                raise
             except Exception as e:
                 output['filing_text'] = {'error': str(e)}
         else:
             output['filing_text'] = {'error': 'no 10-K in filing list'}
 
     # --- Optional: save 10-K filing as HTML for human reference ---
-    if args.save_pdf and all_filings:
-        if not args.output:
-            output['notes'].append('--save-pdf ignored: requires --output to determine save directory.')
-        else:
-            annual = next((f for f, ft in all_filings if ft == '10-K'), None)
-            if annual:
-                out_dir  = Path(args.output).parent
-                ticker   = args.ticker.upper()
-                period   = str(getattr(annual, 'period_of_report', 'unknown'))
-                html_path = out_dir / f"10K_{ticker}_{period}.html"
-                try:
-                    html = annual.html()
-                    if not html:
-                        raise ValueError('filing.html() returned empty content')
-                    html_path.write_text(html, encoding='utf-8')
-                    output['filing_save'] = {'html': str(html_path)}
-                except Exception as e:
-                    output['filing_save'] = {'error': str(e)}
+    if html_dir is not None and all_filings:
+        if annual:
+            html_path = Path(html_dir) / f"10K_{source.ticker}_{annual['period']}.html"
+            try:
+                html_path.write_text(source.filing_html(annual), encoding='utf-8')
+                output['filing_save'] = {'html': str(html_path)}
+            except ImportError:
+                raise
+            except Exception as e:
+                output['filing_save'] = {'error': str(e)}
             else:
-                output['filing_save'] = {'error': 'no 10-K in filing list'}
+                try:  # searchable with --search-text; best-effort
+                    from filing_search import FilingSearch
+                    FilingSearch().index_file(html_path, source.ticker, annual['period'], annual.get('accession'))
+                    output['filing_save']['indexed'] = True
+                except (OSError, sqlite3.Error) as e:
+                    output['notes'].append(f'Filing text index: {e}')
+        else:
+            output['filing_save'] = {'error': 'no 10-K in filing list'}
+
+    return output
+
+
+def _error_record(ticker, exc):
+    """JSON record for a ticker that could not be pulled."""
+    record = {'ticker': ticker.upper(), 'error': str(exc)}
+    if isinstance(exc, CompanyNotFound):
+        record['is_public'] = False
+    elif isinstance(exc, CacheMiss):
+        record['offline'] = True
+    return record
+
+
+def pull_many(tickers, cache, workers=4, max_rps=SEC_MAX_RPS, **kwargs):
+    """
+    Pull several tickers concurrently; yield one output record per ticker as
+    each finishes (completion order, not input order).
+
+    All threads share one token bucket capped at *max_rps* (never above
+    SEC's 10 requests/second). Filings within a ticker are fetched in
+    parallel too. Failures yield an error record instead of raising.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    limiter = TokenBucket(min(max_rps, SEC_MAX_RPS))
+    kwargs.setdefault('filing_workers', 4)
+
+    def pull(ticker):
+        try:
+            return pull_financials(ticker, cache, limiter=limiter, **kwargs)
+        except Exception as e:
+            return _error_record(ticker, e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(pull, t) for t in tickers]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def read_tickers(values=None, path=None):
+    """Tickers from a comma/space separated list and/or a file (one per line, # comments)."""
+    tickers = []
+    for value in values or []:
+        tickers += value.replace(',', ' ').split()
+    if path:
+        for line in Path(path).read_text(encoding='utf-8').splitlines():
+            line = line.split('#', 1)[0].strip()
+            if line:
+                tickers += line.replace(',', ' ').split()
+    seen = set()
+    return [t.upper() for t in tickers if not (t.upper() in seen or seen.add(t.upper()))]
+
+
+def main_many(args, cache):
+    """--tickers / --tickers-file: stream one JSON line per ticker (NDJSON)."""
+    tickers = read_tickers(args.tickers, args.tickers_file)
+    out_dir = Path(args.output_dir) if args.output_dir else None
+    if out_dir:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    html_dir = out_dir if args.save_pdf else None
+
+    failed = 0
+    for record in pull_many(tickers, cache, workers=args.workers, max_rps=args.max_rps,
+                            include_text=args.include_text, html_dir=html_dir):
+        if 'error' in record:
+            failed += 1
+        elif out_dir:
+            out_path = out_dir / f"sec_{record['ticker']}.json"
+            record['saved_to'] = str(out_path)
+            out_path.write_text(json.dumps(record, indent=2), encoding='utf-8')
+        print(json.dumps(record), flush=True)
+    print(json.dumps({'done': len(tickers), 'failed': failed, 'cache': cache.counters}), flush=True)
+
+
+def index_cached_filings(cache, search, force=False):
+    """
+    Index every 10-K HTML held in the EDGAR cache. Ticker and period come
+    from the cached company and filing-index entries. Returns {indexed, skipped}.
+    """
+    tickers = {str(v.get('cik')): k for k, v in cache.items('company') if isinstance(v, dict)}
+    filings = {}
+    for cik, index in cache.items('filings'):
+        for meta in index or []:
+            if meta.get('accession'):
+                filings[meta['accession']] = (tickers.get(str(cik)), meta.get('period'))
+    indexed, skipped = [], 0
+    for accession, html in cache.items('html'):
+        ticker, period = filings.get(accession, (None, None))
+        chunks = search.index_text(f'edgar:{accession}', html, ticker, period, accession, force)
+        if chunks is None:
+            skipped += 1
+        else:
+            indexed.append({'ticker': ticker, 'period': period, 'accession': accession, 'chunks': chunks})
+    return {'indexed': indexed, 'skipped': skipped}
+
+
+def main_resolve(args):
+    """--build-company-index / --resolve."""
+    from company_resolver import CompanyIndex, default_index
+    if args.build_company_index:
+        index = CompanyIndex.build(args.build_company_index)
+        print(json.dumps({'companies': len(index.records), 'names': len(index.names),
+                          'source': index.source}, indent=2))
+        return
+    index = default_index()
+    if index is None:
+        print(json.dumps({'error': 'no company index. Build it with --build-company-index '
+                                   'company_tickers_exchange.json (from sec.gov/files/)'}))
+        sys.exit(1)
+    print(json.dumps({'query': args.resolve, 'stale': index.stale,
+                      'matches': index.search(args.resolve)}, indent=2))
+
+
+def main_search(args, cache):
+    """--index-text / --search-text."""
+    from filing_search import FilingSearch
+    search = FilingSearch(args.search_index)
+    if args.index_text is not None:
+        if args.index_text:
+            indexed, skipped = [], 0
+            for target in map(Path, args.index_text):
+                files = sorted(target.glob('*.htm*')) if target.is_dir() else [target]
+                for f in files:
+                    chunks = search.index_file(f, ticker=args.ticker, force=args.refresh)
+                    if chunks is None:
+                        skipped += 1
+                    else:
+                        indexed.append({'file': str(f), 'chunks': chunks})
+            result = {'indexed': indexed, 'skipped': skipped}
+        else:
+            result = index_cached_filings(cache, search, force=args.refresh)
+        result['index'] = str(search.path)
+        print(json.dumps(result, indent=2))
+        return
+    hits = search.search(args.search_text, ticker=args.ticker, section=args.section, limit=args.limit)
+    print(json.dumps({'query': args.search_text, 'results': hits}, indent=2, ensure_ascii=False))
+
+
+def main_facts(args):
+    """--ingest-facts / --facts-query."""
+    from companyfacts_store import INGEST_CONCEPTS, FactsStore, ingest
+    if args.ingest_facts:
+        stats = ingest(args.ingest_facts, path=args.facts_store, tickers_json=args.tickers_json,
+                       concepts=None if args.all_concepts else INGEST_CONCEPTS)
+        print(json.dumps(stats, indent=2))
+        return
+    store = FactsStore(args.facts_store)
+    if not store.exists():
+        print(json.dumps({'error': f'no company facts store at {store.path}. Run --ingest-facts first.'}))
+        sys.exit(1)
+    company = store.company(args.facts_query)
+    if company is None:
+        print(json.dumps({'error': f'{args.facts_query} not in the company facts store'}))
+        sys.exit(1)
+    if args.concept:
+        company['facts'] = store.facts(company['cik'], args.concept, annual=True)
+    else:
+        company['summary'] = store.summary(company['cik'])
+    print(json.dumps(company, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pull SEC financials via EdgarTools')
+    parser.add_argument('--ticker', help='Stock ticker (e.g. WING)')
+    parser.add_argument('--company', help='Company name, resolved to a ticker via the local company index')
+    parser.add_argument('--output', help='Write JSON output to this file path')
+    parser.add_argument('--include-text', action='store_true',
+                        help='Extract MD&A and business section text from most recent 10-K')
+    parser.add_argument('--save-pdf', action='store_true',
+                        help='Save most recent 10-K as HTML for human reference (requires --output)')
+    batch = parser.add_argument_group('multi-ticker (NDJSON output, one line per ticker)')
+    batch.add_argument('--tickers', nargs='+', help='Tickers, space or comma separated')
+    batch.add_argument('--tickers-file', help='File with one ticker per line (# comments allowed)')
+    batch.add_argument('--output-dir', help='Also write sec_<TICKER>.json per ticker here')
+    batch.add_argument('--workers', type=int, default=4, help='Tickers pulled concurrently (default: 4)')
+    batch.add_argument('--max-rps', type=float, default=SEC_MAX_RPS,
+                       help=f'Request rate cap, at most {SEC_MAX_RPS}/s (default: {SEC_MAX_RPS})')
+    cache_group = parser.add_argument_group('cache')
+    cache_group.add_argument('--offline', action='store_true', default=None,
+                             help='Serve from the local EDGAR cache only (no network); also SEC_OFFLINE=1')
+    cache_group.add_argument('--refresh', action='store_true',
+                             help='Ignore cached entries and re-fetch (results are still cached)')
+    cache_group.add_argument('--no-cache', action='store_true', help='Do not read or write the cache')
+    cache_group.add_argument('--cache', help='Cache file (default: <workspace>/.claude/cache/edgar.sqlite)')
+    cache_group.add_argument('--cache-stats', action='store_true', help='Print cache statistics and exit')
+    bulk = parser.add_argument_group('bulk company facts (offline store from SEC companyfacts.zip)')
+    bulk.add_argument('--ingest-facts', metavar='ZIP', help='Load a local companyfacts.zip into the store and exit')
+    bulk.add_argument('--tickers-json', help='SEC company_tickers.json, to index tickers during --ingest-facts')
+    bulk.add_argument('--all-concepts', action='store_true',
+                      help='Ingest every concept, not just the summary set (much larger store)')
+    bulk.add_argument('--facts-query', metavar='TICKER_OR_CIK', help='Print the stored summary for a company and exit')
+    bulk.add_argument('--concept', help='With --facts-query: list annual facts for this concept instead')
+    bulk.add_argument('--facts-store', help='Store file (default: <workspace>/.claude/cache/companyfacts.sqlite)')
+    text = parser.add_argument_group('filing text search (SQLite FTS5 over saved 10-Ks)')
+    text.add_argument('--index-text', nargs='*', metavar='PATH',
+                      help='Index 10-K HTML files/folders (default: every 10-K in the EDGAR cache) and exit')
+    text.add_argument('--search-text', metavar='QUERY',
+                      help='Ranked snippets + numbers near keywords, e.g. "employees" (filter with --ticker)')
+    text.add_argument('--section', help='With --search-text: business, risk_factors, mda, properties, ...')
+    text.add_argument('--limit', type=int, default=10, help='With --search-text: max results (default: 10)')
+    text.add_argument('--search-index', help='Index file (default: <workspace>/.claude/cache/filing_search.sqlite)')
+    names = parser.add_argument_group('company index (offline ticker/name -> CIK)')
+    names.add_argument('--build-company-index', metavar='JSON',
+                       help="Build the index from SEC's company_tickers.json or company_tickers_exchange.json and exit")
+    names.add_argument('--resolve', metavar='QUERY', help='Print ranked ticker/CIK matches for a ticker or name and exit')
+    parser.add_argument('--bench-parse', nargs='*', metavar='PICKLE',
+                        help='Benchmark statement parsing on pickled DataFrames '
+                             '(default: every statement recorded in the EDGAR cache) and exit')
+    parser.add_argument('--runs', type=int, default=20, help='Runs for --bench-parse (default: 20)')
+    parser.add_argument('--check-rate-limit', nargs='?', type=int, const=40, metavar='N',
+                        help='Send N requests (default: 40) through the rate-limited edgartools client '
+                             'to a local stub server, report the peak requests per second, and exit')
+    args = parser.parse_args()
+
+    ttls = {kind: 0 for kind in DEFAULT_TTLS} if args.refresh else None
+    cache = EdgarCache(path=args.cache, offline=args.offline, ttls=ttls, enabled=not args.no_cache)
+
+    if args.cache_stats:
+        print(json.dumps(cache.stats(), indent=2))
+        return
+    if args.build_company_index or args.resolve:
+        return main_resolve(args)
+    if args.company and not args.ticker:
+        match = resolve_company(args.company)
+        if match is None:
+            print(json.dumps({'company': args.company, 'error': 'not found in the company index '
+                              '(private, or build it with --build-company-index)', 'is_public': False}))
+            sys.exit(1)
+        if match['match'] in ('prefix', 'fuzzy') and match['score'] < MIN_CONFIDENT_SCORE:
+            # A weak name match may be an unrelated public company: ask, don't pull
+            print(json.dumps({'company': args.company,
+                              'error': 'no confident match in the company index; '
+                                       'rerun with --ticker if one of the candidates is right',
+                              'candidates': default_index().search(args.company)}, indent=2))
+            sys.exit(1)
+        args.ticker = match['ticker']
+        args.resolved = match
+    if args.index_text is not None or args.search_text:
+        return main_search(args, cache)
+    if args.ingest_facts or args.facts_query:
+        return main_facts(args)
+    if args.bench_parse is not None:
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            print(json.dumps({'error': 'pandas not installed. Run: pip install edgartools'}))
+            sys.exit(1)
+        if args.bench_parse:
+            import pickle
+            frames = [pickle.loads(Path(p).read_bytes()) for p in args.bench_parse]
+        else:
+            frames = [df for _, df in cache.items('statement') if df is not None]
+        if not frames:
+            print(json.dumps({'error': 'no statement frames to benchmark (cache is empty)'}))
+            sys.exit(1)
+        print(json.dumps(bench_parse(frames, args.runs), indent=2))
+        return
+    if not 0 < args.max_rps <= SEC_MAX_RPS:
+        parser.error(f'--max-rps must be between 0 and {SEC_MAX_RPS}')
+    if args.check_rate_limit is not None:
+        try:
+            report = check_rate_limit(args.check_rate_limit, args.max_rps, max(1, args.workers) * 2)
+        except ImportError as e:
+            print(json.dumps({'error': str(e)}))
+            sys.exit(1)
+        print(json.dumps(report, indent=2))
+        if not report['ok']:
+            sys.exit(1)
+        return
+    if args.tickers or args.tickers_file:
+        return main_many(args, cache)
+    if not args.ticker:
+        parser.error('--ticker or --company is required (unless --tickers/--tickers-file or --cache-stats)')
+
+    html_dir = None
+    if args.save_pdf and args.output:
+        html_dir = Path(args.output).parent
+
+    try:
+        output = pull_financials(args.ticker, cache, include_text=args.include_text, html_dir=html_dir)
+    except ImportError as e:
+        print(json.dumps({'error': str(e)}))
+        sys.exit(1)
+    except CompanyNotFound as e:
+        print(json.dumps({'error': str(e), 'is_public': False}))
+        sys.exit(0)
+    except CacheMiss as e:
+        print(json.dumps({'error': str(e), 'offline': True}))
+        sys.exit(1)
+
+    if args.save_pdf and not args.output and output['filings']:
+        output['notes'].append('--save-pdf ignored: requires --output to determine save directory.')
+    if getattr(args, 'resolved', None):
+        output['resolved_from'] = {'company': args.company, **args.resolved}
+        if args.resolved['match'] in ('prefix', 'fuzzy'):
+            output['notes'].append(f"'{args.company}' matched {args.ticker} by {args.resolved['match']} name "
+                                   f"(score {args.resolved['score']}) — confirm it is the right company.")
+    output['cache'] = cache.counters
 
     if args.output:
         out_path = Path(args.output)
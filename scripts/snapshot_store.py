@@ -0,0 +1,189 @@
+"""
+Snapshot Store
+==============
+Content-addressed undo history for Jolly intro model writes.
+
+Before each write, excel_editor records the pre-write bytes of every zip
+member the write is about to change. Member contents are stored once per
+unique SHA-256 (zlib-compressed) under:
+
+    <model folder>/.snapshots/objects/ab/abcdef....z
+    <model folder>/.snapshots/<model filename>.json    (snapshot log)
+
+so a snapshot costs only the bytes of parts not already in the store.
+Restoring rewrites just the affected members back into the .xlsx, and every
+restore is itself snapshotted, so it can be undone too.
+
+Usage (via excel_editor.py):
+    python excel_editor.py --file model.xlsx --action list-snapshots
+    python excel_editor.py --file model.xlsx --action restore --to 3
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from xlsx_patch import rewrite_members
+
+SNAPSHOT_DIRNAME = ".snapshots"
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class SnapshotStore:
+    """Per-model snapshot log backed by a per-folder object store."""
+
+    def __init__(self, model_path, root=None):
+        self.model_path = Path(model_path)
+        self.root = Path(root) if root else self.model_path.parent / SNAPSHOT_DIRNAME
+        self.log_path = self.root / f"{self.model_path.name}.json"
+
+    # -- objects -----------------------------------------------------------
+    def _object_path(self, digest):
+        return self.root / "objects" / digest[:2] / f"{digest}.z"
+
+    def _put(self, data):
+        """Store *data* once; return (digest, bytes_added)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, 0
+        blob = zlib.compress(data, 6)
+        _atomic_write(path, blob)
+        return digest, len(blob)
+
+    def _get(self, digest):
+        path = self._object_path(digest)
+        if not path.exists():
+            raise FileNotFoundError(f"Snapshot object missing: {path}")
+        return zlib.decompress(path.read_bytes())
+
+    # -- log ---------------------------------------------------------------
+    def _load_log(self):
+        if not self.log_path.exists():
+            return {"model": self.model_path.name, "snapshots": []}
+        return json.loads(self.log_path.read_text(encoding="utf-8"))
+
+    def _save_log(self, log):
+        _atomic_write(self.log_path, json.dumps(log, indent=2).encode("utf-8"))
+
+    # -- public API --------------------------------------------------------
+    def record(self, members, action, note=None, full=False):
+        """Record the pre-write state of *members* and return the snapshot id.
+
+        *members* maps zip member name -> current bytes, or -> None for a
+        member that does not exist yet. *full* marks a snapshot holding every
+        member of the archive (used when the whole file is rewritten).
+        """
+        parts, added, size = {}, 0, 0
+        for name, data in members.items():
+            if data is None:
+                parts[name] = None
+                continue
+            digest, n = self._put(data)
+            parts[name] = digest
+            added += n
+            size += len(data)
+        log = self._load_log()
+        snap_id = (log["snapshots"][-1]["id"] + 1) if log["snapshots"] else 1
+        log["snapshots"].append({
+            "id":          snap_id,
+            "created":     datetime.now().isoformat(timespec="seconds"),
+            "action":      action,
+            "note":        note,
+            "full":        full,
+            "parts":       parts,
+            "part_bytes":  size,
+            "bytes_added": added,
+        })
+        self._save_log(log)
+        return snap_id
+
+    def record_from_file(self, names, action, note=None):
+        """Snapshot the current contents of *names* from the model file.
+
+        Pass names=None to snapshot every member (a full snapshot).
+        """
+        if not self.model_path.exists():
+            return None
+        with zipfile.ZipFile(self.model_path) as z:
+            existing = set(z.namelist())
+            full = names is None
+            wanted = existing if full else set(names)
+            members = {n: (z.read(n) if n in existing else None) for n in sorted(wanted)}
+        return self.record(members, action, note=note, full=full)
+
+    def list(self):
+        """Return a summary of every snapshot, oldest first."""
+        return [
+            {
+                "id":          s["id"],
+                "created":     s["created"],
+                "action":      s["action"],
+                "note":        s.get("note"),
+                "full":        s.get("full", False),
+                "parts":       sorted(s["parts"]),
+                "part_bytes":  s.get("part_bytes"),
+                "bytes_added": s.get("bytes_added"),
+            }
+            for s in self._load_log()["snapshots"]
+        ]
+
+    def restore(self, to):
+        """Roll the model back to the state captured by snapshot *to*.
+
+        Undoes snapshot *to* and every later write. The current state of the
+        affected members is snapshotted first, so the restore can be undone.
+        Returns a result dict.
+        """
+        snapshots = [s for s in self._load_log()["snapshots"] if s["id"] >= to]
+        if not snapshots or snapshots[0]["id"] != to:
+            raise ValueError(f"No snapshot with id {to}")
+
+        # Walk newest -> oldest so the earliest pre-write state of each part wins
+        target, full = {}, False
+        for snap in reversed(snapshots):
+            if snap.get("full"):
+                target, full = dict(snap["parts"]), True
+            else:
+                target.update(snap["parts"])
+
+        # Only touch members whose content actually differs from the target
+        with zipfile.ZipFile(self.model_path) as z:
+            current = {
+                name: hashlib.sha256(z.read(name)).hexdigest()
+                for name in z.namelist() if full or name in target
+            }
+        if full:
+            for name in set(current) - set(target):
+                target[name] = None
+        affected = sorted(
+            name for name, digest in target.items()
+            if current.get(name) != digest
+        )
+
+        undo_id = self.record_from_file(affected, "restore", note=f"before restore to {to}")
+        replacements = {
+            name: (self._get(target[name]) if target[name] is not None else None)
+            for name in affected
+        }
+        rewrite_members(self.model_path, replacements)
+        return {
+            "restored_to":    to,
+            "parts_restored": affected,
+            "undo_snapshot":  undo_id,
+        }
@@ -0,0 +1,303 @@
+"""
+Template Registry
+=================
+Compiled, validated view of every template config in a templates directory.
+
+All `*.json` configs are loaded once, checked against CONFIG_SCHEMA and
+compiled into entries with the normalized label set and structure hashes
+precomputed. The compiled registry is pickled under
+
+    <workspace>/.claude/cache/template_registry/<dir-hash>.pickle
+
+and keyed by each config's (mtime, size), so resolving a template at deck
+start is one cache read; only added, removed or edited configs are
+re-parsed. Invalid configs are reported with their schema errors and left
+out of every lookup.
+
+Usage:
+    python template_registry.py --dir .claude/agents/templates --validate
+    python template_registry.py --dir .claude/agents/templates --vertical Manufacturing
+    python template_registry.py --dir .claude/agents/templates --hash 00f9a0afa91a7747
+    python template_registry.py --dir .claude/agents/templates --stats
+
+    from template_registry import TemplateRegistry
+    registry = TemplateRegistry(templates_dir)
+    registry.get("qsr_standard.json")["config"]
+    registry.by_vertical("Healthcare")      # [entry, ...]
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+from pathlib import Path
+
+REGISTRY_VERSION = 1
+
+_COLUMN_RE = re.compile(r"^[A-Z]{1,3}$")
+
+
+def _row(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+# key -> (required, check, expected form). Other keys are allowed unchecked.
+CONFIG_SCHEMA = {
+    "template_type":  (True,  lambda v: isinstance(v, str) and v.strip(), "non-empty string"),
+    "labels":         (True,  lambda v: isinstance(v, dict) and v
+                                        and all(isinstance(k, str) and _row(r) for k, r in v.items()),
+                       "non-empty {label: positive row number}"),
+    "scenarios":      (True,  lambda v: isinstance(v, list)
+                                        and all(isinstance(c, str) and _COLUMN_RE.match(c) for c in v),
+                       "list of column letters"),
+    "description":    (False, lambda v: isinstance(v, str), "string"),
+    "vertical":       (False, lambda v: isinstance(v, str) and v.strip(), "non-empty string"),
+    "structure_hash": (False, lambda v: isinstance(v, str) and re.fullmatch(r"[0-9a-f]{8,64}", v),
+                       "hex string"),
+    "last_updated":   (False, lambda v: isinstance(v, str), "ISO date string"),
+    "notes":          (False, lambda v: isinstance(v, list), "list"),
+    "formula_counts": (False, lambda v: isinstance(v, dict) and all(_count(n) for n in v.values()),
+                       "{sheet: non-negative count}"),
+    "campaigns":      (False, lambda v: isinstance(v, dict), "object"),
+}
+
+
+class ConfigSchemaError(ValueError):
+    """A template config does not match CONFIG_SCHEMA."""
+
+    def __init__(self, name, errors):
+        self.name = name
+        self.errors = errors
+        super().__init__(f"{name}: " + "; ".join(errors))
+
+
+def validate_config(config):
+    """Return a list of schema errors for a parsed config ([] if valid)."""
+    if not isinstance(config, dict):
+        return ["config must be a JSON object"]
+    errors = []
+    for key, (required, check, expected) in CONFIG_SCHEMA.items():
+        if key not in config:
+            if required:
+                errors.append(f"missing '{key}'")
+        elif not check(config[key]):
+            errors.append(f"'{key}' must be {expected}")
+    return errors
+
+
+def normalize_label(label):
+    """Lowercase and collapse whitespace so equivalent labels compare equal."""
+    return " ".join(str(label).lower().split())
+
+
+def structure_hash(labels, template_type):
+    """Hash of a template's label set and type (same as TemplateScanner's)."""
+    label_str = "|".join(sorted(labels))
+    return hashlib.md5(f"{template_type}:{label_str}".encode()).hexdigest()[:16]
+
+
+def default_cache_dir():
+    from workspace import settings
+    return settings.cache_dir / "template_registry"
+
+
+def _compile(path, stamp):
+    """Parse and validate one config file into a registry entry."""
+    try:
+        config = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        return {"name": path.name, "stamp": stamp, "errors": [f"unreadable JSON: {e}"]}
+    errors = validate_config(config)
+    entry = {"name": path.name, "stamp": stamp, "errors": errors}
+    if errors:
+        return entry
+    template_type = config["template_type"]
+    entry.update({
+        "config":           config,
+        "template_type":    template_type,
+        "vertical":         config.get("vertical") or template_type,
+        "normalized_labels": frozenset(normalize_label(k) for k in config["labels"]),
+        "structure_hash":   config.get("structure_hash"),
+        "computed_hash":    structure_hash(config["labels"], template_type),
+    })
+    return entry
+
+
+class TemplateRegistry:
+    """Validated template configs for one directory, backed by a pickle cache."""
+
+    def __init__(self, templates_dir, cache_dir=None):
+        self.templates_dir = Path(templates_dir)
+        cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        key = hashlib.sha1(str(self.templates_dir.resolve()).encode()).hexdigest()[:16]
+        self.cache_path = cache_dir / f"{key}.pickle"
+        self._entries = None     # name -> entry
+        self._stamp = None
+        self.cache_hit = False
+
+    # -- loading -------------------------------------------------------------
+    def _scan(self):
+        """(name, mtime_ns, size) for every config, sorted by name."""
+        stamps = []
+        try:
+            with os.scandir(self.templates_dir) as it:
+                for e in it:
+                    if e.name.endswith(".json") and e.is_file():
+                        st = e.stat()
+                        stamps.append((e.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+        return tuple(sorted(stamps))
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != REGISTRY_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def _write_cache(self, entries):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"version": REGISTRY_VERSION, "entries": entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass  # cache is best-effort
+
+    def load(self, force=False):
+        """Return {name: entry}, re-compiling only configs whose (mtime, size) changed."""
+        stamp = self._scan()
+        if self._entries is not None and stamp == self._stamp and not force:
+            return self._entries
+
+        cached = {} if force else (self._entries or self._read_cache())
+        entries, changed = {}, force
+        for name, mtime_ns, size in stamp:
+            entry = cached.get(name)
+            if entry is None or entry["stamp"] != (mtime_ns, size):
+                entry = _compile(self.templates_dir / name, (mtime_ns, size))
+                changed = True
+            entries[name] = entry
+        changed |= set(cached) != set(entries)
+        if changed:
+            self._write_cache(entries)
+        self.cache_hit = not changed
+        self._entries, self._stamp = entries, stamp
+        return entries
+
+    @property
+    def stamp(self):
+        """Directory signature of the loaded configs (changes when any config does)."""
+        self.load()
+        return self._stamp
+
+    # -- lookups -------------------------------------------------------------
+    def entries(self):
+        """Valid entries, sorted by name."""
+        return [e for _, e in sorted(self.load().items()) if not e["errors"]]
+
+    def errors(self):
+        """{config name: [schema errors]} for every invalid config."""
+        return {name: e["errors"] for name, e in sorted(self.load().items()) if e["errors"]}
+
+    def get(self, name):
+        """Entry for a config filename; raises FileNotFoundError or ConfigSchemaError."""
+        name = Path(name).name  # strip any directory traversal
+        entry = self.load().get(name)
+        if entry is None:
+            raise FileNotFoundError(f"Config not found: {name}")
+        if entry["errors"]:
+            raise ConfigSchemaError(name, entry["errors"])
+        return entry
+
+    def labels(self):
+        """{config name: labels dict} for every valid config."""
+        return {e["name"]: e["config"]["labels"] for e in self.entries()}
+
+    def by_vertical(self, vertical):
+        v = vertical.strip().lower()
+        return [e for e in self.entries() if e["vertical"].lower() == v]
+
+    def by_template_type(self, template_type):
+        t = template_type.strip().lower()
+        return [e for e in self.entries() if e["template_type"].lower() == t]
+
+    def by_hash(self, value):
+        """Entries whose stored or computed structure hash equals *value*."""
+        return [e for e in self.entries() if value in (e["structure_hash"], e["computed_hash"])]
+
+    def stats(self):
+        entries = self.load()
+        valid = [e for e in entries.values() if not e["errors"]]
+        return {
+            "templates_dir": str(self.templates_dir),
+            "cache_path":    str(self.cache_path),
+            "cache_hit":     self.cache_hit,
+            "configs":       len(entries),
+            "valid":         len(valid),
+            "invalid":       len(entries) - len(valid),
+            "verticals":     sorted({e["vertical"] for e in valid}),
+            "template_types": sorted({e["template_type"] for e in valid}),
+        }
+
+
+def _summary(entry):
+    return {
+        "name":           entry["name"],
+        "template_type":  entry["template_type"],
+        "vertical":       entry["vertical"],
+        "labels":         len(entry["normalized_labels"]),
+        "structure_hash": entry["structure_hash"],
+        "computed_hash":  entry["computed_hash"],
+    }
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Validate and query template configs")
+    parser.add_argument("--dir", required=True, help="Templates directory (e.g. .claude/agents/templates)")
+    parser.add_argument("--cache-dir", help="Cache directory (default: <workspace>/.claude/cache/template_registry)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--validate", action="store_true", help="Report schema errors (exit 1 if any)")
+    group.add_argument("--vertical", help="List configs for a vertical")
+    group.add_argument("--type", dest="template_type", help="List configs for a template_type")
+    group.add_argument("--hash", help="List configs with this structure hash")
+    group.add_argument("--stats", action="store_true", help="Registry and cache statistics (default)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and recompile every config")
+    args = parser.parse_args()
+
+    registry = TemplateRegistry(args.dir, cache_dir=args.cache_dir)
+    registry.load(force=args.rebuild)
+
+    if args.validate:
+        errors = registry.errors()
+        print(json.dumps({"valid": len(registry.entries()), "errors": errors}, indent=2))
+        if errors:
+            sys.exit(1)
+    elif args.vertical or args.template_type or args.hash:
+        if args.vertical:
+            found = registry.by_vertical(args.vertical)
+        elif args.template_type:
+            found = registry.by_template_type(args.template_type)
+        else:
+            found = registry.by_hash(args.hash)
+        print(json.dumps([_summary(e) for e in found], indent=2))
+    else:
+        print(json.dumps(registry.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
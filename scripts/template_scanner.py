@@ -5,12 +5,272 @@ Detects Excel template structure and compares against existing configs.
 Finds matching configs for templates or creates new ones for custom templates.
 """
 
+import hashlib
 import json
+import os
+import re
+import sys
+import tempfile
+from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from openpyxl import load_workbook
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 
+from template_registry import TemplateRegistry, normalize_label, structure_hash
+from xlsx_patch import XlsxPatcher, split_ref
+
+SCAN_SHEETS = ("Inputs", "Campaigns", "Sensitivities")
+LABEL_COL = 2             # column B holds row labels
+LABEL_MAX_ROW = {"Inputs": 100}
+_SCENARIO_RE = re.compile(r"base|upside|downside", re.I)
+
+LABEL_MATCH_RATIO = 0.8   # per-label fuzzy match cutoff
+SHORTLIST_SIZE = 8        # candidate labels always scored per template label
+MIN_DICE = 0.4            # ...plus any label with at least this trigram overlap
+
+
+def _trigrams(text: str) -> set:
+    """Character trigrams of a normalized label, padded so short labels still index."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _col_letters(n: int) -> str:
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+class LabelIndex:
+    """
+    Trigram inverted index over the labels of every config.
+
+    Labels are normalized and de-duplicated across configs, so each distinct
+    label is indexed once no matter how many configs share it. A query label
+    collects trigram hits, keeps the labels with the highest trigram overlap,
+    and only those pairs get a SequenceMatcher ratio (computed exactly only
+    when its cheap upper bound reaches LABEL_MATCH_RATIO).
+    Cost grows with the number of labels, not labels x configs.
+    """
+
+    def __init__(self, configs: Dict[str, Dict[str, int]]):
+        """
+        Args:
+            configs: {config_filename: labels dict} as stored in the configs
+        """
+        self.labels: List[str] = []                 # label id -> normalized label
+        self.owners: List[set] = []                 # label id -> config names
+        self.grams: List[int] = []                  # label id -> trigram count
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.config_sizes: Dict[str, int] = {}
+        self._ids: Dict[str, int] = {}
+        self._ratios: Dict[Tuple[str, str], float] = {}
+
+        for name, labels in configs.items():
+            self.config_sizes[name] = len(labels)
+            for label in labels:
+                self._add(normalize_label(label), name)
+
+    def _add(self, label: str, config_name: str):
+        label_id = self._ids.get(label)
+        if label_id is None:
+            label_id = self._ids[label] = len(self.labels)
+            grams = _trigrams(label)
+            self.labels.append(label)
+            self.owners.append(set())
+            self.grams.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(label_id)
+        self.owners[label_id].add(config_name)
+
+    def _ratio(self, a: str, b: str) -> float:
+        key = (a, b)
+        if key not in self._ratios:
+            if a == b:
+                ratio = 1.0
+            else:
+                sm = SequenceMatcher(None, a, b)
+                ratio = sm.quick_ratio()   # upper bound; exact only if it could match
+                if ratio >= LABEL_MATCH_RATIO:
+                    ratio = sm.ratio()
+            self._ratios[key] = ratio
+        return self._ratios[key]
+
+    def shortlist(self, label: str, k: int = SHORTLIST_SIZE) -> List[int]:
+        """
+        Candidate label ids for *label*, best trigram overlap (Dice) first.
+
+        Keeps the top k plus every label whose overlap is >= MIN_DICE, so a
+        crowd of near-identical labels cannot push a real match out.
+        """
+        grams = _trigrams(label)
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for label_id in self.postings.get(gram, ()):
+                hits[label_id] += 1
+        n = len(grams)
+        dice = {i: 2 * h / (n + self.grams[i]) for i, h in hits.items()}
+        ranked = sorted(dice, key=dice.get, reverse=True)
+        return [i for pos, i in enumerate(ranked) if pos < k or dice[i] >= MIN_DICE]
+
+    def match(self, label: str, k: int = SHORTLIST_SIZE) -> Dict[str, float]:
+        """
+        Best ratio per config for one label, over the shortlist only.
+
+        Pairs are skipped once every config owning the candidate already has
+        a match, or when SequenceMatcher's cheap upper bounds rule them out.
+        """
+        label = normalize_label(label)
+        best: Dict[str, float] = {}
+        for label_id in self.shortlist(label, k):
+            owners = self.owners[label_id]
+            if all(best.get(name, 0.0) >= LABEL_MATCH_RATIO for name in owners):
+                continue
+            ratio = self._ratio(label, self.labels[label_id])
+            for name in owners:
+                if ratio > best.get(name, 0.0):
+                    best[name] = ratio
+        return best
+
+    def rank(self, template_labels, k: int = SHORTLIST_SIZE) -> List[Tuple[str, float]]:
+        """
+        Score every config against *template_labels*.
+
+        Score = share of template labels whose best ratio against the
+        config's labels is >= LABEL_MATCH_RATIO (same rule as
+        TemplateScanner._compare_templates). Returns [(config, score)] sorted
+        best first; configs with no labels are omitted.
+        """
+        labels = list(template_labels)
+        if not labels:
+            return []
+        matched: Dict[str, int] = defaultdict(int)
+        for label in labels:
+            for name, ratio in self.match(label, k).items():
+                if ratio >= LABEL_MATCH_RATIO:
+                    matched[name] += 1
+        ranked = [(name, matched.get(name, 0) / len(labels))
+                  for name, size in self.config_sizes.items() if size]
+        # Ties go to the config whose label count is closest to the template's
+        ranked.sort(key=lambda item: (-item[1], abs(self.config_sizes[item[0]] - len(labels)), item[0]))
+        return ranked
+
+
+# MinHash / LSH parameters: 16 bands x 4 rows puts the LSH candidate
+# threshold near Jaccard 0.5 (probability a pair shares a band at J=0.5 ~ 0.65)
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+NEAR_DUPLICATE_JACCARD = 0.7
+_MERSENNE_61 = (1 << 61) - 1
+
+
+def structural_features(labels, sheets: Optional[Dict] = None, formula_counts: Optional[Dict] = None) -> set:
+    """
+    Feature set for MinHash: normalized labels, plus formula layout per sheet.
+
+    *sheets* is a scan_template()/config "sheets" dict (formula_digest,
+    formula_count); *formula_counts* covers configs that only record counts.
+    """
+    features = {"L:" + normalize_label(label) for label in labels}
+    counts = dict(formula_counts or {})
+    for name, sig in (sheets or {}).items():
+        if sig.get("formula_digest"):
+            features.add(f"F:{name}:{sig['formula_digest']}")
+        if sig.get("formula_count") is not None:
+            counts.setdefault(name, sig["formula_count"])
+    features.update(f"N:{name}:{n}" for name, n in counts.items())
+    return features
+
+
+class MinHashIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures of templates.
+
+    Each template's structural_features() set is reduced to a
+    MINHASH_PERMUTATIONS-value signature; signatures are split into
+    LSH_BANDS bands and bucketed by band. A query only compares against
+    templates sharing at least one bucket, so lookups stay sub-linear as
+    the library grows. Similarity is the estimated Jaccard index (share of
+    equal signature values).
+    """
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, bands: int = LSH_BANDS, seed: int = 1):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        import random
+        rng = random.Random(seed)
+        self.rows = permutations // bands
+        self.bands = bands
+        self._perms = [(rng.randrange(1, _MERSENNE_61), rng.randrange(0, _MERSENNE_61))
+                       for _ in range(permutations)]
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [defaultdict(set) for _ in range(bands)]
+
+    def signature(self, features) -> Tuple[int, ...]:
+        """MinHash signature of a feature set (empty set -> all max values)."""
+        hashes = [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big")
+                  for f in features]
+        if not hashes:
+            return tuple([_MERSENNE_61] * len(self._perms))
+        return tuple(min((a * h + b) % _MERSENNE_61 for h in hashes) for a, b in self._perms)
+
+    def _bands(self, sig):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r] for i in range(self.bands)]
+
+    def add(self, name: str, features=None, signature=None) -> Tuple[int, ...]:
+        """Index a template by its features (or a precomputed signature); returns the signature."""
+        sig = signature if signature is not None else self.signature(features)
+        self.signatures[name] = sig
+        for bucket, band in zip(self._buckets, self._bands(sig)):
+            bucket[band].add(name)
+        return sig
+
+    @staticmethod
+    def similarity(a, b) -> float:
+        """Estimated Jaccard index of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def query(self, features=None, signature=None, min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Templates sharing an LSH bucket with *features* (or a precomputed
+        *signature*), as [(name, estimated_jaccard)] best first.
+        """
+        sig = signature if signature is not None else self.signature(features)
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._bands(sig)):
+            candidates |= bucket.get(band, set())
+        scored = [(name, self.similarity(sig, self.signatures[name])) for name in candidates]
+        scored = [(n, round(j, 3)) for n, j in scored if j >= min_similarity]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+    def clusters(self, min_similarity: float = NEAR_DUPLICATE_JACCARD) -> List[List[str]]:
+        """
+        Groups of templates connected by near-duplicate pairs (union-find over
+        LSH candidate pairs with estimated Jaccard >= *min_similarity*).
+        Singletons are omitted.
+        """
+        parent = {name: name for name in self.signatures}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for name, sig in self.signatures.items():
+            for other, _ in self.query(signature=sig, min_similarity=min_similarity):
+                if other != name:
+                    parent[find(other)] = find(name)
+        groups = defaultdict(list)
+        for name in self.signatures:
+            groups[find(name)].append(name)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g))
+
 
 class TemplateScanner:
     """Scans Excel templates to extract structure and match against configs"""
@@ -28,49 +288,111 @@ class TemplateScanner:
 
         self.templates_dir = templates_dir
         self.templates_dir.mkdir(exist_ok=True)
+        self.registry = TemplateRegistry(self.templates_dir)
+        self._label_index = None
+        self._label_index_key = None
+        self._minhash_index = None
+        self._minhash_key = None
+        self._minhash_sigs = {}   # (config name, file stamp) -> signature
 
     def scan_template(self, excel_path: str) -> Dict:
         """
         Scan an Excel template and extract its structure.
 
+        Reads only the workbook map, shared strings and the SCAN_SHEETS
+        worksheet parts straight from the zip (no openpyxl load), one pass
+        per sheet.
+
         Returns:
             {
                 "file_path": str,
                 "template_type": "QSR" | "Manufacturing" | "Custom",
-                "labels": {field: row_number, ...},
+                "labels": {field: row_number, ...},      (Inputs, column B, rows 1-100)
                 "scenarios": ["C", "D", "E"],
-                "structure_hash": str (for comparison)
+                "structure_hash": str (for comparison),
+                "sheets": {sheet: signature, ...},       (see _sheet_signature)
+                "formula_counts": {sheet: count, ...}    (Campaigns/Sensitivities)
             }
         """
-        wb = load_workbook(excel_path)
-        ws = wb["Inputs"]
+        patcher = XlsxPatcher(excel_path)
+        sheets = {name: self._sheet_signature(patcher, name, LABEL_MAX_ROW.get(name))
+                  for name in SCAN_SHEETS if name in patcher.sheetnames}
+        if "Inputs" not in sheets:
+            raise KeyError(f"'Inputs' sheet not found in {excel_path}")
 
-        # Extract all labels from column B
-        labels = {}
-        for row in ws.iter_rows(min_row=1, max_row=100, min_col=2, max_col=2):
-            cell = row[0]
-            if cell.value and isinstance(cell.value, str):
-                labels[cell.value.strip()] = cell.row
+        # Labels from column B, rows 1-100 (formula labels keep their '=' text)
+        labels = sheets["Inputs"]["labels"]
 
         # Detect template type
         template_type = self._detect_template_type(labels)
 
         # Detect scenario columns
-        scenarios = self._detect_scenarios(ws)
+        scenarios = self._detect_scenarios(sheets["Inputs"]["scenario_headers"])
 
         # Create structure hash for comparison
         structure_hash = self._create_structure_hash(labels, template_type)
 
-        result = {
+        return {
             "file_path": str(excel_path),
             "template_type": template_type,
             "labels": labels,
             "scenarios": scenarios,
             "structure_hash": structure_hash,
+            "sheets": sheets,
+            "formula_counts": {name: sig["formula_count"] for name, sig in sheets.items()
+                               if name != "Inputs"},
         }
 
-        wb.close()
-        return result
+    @staticmethod
+    def _sheet_signature(patcher: "XlsxPatcher", sheet: str, max_label_row: Optional[int] = None) -> Dict:
+        """
+        Structural signature of one sheet, from a single pass over its XML.
+
+        Labels are column B text cells (up to *max_label_row*); a label that
+        appears twice keeps its last row.
+
+        Returns:
+            {
+                "labels": {text: row, ...}           (column B text; formulas as '=...')
+                "scenario_headers": {ref: text, ...} (Base / Upside / Downside cells)
+                "formula_count": int,
+                "formula_digest": str                (hash of formula cell layout + text)
+                "used_range": "A1:H120" | None
+            }
+        """
+        labels = {}
+        headers = {}
+        formulas = []
+        min_row = min_col = max_row = max_col = None
+        for ref, value, formula in patcher.iter_cells(sheet):
+            row, col = split_ref(ref)
+            if min_row is None:
+                min_row, max_row, min_col, max_col = row, row, col, col
+            else:
+                min_row, max_row = min(min_row, row), max(max_row, row)
+                min_col, max_col = min(min_col, col), max(max_col, col)
+
+            if formula is not None:
+                formulas.append(f"{ref}={formula}")
+            text = f"={formula}" if formula else value
+            if not isinstance(text, str) or not text.strip():
+                continue
+            text = text.strip()
+            if col == LABEL_COL and (max_label_row is None or row <= max_label_row):
+                labels[text] = row
+            if len(text) <= 40 and _SCENARIO_RE.search(text):
+                headers[ref] = text
+
+        digest = hashlib.sha1("\n".join(sorted(formulas)).encode()).hexdigest()[:16]
+        used = (f"{_col_letters(min_col)}{min_row}:{_col_letters(max_col)}{max_row}"
+                if min_row is not None else None)
+        return {
+            "labels": labels,
+            "scenario_headers": headers,
+            "formula_count": len(formulas),
+            "formula_digest": digest,
+            "used_range": used,
+        }
 
     def find_matching_config(self, scanned_template: Dict) -> Tuple[Optional[str], float]:
         """
@@ -84,35 +406,91 @@ class TemplateScanner:
             - config_filename: Name of best matching config, or None if no match
             - similarity_score: 0-1 score (0.9+ is considered a match)
         """
-        config_files = list(self.templates_dir.glob("*.json"))
-
-        if not config_files:
+        ranked = self.rank_configs(scanned_template)
+        if not ranked:
             return None, 0.0
 
-        best_match = None
-        best_score = 0.0
         threshold = 0.85  # 85%+ similarity = match
+        best_name, best_score = ranked[0]
+        return (best_name if best_score >= threshold else None), best_score
 
-        for config_file in config_files:
-            try:
-                with open(config_file, "r") as f:
-                    config = json.load(f)
+    def rank_configs(self, scanned_template: Dict, top: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Rank every config by label similarity to a scanned template.
 
-                # Compare labels
-                score = self._compare_templates(
-                    scanned_template["labels"],
-                    config.get("labels", {})
-                )
+        Uses the trigram LabelIndex, built once and rebuilt only when a
+        config file is added, removed or modified. Configs tied on label
+        score are ordered by how many sheets agree on formula layout
+        (formula_digest) or formula count.
 
-                if score > best_score:
-                    best_score = score
-                    if score >= threshold:
-                        best_match = config_file.name
+        Returns:
+            [(config_filename, similarity_score), ...] best first
+        """
+        ranked = self.label_index().rank(scanned_template["labels"])
+        sheets = scanned_template.get("sheets")
+        if sheets:
+            entries = {e["name"]: e["config"] for e in self.registry.entries()}
+            agreement = {name: self._sheet_agreement(sheets, entries.get(name, {})) for name, _ in ranked}
+            ranked.sort(key=lambda item: (-item[1], -agreement[item[0]]))
+        return ranked[:top] if top else ranked
 
-            except (json.JSONDecodeError, KeyError):
-                continue
+    @staticmethod
+    def _sheet_agreement(sheets: Dict, config: Dict) -> int:
+        """Number of scanned sheets whose formula digest or count matches the config."""
+        config_sheets = config.get("sheets", {})
+        counts = config.get("formula_counts", {})
+        agree = 0
+        for name, sig in sheets.items():
+            known = config_sheets.get(name, {})
+            if known.get("formula_digest") == sig["formula_digest"]:
+                agree += 2
+            elif counts.get(name) == sig["formula_count"] and sig["formula_count"]:
+                agree += 1
+        return agree
+
+    def label_index(self) -> LabelIndex:
+        """Return the LabelIndex over all valid configs, rebuilding it if a config changed."""
+        key = self.registry.stamp
+        if self._label_index is None or key != self._label_index_key:
+            self._label_index = LabelIndex(self.registry.labels())
+            self._label_index_key = key
+        return self._label_index
+
+    def minhash_index(self) -> MinHashIndex:
+        """Return the MinHash/LSH index over all valid configs, rebuilt when a config changes.
+
+        Signatures of unchanged configs are reused across rebuilds.
+        """
+        key = self.registry.stamp
+        if self._minhash_index is None or key != self._minhash_key:
+            index = MinHashIndex()
+            sigs = {}
+            for entry in self.registry.entries():
+                cache_key = (entry["name"], entry["stamp"])
+                config = entry["config"]
+                features = None
+                if cache_key not in self._minhash_sigs:
+                    features = structural_features(
+                        config["labels"], config.get("sheets"), config.get("formula_counts"))
+                sigs[cache_key] = index.add(entry["name"], features, self._minhash_sigs.get(cache_key))
+            self._minhash_sigs = sigs
+            self._minhash_index, self._minhash_key = index, key
+        return self._minhash_index
+
+    def similar_configs(self, scanned_template: Dict,
+                        min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Near-duplicate candidates for a scanned template from the LSH index,
+        as [(config_filename, estimated_jaccard)] best first. Only configs
+        sharing an LSH bucket are compared.
+        """
+        features = structural_features(scanned_template["labels"], scanned_template.get("sheets"),
+                                       scanned_template.get("formula_counts"))
+        return self.minhash_index().query(features, min_similarity=min_similarity)
 
-        return best_match, best_score
+    def cluster_configs(self, min_similarity: float = NEAR_DUPLICATE_JACCARD) -> List[List[str]]:
+        """Groups of structurally near-identical configs (candidates for merging)."""
+        return self.minhash_index().clusters(min_similarity)
 
     def create_config_from_template(self, scanned_template: Dict, config_name: str) -> str:
         """
@@ -133,24 +511,47 @@ class TemplateScanner:
             "structure_hash": scanned_template["structure_hash"],
             "last_updated": self._get_timestamp(),
         }
+        config.update(self._fingerprint(scanned_template))
 
         config_path = self.templates_dir / config_name
-
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
-
+        _write_json_atomic(config_path, config)
         return str(config_path)
 
-    def load_config(self, config_name: str) -> Dict:
-        """Load a config file by name"""
+    def update_config_fingerprint(self, config_name: str, scanned_template: Dict) -> str:
+        """
+        Refresh the formula fingerprint (formula_counts, sheets, source) of an
+        existing config from a scan, leaving labels and every hand-edited key
+        untouched.
+
+        Returns:
+            Path to updated config file
+        """
         config_name = Path(config_name).name  # strip any directory traversal
         config_path = self.templates_dir / config_name
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        config.update(self._fingerprint(scanned_template))
+        config["last_updated"] = self._get_timestamp()
+        _write_json_atomic(config_path, config)
+        return str(config_path)
 
-        if not config_path.exists():
-            raise FileNotFoundError(f"Config not found: {config_name}")
+    @staticmethod
+    def _fingerprint(scanned_template: Dict) -> Dict:
+        """Config keys describing formula layout (and source file, when known)."""
+        fingerprint = {}
+        if scanned_template.get("sheets"):
+            fingerprint["formula_counts"] = scanned_template["formula_counts"]
+            fingerprint["sheets"] = {
+                name: {k: v for k, v in sig.items() if k != "labels" or name != "Inputs"}
+                for name, sig in scanned_template["sheets"].items()
+            }
+        if scanned_template.get("source"):
+            fingerprint["source"] = scanned_template["source"]
+        return fingerprint
 
-        with open(config_path, "r") as f:
-            return json.load(f)
+    def load_config(self, config_name: str) -> Dict:
+        """Load a config file by name (from the registry cache)"""
+        return self.registry.get(config_name)["config"]
 
     def _detect_template_type(self, labels: Dict[str, int]) -> str:
         """Detect template type based on labels present"""
@@ -184,16 +585,14 @@ class TemplateScanner:
 
         return "Custom"
 
-    def _detect_scenarios(self, ws) -> list:
+    def _detect_scenarios(self, headers: Dict[str, str]) -> list:
         """Detect which columns contain scenario data (typically C, D, E)"""
         scenarios = []
 
-        # Check columns C, D, E for common headers
+        # Check columns C, D, E of row 1 for common headers
         for col_letter in ["C", "D", "E"]:
-            cell_value = ws[f"{col_letter}1"].value
-            if cell_value and isinstance(cell_value, str):
-                if any(x in cell_value.lower() for x in ["base", "upside", "downside"]):
-                    scenarios.append(col_letter)
+            if f"{col_letter}1" in headers:
+                scenarios.append(col_letter)
 
         # Default if not found
         if not scenarios:
@@ -203,13 +602,7 @@ class TemplateScanner:
 
     def _create_structure_hash(self, labels: Dict[str, int], template_type: str) -> str:
         """Create a hash of template structure for comparison"""
-        # Sort labels and combine with type for hash
-        label_str = "|".join(sorted(labels.keys()))
-        hash_input = f"{template_type}:{label_str}"
-
-        # Simple hash (not cryptographic, just for comparison)
-        import hashlib
-        return hashlib.md5(hash_input.encode()).hexdigest()[:16]
+        return structure_hash(labels, template_type)
 
     def _compare_templates(self, template_labels: Dict[str, int], config_labels: Dict[str, int]) -> float:
         """
@@ -234,7 +627,7 @@ class TemplateScanner:
                 ).ratio()
                 best_ratio = max(best_ratio, ratio)
 
-            if best_ratio >= 0.8:  # 80%+ match on individual label
+            if best_ratio >= LABEL_MATCH_RATIO:  # 80%+ match on individual label
                 matches += 1
 
         return matches / total if total > 0 else 0.0
@@ -246,28 +639,283 @@ class TemplateScanner:
         return datetime.utcnow().isoformat()
 
 
+# ---------------------------------------------------------------------------
+# Batch scan
+# ---------------------------------------------------------------------------
+def _file_mode(path: Path) -> int:
+    """Mode for a file replacing *path*: its current mode, else the umask default."""
+    try:
+        return path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_json_atomic(path: Path, data) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.chmod(tmp, _file_mode(path))   # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _scan_file(templates_dir: str, path: str) -> Dict:
+    """Scan one workbook (runs in a worker process)."""
+    try:
+        scanned = TemplateScanner(Path(templates_dir)).scan_template(path)
+    except Exception as e:  # bad zip, missing Inputs sheet, ...
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+    return {"file": path, "scanned": scanned}
+
+
+def _source_path(path: Path) -> str:
+    """Workbook path as recorded in configs: workspace-relative when possible."""
+    from workspace import settings
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(settings.root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _slug(path: Path) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", path.stem.lower()).strip("_") or "template"
+
+
+def _unique_config_name(configs_dir: Path, slug: str, taken: set) -> str:
+    """<slug>.json, or <slug>_2.json, _3, ... if that config exists or is *taken*."""
+    name, n = f"{slug}.json", 1
+    while name in taken or (configs_dir / name).exists():
+        n += 1
+        name = f"{slug}_{n}.json"
+    return name
+
+
+def discover_workbooks(templates_dir: Path, clients_dir: Optional[Path] = None) -> List[Tuple[Path, str]]:
+    """
+    Return [(path, origin)] for every .xlsx under *templates_dir* ("template")
+    and, if given, every client model in <client>/.../1. Model/ ("client").
+    Excel lock files (~$...) are skipped.
+    """
+    found = [(p, "template") for p in sorted(templates_dir.rglob("*.xlsx"))]
+    if clients_dir is not None:
+        found += [(p, "client") for p in sorted(clients_dir.rglob("*.xlsx"))
+                  if p.parent.name == "1. Model"]
+    return [(p, origin) for p, origin in found if not p.name.startswith("~$")]
+
+
+def batch_scan(scanner: "TemplateScanner", workbooks: List[Tuple[Path, str]],
+               threshold: float = 0.85, workers: int = 1, dry_run: bool = False,
+               force: bool = False) -> Dict:
+    """
+    Scan many workbooks in parallel and create or refresh their configs.
+
+    Per workbook:
+      - unchanged: a config already records this file with the same
+        content hash (source.sha256) -> skipped without scanning
+      - template, matched (score >= threshold): the matched config's formula
+        fingerprint is refreshed (labels and hand edits are kept). A config
+        is refreshed from one workbook per run: the one it already records
+        if that is unchanged, else the best-scoring match; the other matches
+        are reported as "duplicate"
+      - template, no match: a new config <file_slug>.json is created; if
+        that name is taken (an existing config or another new one), it
+        gets a numeric suffix and the item reports "renamed_from"
+      - client model: matched and reported only, never written
+
+    Returns a JSON-serializable report.
+    """
+    known = {}
+    for entry in scanner.registry.entries():
+        source = entry["config"].get("source") or {}
+        if source.get("sha256"):
+            known[(source.get("file"), source["sha256"])] = entry
+
+    base = scanner.registry.templates_dir
+    results, todo = [], []
+    for path, origin in workbooks:
+        sha = _file_sha256(path)
+        rel = _source_path(path)
+        if not force and (rel, sha) in known:
+            entry = known[(rel, sha)]
+            results.append({"file": rel, "origin": origin, "action": "unchanged",
+                            "config": entry["name"],
+                            "formula_counts": entry["config"].get("formula_counts", {})})
+        else:
+            todo.append((path, rel, origin, sha))
+
+    scan = partial(_scan_file, str(base))
+    paths = [str(path) for path, *_ in todo]
+    if workers > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scans = list(pool.map(scan, paths, chunksize=1))
+    else:
+        scans = [scan(p) for p in paths]
+
+    # config -> file refreshing it this run: unchanged sources keep their config
+    claimed = {r["config"]: r["file"] for r in results}
+    best = {}
+    scanned_items = []
+    for (path, rel, origin, sha), scan_result in zip(todo, scans):
+        item = {"file": rel, "origin": origin}
+        if "error" in scan_result:
+            item.update(action="error", error=scan_result["error"])
+            results.append(item)
+            continue
+        scanned = scan_result["scanned"]
+        scanned["source"] = {"file": rel, "sha256": sha}
+        ranked = scanner.rank_configs(scanned)
+        name, score = ranked[0] if ranked else (None, 0.0)
+        item.update(template_type=scanned["template_type"], labels=len(scanned["labels"]),
+                    formula_counts=scanned["formula_counts"], score=round(score, 3))
+        if score >= threshold and origin != "client" and name not in claimed:
+            if name not in best or score > best[name][1]:
+                best[name] = (rel, score)
+        scanned_items.append((path, origin, name, score, scanned, item))
+    claimed.update({name: rel for name, (rel, _) in best.items()})
+
+    taken = {entry["name"] for entry in scanner.registry.entries()}
+    for path, origin, name, score, scanned, item in scanned_items:
+        if score >= threshold:
+            item["config"] = name
+            if origin == "client":
+                item["action"] = "matched"
+            elif claimed[name] != item["file"]:
+                item.update(action="duplicate", duplicate_of=claimed[name])
+            else:
+                item["action"] = "updated"
+                if not dry_run:
+                    scanner.update_config_fingerprint(name, scanned)
+        elif origin == "client":
+            item["action"] = "no_match"
+        else:
+            config_name = _unique_config_name(base, _slug(path), taken)
+            taken.add(config_name)
+            item.update(action="created", config=config_name)
+            if config_name != f"{_slug(path)}.json":
+                item["renamed_from"] = f"{_slug(path)}.json"
+            if not dry_run:
+                scanner.create_config_from_template(scanned, config_name)
+        results.append(item)
+
+    results.sort(key=lambda r: r["file"])
+    scanner.registry.load()   # pick up created/updated configs
+    counts = {}
+    for r in results:
+        counts[r["action"]] = counts.get(r["action"], 0) + 1
+    return {
+        "configs_dir": str(base),
+        "dry_run": dry_run,
+        "summary": counts,
+        "formula_counts_check": _formula_counts_check(results),
+        "results": results,
+    }
+
+
+def _formula_counts_check(results: List[Dict]) -> Dict:
+    """
+    Compare scanned formula counts of the standard templates (workspace
+    TEMPLATE_FILES) with jolly_utils.FORMULA_COUNTS. A 0 count there (retail)
+    is reported as "missing" with the scanned values to fill it in.
+    """
+    from jolly_utils import FORMULA_COUNTS
+    from workspace import TEMPLATE_FILES
+    by_suffix = {Path(model).as_posix(): t for t, (model, _ppt) in TEMPLATE_FILES.items()}
+    check = {}
+    for r in results:
+        posix = Path(r["file"]).as_posix()
+        template = next((t for suffix, t in by_suffix.items() if posix.endswith(suffix)), None)
+        if template is None or "formula_counts" not in r:
+            continue
+        expected = FORMULA_COUNTS.get(template, {})
+        scanned = {k: r["formula_counts"].get(k, 0) for k in ("Campaigns", "Sensitivities")}
+        if not any(expected.values()):
+            status = "missing"
+        else:
+            status = "ok" if scanned == expected else "mismatch"
+        check[template] = {"expected": expected, "scanned": scanned, "status": status}
+    return check
+
+
 def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Scan Excel templates and match against configs")
-    parser.add_argument("--file", required=True, help="Path to Excel model file")
+    parser.add_argument("--file", help="Path to Excel model file (required unless --clusters/--batch)")
     parser.add_argument("--configs-dir", help="Path to configs directory (default: templates/ next to script)")
     parser.add_argument("--threshold", type=float, default=0.85, help="Match threshold (default: 0.85)")
     parser.add_argument("--create", action="store_true", help="Create a new config from the template")
     parser.add_argument("--output", help="Output path for new config (used with --create)")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N best-ranked configs with scores")
+    parser.add_argument("--similar", action="store_true",
+                        help="Also list near-duplicate configs from the MinHash/LSH index")
+    parser.add_argument("--clusters", action="store_true",
+                        help="List groups of near-identical configs in the library and exit")
+    parser.add_argument("--min-jaccard", type=float, default=NEAR_DUPLICATE_JACCARD,
+                        help=f"Estimated Jaccard cutoff for --similar/--clusters (default: {NEAR_DUPLICATE_JACCARD})")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", action="store_true",
+                       help="Scan every .xlsx under the templates root and create/refresh configs")
+    batch.add_argument("--dir", help="Directory to scan (default: workspace templates root)")
+    batch.add_argument("--include-clients", action="store_true",
+                       help="Also match client models (<client>/1. Model/*.xlsx); report only")
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="Scan processes (default: CPU count)")
+    batch.add_argument("--report", help="Report path (default: <workspace>/.claude/data/template_batch_report.json)")
+    batch.add_argument("--dry-run", action="store_true", help="Report only; write no configs")
+    batch.add_argument("--force", action="store_true", help="Re-scan files whose content hash is unchanged")
     args = parser.parse_args()
 
     if not 0 <= args.threshold <= 1:
         parser.error("--threshold must be between 0 and 1")
+    if not args.file and not (args.clusters or args.batch):
+        parser.error("--file is required unless --clusters or --batch is given")
 
     configs_dir = Path(args.configs_dir) if args.configs_dir else None
     scanner = TemplateScanner(templates_dir=configs_dir)
 
+    if args.batch:
+        from workspace import settings
+        scan_dir = Path(args.dir) if args.dir else settings.templates_dir
+        if not scan_dir.is_dir():
+            print(json.dumps({"error": f"Templates directory not found: {scan_dir}"}))
+            sys.exit(1)
+        workbooks = discover_workbooks(scan_dir, settings.clients_dir if args.include_clients else None)
+        report = batch_scan(scanner, workbooks, threshold=args.threshold, workers=args.workers,
+                            dry_run=args.dry_run, force=args.force)
+        report_path = Path(args.report) if args.report else settings.data_dir / "template_batch_report.json"
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(report_path, report)
+        print(json.dumps({"report": str(report_path), "workbooks": len(workbooks),
+                          "summary": report["summary"],
+                          "formula_counts_check": report["formula_counts_check"]}))
+        return
+
+    if args.clusters:
+        clusters = scanner.cluster_configs(args.min_jaccard)
+        print(json.dumps({"clusters": clusters, "redundant_configs": sum(len(c) - 1 for c in clusters)}))
+        return
+
     scanned = scanner.scan_template(args.file)
     print(json.dumps({
         "template_type": scanned["template_type"],
         "labels_count": len(scanned["labels"]),
         "structure_hash": scanned["structure_hash"],
+        "formula_counts": scanned["formula_counts"],
     }))
 
     if args.create:
@@ -282,9 +930,17 @@ def main():
                 config_path = str(out)
         print(json.dumps({"config_created": config_path}))
     else:
-        config_name, score = scanner.find_matching_config(scanned)
+        ranked = scanner.rank_configs(scanned)
+        config_name, score = ranked[0] if ranked else (None, 0.0)
+        if score < args.threshold:
+            config_name = None
         result = {"best_match": config_name, "score": round(score, 3)}
-        if config_name and score >= args.threshold:
+        if args.top:
+            result["ranked"] = [{"config": name, "score": round(s, 3)} for name, s in ranked[:args.top]]
+        if args.similar:
+            result["similar"] = [{"config": name, "jaccard": j}
+                                 for name, j in scanner.similar_configs(scanned, args.min_jaccard)]
+        if config_name:
             result["status"] = "matched"
             result["config"] = scanner.load_config(config_name)
         else:
@@ -0,0 +1,146 @@
+"""
+Workspace
+=========
+Lazy, cached workspace settings shared by every Jolly script.
+
+Nothing is read at import time. The workspace root comes from the
+JOLLY_WORKSPACE env var (default: current directory) when first needed;
+workspace_config.json and .claude/.env are each parsed at most once per
+process and re-read only when their mtime or size changes, so long-lived
+processes pick up edits without paying for a re-parse on every access.
+
+Usage:
+    from workspace import settings
+    settings.clients_dir                 # <ws>/<client_root>
+    settings.templates_dir               # <ws>/<templates_root>
+    settings.env("SEC_IDENTITY", "research@company.com")
+    settings.template_paths("qsr")       # (model_template, ppt_template)
+"""
+import json
+import os
+from pathlib import Path
+
+# Template files per type, relative to the templates root
+TEMPLATE_FILES = {
+    "qsr":           ("QSR/QSR Intro Model Template.xlsx", "QSR/QSR Intro Template.pptx"),
+    "manufacturing": ("Manufacturing/Manufacturing Intro Template.xlsx",
+                      "Manufacturing/Manufacturing Intro Template.pptx"),
+    "retail":        ("Retail/Retail Intro Model Template.xlsx", "Retail/Retail Intro Template.pptx"),
+}
+
+
+def _parse_json(text):
+    return json.loads(text)
+
+
+def _parse_env(text):
+    """Parse KEY=VALUE lines, skipping comments and blank lines."""
+    values = {}
+    for line in text.splitlines():
+        if "=" in line and not line.startswith("#"):
+            key, value = line.split("=", 1)
+            values[key.strip()] = value.strip()
+    return values
+
+
+class WorkspaceSettings:
+    """Workspace paths, config and .env values, resolved on first use."""
+
+    def __init__(self, root=None):
+        self._root = Path(root).resolve() if root else None
+        self._files = {}   # path -> (mtime_ns, size, parsed)
+
+    # -- cached file reads -------------------------------------------------
+    def _read(self, path, parser, default):
+        """Parse *path* once per (mtime, size); *default* if missing or invalid."""
+        try:
+            st = path.stat()
+        except OSError:
+            self._files.pop(path, None)
+            return default
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(path)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+        try:
+            parsed = parser(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError, UnicodeDecodeError):
+            parsed = default
+        self._files[path] = (*stamp, parsed)
+        return parsed
+
+    def invalidate(self):
+        """Forget every cached file (the next access re-reads from disk)."""
+        self._files.clear()
+
+    # -- paths -------------------------------------------------------------
+    @property
+    def root(self):
+        if self._root is not None:
+            return self._root
+        return Path(os.getenv("JOLLY_WORKSPACE", ".")).resolve()
+
+    @property
+    def claude_dir(self):
+        return self.root / ".claude"
+
+    @property
+    def data_dir(self):
+        return self.claude_dir / "data"
+
+    @property
+    def cache_dir(self):
+        return self.claude_dir / "cache"
+
+    @property
+    def config_path(self):
+        return self.data_dir / "workspace_config.json"
+
+    @property
+    def env_path(self):
+        return self.claude_dir / ".env"
+
+    @property
+    def config(self):
+        """Parsed workspace_config.json ({} if missing or invalid)."""
+        config = self._read(self.config_path, _parse_json, {})
+        return config if isinstance(config, dict) else {}
+
+    @property
+    def clients_dir(self):
+        return self.root / self.config.get("client_root", "Clients")
+
+    @property
+    def templates_dir(self):
+        return self.root / self.config.get("templates_root", "Templates")
+
+    def template_paths(self, template_type):
+        """Return (model_template, ppt_template) paths for a template type."""
+        files = TEMPLATE_FILES.get(template_type.lower())
+        if not files:
+            raise ValueError(
+                f"Unknown template type '{template_type}'. "
+                f"Available: {list(TEMPLATE_FILES.keys())}"
+            )
+        return tuple(self.templates_dir / f for f in files)
+
+    # -- .env ----------------------------------------------------------------
+    @property
+    def env_file(self):
+        """KEY -> value pairs from .claude/.env ({} if missing)."""
+        return self._read(self.env_path, _parse_env, {})
+
+    def env(self, key, default=None):
+        """Look up *key* in .claude/.env, then the process environment."""
+        value = self.env_file.get(key)
+        if value:
+            return value
+        return os.environ.get(key, default)
+
+    def export_env(self):
+        """Copy .env values into os.environ without overriding existing ones."""
+        for key, value in self.env_file.items():
+            os.environ.setdefault(key, value)
+
+
+settings = WorkspaceSettings()
@@ -0,0 +1,731 @@
+"""
+XLSX Patch
+==========
+Surgical, zip-level cell writer for Jolly intro models.
+
+Rewrites only the <c> elements being changed inside the affected
+xl/worksheets/sheetN.xml parts (plus the sheet's comments/VML parts, rels and
+[Content_Types].xml when a comment is added) and copies every other zip member
+byte-for-byte, compressed stream included. Nothing outside those parts is
+parsed or re-serialized, so data validations, extLst blocks, Macabacus link
+metadata and styles survive exactly as the template shipped them.
+
+The workbook's calcPr is flagged fullCalcOnLoad="1" so Excel recalculates
+dependent formulas the next time the file is opened.
+
+Strings are written as inline strings (t="inlineStr"), so the shared strings
+part never needs to be touched; Excel folds them into sharedStrings.xml on its
+next save.
+
+Usage (library):
+    patcher = XlsxPatcher("model.xlsx")
+    if "C55" not in patcher.formula_cells("Inputs"):
+        patcher.set_value("Inputs", "C55", 0.25)
+        patcher.set_comment("Inputs", "C55", "3rd party: benchmark (est.)")
+    patcher.save()
+"""
+import copy
+import os
+import posixpath
+import re
+import struct
+import tempfile
+import zipfile
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+from jolly_utils import COMMENT_AUTHOR, COMMENT_WIDTH, COMMENT_HEIGHT
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_VML = "urn:schemas-microsoft-com:vml"
+NS_OFFICE = "urn:schemas-microsoft-com:office:office"
+NS_EXCEL = "urn:schemas-microsoft-com:office:excel"
+
+REL_COMMENTS = NS_REL + "/comments"
+REL_VML = NS_REL + "/vmlDrawing"
+CT_COMMENTS = "application/vnd.openxmlformats-officedocument.spreadsheetml.comments+xml"
+CT_VML = "application/vnd.openxmlformats-officedocument.vmlDrawing"
+
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_REF_RE = re.compile(r"^([A-Z]{1,3})([1-9][0-9]*)$")
+_SHEETDATA_RE = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_V_RE = re.compile(r"<v>(.*?)</v>", re.S)
+_F_RE = re.compile(r"<f\b([^>]*?)(?:/>|>(.*?)</f>)", re.S)
+_CALCPR_RE = re.compile(r"<calcPr\b([^>]*?)(/?)>")
+
+# CT_Worksheet children that must follow <legacyDrawing>
+_AFTER_LEGACY_DRAWING = (
+    "legacyDrawingHF", "drawingHF", "picture", "oleObjects", "controls",
+    "webPublishItems", "tableParts", "extLst",
+)
+# CT_Workbook children that must follow <calcPr>
+_AFTER_CALCPR = (
+    "oleSize", "customWorkbookViews", "pivotCaches", "smartTagPr",
+    "smartTagTypes", "webPublishing", "fileRecoveryPr", "webPublishObjects",
+    "extLst",
+)
+
+
+class XlsxPatchError(Exception):
+    """Raised when a workbook part cannot be patched safely in place."""
+
+
+# ---------------------------------------------------------------------------
+# Small XML / reference helpers
+# ---------------------------------------------------------------------------
+def _attr(attrs, name):
+    """Return attribute *name* from a raw attribute string, or None."""
+    m = re.search(r'(?:^|\s)%s\s*=\s*(["\'])(.*?)\1' % re.escape(name), attrs, re.S)
+    return m.group(2) if m else None
+
+
+def _drop_attr(attrs, name):
+    return re.sub(r'\s+%s\s*=\s*(["\']).*?\1' % re.escape(name), "", attrs, flags=re.S)
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def split_ref(ref):
+    """Split 'C55' into (row, col) integers. Raises XlsxPatchError if invalid."""
+    m = _REF_RE.match(ref)
+    if not m:
+        raise XlsxPatchError(f"invalid cell reference {ref!r}")
+    return int(m.group(2)), _col_index(m.group(1))
+
+
+def _find_first_tag(xml, names):
+    """Return the offset of the first <name .../> opening tag in *names*, or -1."""
+    hits = [m.start() for n in names for m in [re.search(r"<%s\b" % n, xml)] if m]
+    return min(hits) if hits else -1
+
+
+def _resolve_target(base_part, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _rels_path(part):
+    d, name = posixpath.split(part)
+    return posixpath.join(d, "_rels", name + ".rels")
+
+
+def _relative_target(base_part, part):
+    return posixpath.relpath(part, posixpath.dirname(base_part))
+
+
+def _number_text(value):
+    if isinstance(value, float):
+        if value != value or value in (float("inf"), float("-inf")):
+            raise XlsxPatchError(f"cannot write non-finite number {value!r}")
+        return repr(value).replace("e", "E")
+    return str(value)
+
+
+_NO_VALUE = object()   # cell has no stored value
+
+
+class CachedValue:
+    """Marks an edit that updates a formula cell's cached <v>, keeping its <f>."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class CellError(str):
+    """An Excel error value such as #DIV/0! or #VALUE!."""
+
+
+def _cached_cell_xml(ref, attrs, body, value):
+    fm = _F_RE.search(body or "")
+    if not fm:
+        return None
+    head = f'<c r="{ref}"{attrs}'
+    f = fm.group(0)
+    if value is None:
+        return f"{head}>{f}</c>"
+    if isinstance(value, CellError):
+        return f'{head} t="e">{f}<v>{escape(value)}</v></c>'
+    if isinstance(value, bool):
+        return f'{head} t="b">{f}<v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"{head}>{f}<v>{_number_text(value)}</v></c>"
+    return f'{head} t="str">{f}<v>{escape(str(value))}</v></c>'
+
+
+def _cell_xml(ref, attrs, value, body=""):
+    """Render a <c> element for *value*, keeping any non-type attributes."""
+    attrs = _drop_attr(_drop_attr(attrs, "t"), "r")
+    if isinstance(value, CachedValue):
+        return _cached_cell_xml(ref, attrs, body, value.value) or f'<c r="{ref}"{attrs}/>'
+    head = f'<c r="{ref}"{attrs}'
+    if value is None:
+        return head + "/>"
+    if isinstance(value, bool):
+        return f'{head} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"{head}><v>{_number_text(value)}</v></c>"
+    if isinstance(value, str):
+        if value.startswith("="):
+            return f"{head}><f>{escape(value[1:])}</f></c>"
+        space = ' xml:space="preserve"' if value != value.strip() else ""
+        return f'{head} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    raise XlsxPatchError(f"unsupported value type {type(value).__name__} for {ref}")
+
+
+def _in_phonetic(si, t):
+    """True if <t> belongs to a phonetic run (<rPh>), which Excel never displays."""
+    return any(t in list(rph.iter()) for rph in si.iter(f"{{{NS_MAIN}}}rPh"))
+
+
+# ---------------------------------------------------------------------------
+# Raw zip member copy
+# ---------------------------------------------------------------------------
+def _copy_member_raw(zin, zout, info):
+    """Copy a member's compressed bytes without inflating or re-deflating them.
+
+    Falls back to a decompress/recompress copy for members that carry
+    encryption or zip64 records.
+    """
+    if info.flag_bits & 0x1 or info.file_size >= 0xFFFFFFFF or info.compress_size >= 0xFFFFFFFF:
+        zout.writestr(info, zin.read(info))
+        return
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+    raw = zin.fp.read(info.compress_size)
+
+    out = copy.copy(info)
+    out.flag_bits &= ~0x08  # sizes/CRC go in the local header, no data descriptor
+    out.extra = b""
+    out.header_offset = zout.fp.tell()
+    zout.fp.write(out.FileHeader(False))
+    zout.fp.write(raw)
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(out)
+    zout.NameToInfo[out.filename] = out
+    zout._didModify = True
+
+
+def _match_mode(tmp, dest):
+    """Give *tmp* the permissions of *dest* (or the umask default for a new file);
+    mkstemp creates files 0600."""
+    try:
+        mode = os.stat(dest).st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp, mode)
+
+
+def rewrite_members(src, replacements, dest=None):
+    """Write *src* to *dest* (default: in place) with some members replaced.
+
+    *replacements* maps member name -> bytes, or -> None to drop the member.
+    Names not already in the archive are appended. Every other member is
+    copied raw. The output is written to a temp file and renamed into place.
+    """
+    dest = str(dest or src)
+    fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(dest)))
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(src) as zin, \
+             zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zout:
+            existing = set()
+            for info in zin.infolist():
+                existing.add(info.filename)
+                if info.filename not in replacements:
+                    _copy_member_raw(zin, zout, info)
+                elif replacements[info.filename] is not None:
+                    zout.writestr(info, replacements[info.filename],
+                                  compress_type=zipfile.ZIP_DEFLATED)
+            for name, data in replacements.items():
+                if name not in existing and data is not None:
+                    zout.writestr(name, data)
+        _match_mode(tmp, dest)
+        try:
+            os.replace(tmp, dest)
+        except PermissionError:
+            raise PermissionError(
+                f"Cannot save {dest} - file may be open in Excel. Close it first."
+            )
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ---------------------------------------------------------------------------
+# Patcher
+# ---------------------------------------------------------------------------
+class XlsxPatcher:
+    """Queue cell value and comment edits, then write them with save()."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Model not found: {self.path}")
+        try:
+            with zipfile.ZipFile(self.path) as z:
+                self._names = z.namelist()
+                self._sheets = self._read_sheet_map(z)
+        except zipfile.BadZipFile as e:
+            raise XlsxPatchError(f"{self.path} is not an xlsx file: {e}") from e
+        self._parts = {}      # member name -> current bytes (read lazily)
+        self._dirty = set()   # members with pending rewrites
+        self._shared_strings = None
+        self._values = {}     # sheet -> {(row, col): (ref, value)}
+        self._comments = {}   # sheet -> {ref: (text, author, width, height)}
+
+    # -- workbook structure ------------------------------------------------
+    @staticmethod
+    def _read_sheet_map(z):
+        wb = ET.fromstring(z.read("xl/workbook.xml"))
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        targets = {
+            r.get("Id"): _resolve_target("xl/workbook.xml", r.get("Target"))
+            for r in rels.iter(f"{{{NS_PKG_REL}}}Relationship")
+        }
+        sheets = {}
+        for s in wb.iter(f"{{{NS_MAIN}}}sheet"):
+            rid = s.get(f"{{{NS_REL}}}id")
+            if rid in targets:
+                sheets[s.get("name")] = targets[rid]
+        return sheets
+
+    @property
+    def sheetnames(self):
+        return list(self._sheets)
+
+    def sheet_part(self, sheet):
+        if sheet not in self._sheets:
+            raise XlsxPatchError(f"sheet {sheet!r} not found")
+        return self._sheets[sheet]
+
+    def read_part(self, name):
+        """Return the current text of a member (patched version if pending)."""
+        if name not in self._parts:
+            if name not in self._names:
+                return None
+            with zipfile.ZipFile(self.path) as z:
+                self._parts[name] = z.read(name)
+        data = self._parts[name]
+        return data.decode("utf-8") if data is not None else None
+
+    def _write_part(self, name, text):
+        self._parts[name] = text.encode("utf-8")
+        self._dirty.add(name)
+
+    def original_part(self, name):
+        """Return the on-disk bytes of a member, or None if it does not exist."""
+        if name not in self._names:
+            return None
+        with zipfile.ZipFile(self.path) as z:
+            return z.read(name)
+
+    # -- queries -----------------------------------------------------------
+    def defined_names(self):
+        """Return {name: formula text} for workbook-scoped defined names."""
+        wb = ET.fromstring(self.read_part("xl/workbook.xml"))
+        return {
+            d.get("name"): (d.text or "")
+            for d in wb.iter(f"{{{NS_MAIN}}}definedName")
+            if d.get("localSheetId") is None
+        }
+
+    def iter_formulas(self, sheet):
+        """Yield (ref, formula, f_attrs) for every formula cell on *sheet*.
+
+        *formula* is unescaped text without the leading '='. It is empty for
+        shared-formula children (t="shared" with only si) and data-table
+        cells; *f_attrs* carries t/si/ref/r1/r2 so callers can resolve them.
+        """
+        xml = self.read_part(self.sheet_part(sheet))
+        for m in _CELL_RE.finditer(xml):
+            body = m.group(2)
+            if not body or "<f" not in body:
+                continue
+            fm = _F_RE.search(body)
+            if not fm:
+                continue
+            attrs = {k: v for k, _q, v in re.findall(r'(\w+)\s*=\s*(["\'])(.*?)\2', fm.group(1))}
+            yield _attr(m.group(1), "r"), unescape(fm.group(2) or ""), attrs
+
+    def shared_strings(self):
+        """Return the workbook's shared string table as a list of plain strings."""
+        if self._shared_strings is None:
+            xml = self.read_part("xl/sharedStrings.xml")
+            strings = []
+            if xml:
+                root = ET.fromstring(xml)
+                for si in root.iter(f"{{{NS_MAIN}}}si"):
+                    strings.append("".join(
+                        t.text or "" for t in si.iter(f"{{{NS_MAIN}}}t")
+                        if not _in_phonetic(si, t)
+                    ))
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _decode(self, attrs, body):
+        """Return the stored value of a <c> element, or _NO_VALUE."""
+        kind = _attr(attrs, "t") or "n"
+        if kind == "inlineStr":
+            return unescape("".join(re.findall(r"<t\b[^>]*>(.*?)</t>", body, re.S)))
+        vm = _V_RE.search(body)
+        if not vm:
+            return _NO_VALUE
+        raw = unescape(vm.group(1))
+        if kind == "s":
+            strings = self.shared_strings()
+            return strings[int(raw)] if raw.isdigit() and int(raw) < len(strings) else ""
+        if kind == "b":
+            return raw == "1"
+        if kind == "e":
+            return CellError(raw)
+        if kind == "str":
+            return raw
+        try:
+            num = float(raw)
+        except ValueError:
+            return _NO_VALUE
+        return int(num) if num.is_integer() and "." not in raw and "E" not in raw.upper() else num
+
+    def iter_cells(self, sheet):
+        """Yield (ref, value, formula) for every non-empty cell on *sheet*, in one pass.
+
+        *value* is the stored (for formulas: cached) value, or None if there is
+        none. *formula* is the unescaped formula text without '=', "" for
+        shared-formula children and data-table cells, or None for constants.
+        """
+        xml = self.read_part(self.sheet_part(sheet))
+        for m in _CELL_RE.finditer(xml):
+            body = m.group(2)
+            if not body:
+                continue
+            formula = None
+            if "<f" in body:
+                fm = _F_RE.search(body)
+                if fm:
+                    formula = unescape(fm.group(2) or "")
+            value = self._decode(m.group(1), body)
+            yield _attr(m.group(1), "r"), (None if value is _NO_VALUE else value), formula
+
+    def cell_values(self, sheet):
+        """Return {ref: value} for every cell on *sheet* with a stored value.
+
+        Formula cells report their cached value. Errors come back as CellError.
+        """
+        xml = self.read_part(self.sheet_part(sheet))
+        values = {}
+        for m in _CELL_RE.finditer(xml):
+            body = m.group(2)
+            if not body:
+                continue
+            value = self._decode(m.group(1), body)
+            if value is not _NO_VALUE:
+                values[_attr(m.group(1), "r")] = value
+        return values
+
+    def formula_cells(self, sheet):
+        """Return the set of A1 references on *sheet* that hold a formula."""
+        xml = self.read_part(self.sheet_part(sheet))
+        return {
+            _attr(m.group(1), "r")
+            for m in _CELL_RE.finditer(xml)
+            if m.group(2) and "<f" in m.group(2)
+        }
+
+    # -- edits -------------------------------------------------------------
+    def set_value(self, sheet, ref, value):
+        self.sheet_part(sheet)
+        self._values.setdefault(sheet, {})[split_ref(ref)] = (ref, value)
+
+    def set_cached_value(self, sheet, ref, value):
+        """Update the cached result of an existing formula cell (keeps the formula)."""
+        self.sheet_part(sheet)
+        self._values.setdefault(sheet, {})[split_ref(ref)] = (ref, CachedValue(value))
+
+    def set_comment(self, sheet, ref, text, author=COMMENT_AUTHOR,
+                    width=COMMENT_WIDTH, height=COMMENT_HEIGHT):
+        self.sheet_part(sheet)
+        split_ref(ref)
+        self._comments.setdefault(sheet, {})[ref] = (text, author, width, height)
+
+    def changed_parts(self):
+        """Names of the members save() will rewrite (pending edits applied)."""
+        return sorted(self._dirty)
+
+    def apply(self):
+        """Render all queued edits into their parts (idempotent per call)."""
+        for sheet, edits in self._values.items():
+            part = self._sheets[sheet]
+            self._write_part(part, self._patch_sheet_data(self.read_part(part), edits))
+        for sheet, comments in self._comments.items():
+            self._patch_comments(sheet, comments)
+        if self._values or self._comments:
+            self._set_full_calc()
+        self._values, self._comments = {}, {}
+
+    def save(self, path=None):
+        """Apply edits and write the workbook atomically to *path* (default: in place).
+
+        Returns the list of member names that were rewritten.
+        """
+        self.apply()
+        changed = self.changed_parts()
+        rewrite_members(self.path, {name: self._parts[name] for name in changed}, path)
+        if path is None or os.path.abspath(path) == os.path.abspath(self.path):
+            self._names = sorted(set(self._names) | set(changed))
+        self._parts, self._dirty = {}, set()
+        return changed
+
+    # -- sheetData ---------------------------------------------------------
+    def _patch_sheet_data(self, xml, edits):
+        m = _SHEETDATA_RE.search(xml)
+        if not m:
+            raise XlsxPatchError("worksheet has no <sheetData> (prefixed XML is not supported)")
+        body = m.group(1) or ""
+
+        by_row = {}
+        for (row, col), (ref, value) in edits.items():
+            by_row.setdefault(row, {})[col] = (ref, value)
+        pending = sorted(by_row)
+
+        out, pos = [], 0
+        for rm in _ROW_RE.finditer(body):
+            r = _attr(rm.group(1), "r")
+            if r is None:
+                raise XlsxPatchError("row without r attribute")
+            r = int(r)
+            while pending and pending[0] < r:
+                new = pending.pop(0)
+                out.append(body[pos:rm.start()]); pos = rm.start()
+                out.append(self._render_row(new, "", "", by_row[new]))
+            if pending and pending[0] == r:
+                pending.pop(0)
+                out.append(body[pos:rm.start()])
+                out.append(self._render_row(r, rm.group(1), rm.group(2) or "", by_row[r]))
+                pos = rm.end()
+        out.append(body[pos:])
+        for new in pending:
+            out.append(self._render_row(new, "", "", by_row[new]))
+
+        return f"{xml[:m.start()]}<sheetData>{''.join(out)}</sheetData>{xml[m.end():]}"
+
+    @staticmethod
+    def _render_row(row, attrs, body, cells):
+        if not attrs:
+            attrs = f' r="{row}"'
+        attrs = _drop_attr(attrs, "spans")  # optional hint; may no longer be accurate
+        pending = sorted(cells)
+        out, pos = [], 0
+        for cm in _CELL_RE.finditer(body):
+            ref = _attr(cm.group(1), "r")
+            if ref is None:
+                raise XlsxPatchError(f"cell without r attribute in row {row}")
+            col = split_ref(ref)[1]
+            while pending and pending[0] < col:
+                c = pending.pop(0)
+                out.append(body[pos:cm.start()]); pos = cm.start()
+                out.append(_cell_xml(cells[c][0], "", cells[c][1]))
+            if pending and pending[0] == col:
+                pending.pop(0)
+                out.append(body[pos:cm.start()])
+                out.append(_cell_xml(ref, cm.group(1), cells[col][1], cm.group(2)))
+                pos = cm.end()
+        out.append(body[pos:])
+        for c in pending:
+            out.append(_cell_xml(cells[c][0], "", cells[c][1]))
+        return f"<row{attrs}>{''.join(out)}</row>"
+
+    # -- calcPr ------------------------------------------------------------
+    def _set_full_calc(self):
+        part = "xl/workbook.xml"
+        xml = self.read_part(part)
+        m = _CALCPR_RE.search(xml)
+        if m:
+            attrs = _drop_attr(m.group(1), "fullCalcOnLoad").rstrip()
+            xml = f'{xml[:m.start()]}<calcPr{attrs} fullCalcOnLoad="1"{m.group(2)}>{xml[m.end():]}'
+        else:
+            at = _find_first_tag(xml, _AFTER_CALCPR)
+            if at < 0:
+                at = xml.rindex("</workbook>")
+            xml = f'{xml[:at]}<calcPr fullCalcOnLoad="1"/>{xml[at:]}'
+        self._write_part(part, xml)
+
+    # -- comments ----------------------------------------------------------
+    def _sheet_rels(self, sheet_part):
+        rels_part = _rels_path(sheet_part)
+        xml = self.read_part(rels_part)
+        if xml is None:
+            xml = f'{_XML_DECL}<Relationships xmlns="{NS_PKG_REL}"></Relationships>'
+        rels = {}
+        for m in re.finditer(r"<Relationship\b([^>]*?)/?>", xml):
+            rels[_attr(m.group(1), "Id")] = (_attr(m.group(1), "Type"), _attr(m.group(1), "Target"))
+        return rels_part, xml, rels
+
+    def _add_rel(self, sheet_part, rel_type, target_part):
+        rels_part, xml, rels = self._sheet_rels(sheet_part)
+        n = len(rels) + 1
+        while f"rId{n}" in rels:
+            n += 1
+        rid = f"rId{n}"
+        entry = (f'<Relationship Id="{rid}" Type="{rel_type}" '
+                 f'Target="{_relative_target(sheet_part, target_part)}"/>')
+        xml = re.sub(r"<Relationships\b([^>]*?)\s*/>", r"<Relationships\1></Relationships>", xml)
+        at = xml.rindex("</Relationships>")
+        self._write_part(rels_part, xml[:at] + entry + xml[at:])
+        return rid
+
+    def _find_rel(self, sheet_part, rel_type):
+        _, _, rels = self._sheet_rels(sheet_part)
+        for rid, (typ, target) in rels.items():
+            if typ == rel_type:
+                return rid, _resolve_target(sheet_part, target)
+        return None, None
+
+    def _new_part_name(self, pattern):
+        taken = set(self._names) | set(self._parts)
+        n = 1
+        while pattern.format(n) in taken:
+            n += 1
+        return pattern.format(n)
+
+    def _add_content_types(self, comments_part=None):
+        part = "[Content_Types].xml"
+        xml = self.read_part(part)
+        additions = ""
+        if not re.search(r'<Default\b[^>]*Extension="vml"', xml, re.I):
+            additions += f'<Default Extension="vml" ContentType="{CT_VML}"/>'
+        if comments_part and f'PartName="/{comments_part}"' not in xml:
+            additions += f'<Override PartName="/{comments_part}" ContentType="{CT_COMMENTS}"/>'
+        if additions:
+            at = xml.rindex("</Types>")
+            self._write_part(part, xml[:at] + additions + xml[at:])
+
+    def _patch_comments(self, sheet, comments):
+        sheet_part = self._sheets[sheet]
+
+        _, comments_part = self._find_rel(sheet_part, REL_COMMENTS)
+        if comments_part is None:
+            comments_part = self._new_part_name("xl/comments{}.xml")
+            self._write_part(comments_part, (
+                f'{_XML_DECL}<comments xmlns="{NS_MAIN}"><authors></authors>'
+                f'<commentList></commentList></comments>'))
+            self._add_rel(sheet_part, REL_COMMENTS, comments_part)
+            self._add_content_types(comments_part)
+
+        vml_rid, vml_part = self._find_rel(sheet_part, REL_VML)
+        if vml_part is None:
+            vml_part = self._new_part_name("xl/drawings/commentsDrawing{}.vml")
+            idmap = self.sheetnames.index(sheet) + 1
+            self._write_part(vml_part, (
+                f'<xml xmlns:v="{NS_VML}" xmlns:o="{NS_OFFICE}" xmlns:x="{NS_EXCEL}">'
+                f'<o:shapelayout v:ext="edit"><o:idmap v:ext="edit" data="{idmap}"/></o:shapelayout>'
+                f'</xml>'))
+            vml_rid = self._add_rel(sheet_part, REL_VML, vml_part)
+            self._add_content_types()
+            self._add_legacy_drawing(sheet_part, vml_rid)
+
+        self._write_comment_entries(comments_part, comments)
+        self._write_vml_shapes(vml_part, comments, self.sheetnames.index(sheet) + 1)
+
+    def _add_legacy_drawing(self, sheet_part, rid):
+        xml = self.read_part(sheet_part)
+        if re.search(r"<legacyDrawing\b", xml):
+            raise XlsxPatchError(f"{sheet_part} already has a legacyDrawing without a VML rel")
+        tag = f'<legacyDrawing xmlns:r="{NS_REL}" r:id="{rid}"/>'
+        at = _find_first_tag(xml, _AFTER_LEGACY_DRAWING)
+        if at < 0:
+            at = xml.rindex("</worksheet>")
+        self._write_part(sheet_part, xml[:at] + tag + xml[at:])
+
+    def _write_comment_entries(self, part, comments):
+        xml = self.read_part(part)
+        if not re.search(r"<comments\b", xml):
+            raise XlsxPatchError(f"{part}: prefixed comments XML is not supported")
+        xml = re.sub(r"<authors\s*/>", "<authors></authors>", xml)
+        xml = re.sub(r"<commentList\s*/>", "<commentList></commentList>", xml)
+        authors = re.findall(r"<author>(.*?)</author>", xml, re.S)
+
+        for ref, (text, author, _w, _h) in comments.items():
+            author_xml = escape(author)
+            if author_xml not in authors:
+                at = xml.index("</authors>")
+                xml = f"{xml[:at]}<author>{author_xml}</author>{xml[at:]}"
+                authors.append(author_xml)
+            entry = (f'<comment ref="{ref}" authorId="{authors.index(author_xml)}">'
+                     f'<text><t xml:space="preserve">{escape(text)}</t></text></comment>')
+            existing = re.search(
+                r'<comment\b[^>]*\sref="%s"[^>]*?(?:/>|>.*?</comment>)' % ref, xml, re.S)
+            if existing:
+                xml = xml[:existing.start()] + entry + xml[existing.end():]
+            else:
+                at = xml.rindex("</commentList>")
+                xml = xml[:at] + entry + xml[at:]
+        self._write_part(part, xml)
+
+    def _write_vml_shapes(self, part, comments, sheet_index):
+        xml = self.read_part(part)
+        root = re.search(r"<xml\b[^>]*>", xml)
+        if not root:
+            raise XlsxPatchError(f"{part}: unrecognised VML drawing")
+        prefixes = {}
+        root_tag = root.group(0)
+        for ns, default in ((NS_VML, "v"), (NS_OFFICE, "o"), (NS_EXCEL, "x")):
+            m = re.search(r'xmlns:(\w+)="%s"' % re.escape(ns), root_tag)
+            if m:
+                prefixes[ns] = m.group(1)
+            else:
+                prefixes[ns] = default
+                root_tag = root_tag[:-1] + f' xmlns:{default}="{ns}">'
+        xml = xml[:root.start()] + root_tag + xml[root.end():]
+        v, o, x = prefixes[NS_VML], prefixes[NS_OFFICE], prefixes[NS_EXCEL]
+
+        if not re.search(r'<\w+:shapetype\b[^>]*id="_x0000_t202"', xml):
+            shapetype = (
+                f'<{v}:shapetype id="_x0000_t202" coordsize="21600,21600" {o}:spt="202" '
+                f'path="m,l,21600r21600,l21600,xe"><{v}:stroke joinstyle="miter"/>'
+                f'<{v}:path gradientshapeok="t" {o}:connecttype="rect"/></{v}:shapetype>')
+            at = xml.rindex("</xml>")
+            xml = xml[:at] + shapetype + xml[at:]
+
+        existing = {
+            (int(r), int(c)) for r, c in re.findall(
+                r"<\w+:Row>(\d+)</\w+:Row>\s*<\w+:Column>(\d+)</\w+:Column>", xml)
+        }
+        ids = [int(i) for i in re.findall(r'id="_x0000_s(\d+)"', xml)]
+        next_id = max(ids, default=1024 * sheet_index + 1) + 1
+
+        shapes = []
+        for ref, (_text, _author, width, height) in comments.items():
+            row, col = split_ref(ref)
+            if (row - 1, col - 1) in existing:
+                continue
+            style = ("position:absolute; margin-left:59.25pt;margin-top:1.5pt;"
+                     f"width:{width}px;height:{height}px;z-index:1;visibility:hidden")
+            shapes.append(
+                f'<{v}:shape id="_x0000_s{next_id}" type="#_x0000_t202" style={quoteattr(style)} '
+                f'fillcolor="#ffffe1" {o}:insetmode="auto"><{v}:fill color2="#ffffe1"/>'
+                f'<{v}:shadow color="black" obscured="t"/><{v}:path {o}:connecttype="none"/>'
+                f'<{v}:textbox style="mso-direction-alt:auto"><div style="text-align:left"/></{v}:textbox>'
+                f'<{x}:ClientData ObjectType="Note"><{x}:MoveWithCells/><{x}:SizeWithCells/>'
+                f'<{x}:AutoFill>False</{x}:AutoFill><{x}:Row>{row - 1}</{x}:Row>'
+                f'<{x}:Column>{col - 1}</{x}:Column></{x}:ClientData></{v}:shape>')
+            next_id += 1
+        if shapes:
+            at = xml.rindex("</xml>")
+            xml = xml[:at] + "".join(shapes) + xml[at:]
+        self._write_part(part, xml)
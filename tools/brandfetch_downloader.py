@@ -6,6 +6,8 @@ Download brand logos from Brandfetch API (CLI/headless mode).
 
 Usage:
     python brandfetch_downloader.py --api-key KEY --brand domain.com --output ./logos
+    python brandfetch_downloader.py --api-key KEY --brands-file brands.txt --output ./logos
+                                    [--workers 4] [--max-rps 5] [--cache-dir DIR | --no-cache]
 
 INSTALLATION:
   pip install requests
@@ -14,16 +16,40 @@ FEATURES:
 - Parallel downloads, machine-friendly output
 - Download logos in multiple formats (SVG, PNG)
 - Save brand colors and fonts information
+- One pooled HTTP session (keep-alive) shared by every request and thread
+- Brand data cached on disk and revalidated with ETag / Last-Modified
+- Logos streamed to disk and hashed on the way; unchanged files are not
+  rewritten, duplicates are hard-linked, and re-runs send conditional requests
+- Batch mode: --brands-file (one brand name or domain per line, # comments)
+  fetches many brands concurrently, API calls held to --max-rps
 """
 
 import argparse
+import hashlib
 import json
+import os
 import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = "https://api.brandfetch.io/v2"
+LOGO_WORKERS = 4                 # logo downloads in flight per brand
+DEFAULT_WORKERS = 4              # brands in flight in --brands-file mode
+DEFAULT_MAX_RPS = 5              # Brandfetch API calls per second (logo CDN not limited)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".brandfetch_cache"
+LOGO_MANIFEST = ".logo_manifest.json"   # per-brand {filename: src, sha256, size, mtime_ns, etag, ...}
+CHUNK_SIZE = 64 * 1024
+
+_UMASK = os.umask(0)             # read once: os.umask() is process-wide, not thread-safe
+os.umask(_UMASK)
 
 # ---------------------------------------------------------------------------
 # Shared helpers
@@ -39,24 +65,138 @@ def _sanitize_filename(filename: str) -> str:
     return filename
 
 
+def _replace(tmp, target: Path) -> None:
+    """os.replace(tmp, target) keeping target's mode (umask default if new);
+    mkstemp creates files 0600."""
+    try:
+        mode = target.stat().st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp, mode)
+    os.replace(tmp, target)
+
+
+# ---------------------------------------------------------------------------
+# HTTP: pooled session + API rate limit
+# ---------------------------------------------------------------------------
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _http(pool_size: int = LOGO_WORKERS) -> requests.Session:
+    """Shared keep-alive session; the first call fixes the per-host pool size."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class RateLimiter:
+    """Thread-safe token bucket: *rate* calls per second, bursts up to max(1, *rate*)."""
+
+    def __init__(self, rate: float = DEFAULT_MAX_RPS):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)   # below 1/s the bucket must still reach a whole token
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_api_limit = RateLimiter()
+
+
+def _api_get(api_key: str, path: str, headers: dict | None = None) -> requests.Response:
+    """GET {API_BASE}/{path} with auth, through the shared session and rate limit."""
+    _api_limit.acquire()
+    headers = {"Authorization": f"Bearer {api_key}", **(headers or {})}
+    return _http().get(f"{API_BASE}/{path}", headers=headers, timeout=15)
+
+
+# ---------------------------------------------------------------------------
+# Brand data cache
+# ---------------------------------------------------------------------------
+
+class BrandCache:
+    """
+    /v2/brands/{domain} responses on disk, one JSON file per domain.
+
+    Entries keep the response's ETag / Last-Modified; the next fetch sends
+    them as If-None-Match / If-Modified-Since and a 304 reuses the entry.
+    """
+
+    def __init__(self, folder: Path = DEFAULT_CACHE_DIR):
+        self.folder = Path(folder)
+
+    def _path(self, domain: str) -> Path:
+        return self.folder / f"{_sanitize_filename(domain.lower())}.json"
+
+    def get(self, domain: str) -> dict | None:
+        try:
+            return json.loads(self._path(domain).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, domain: str, data: dict, headers) -> None:
+        """Best-effort atomic write; a cache failure never fails the download."""
+        entry = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "data": data,
+        }
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            _replace(tmp, self._path(domain))
+        except OSError:
+            pass
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
 # ===================================================================
 # CLI (headless) mode
 # ===================================================================
 
-def _search_brand_cli(api_key: str, query: str) -> str | None:
+def _search_brand_cli(api_key: str, query: str, log=print) -> str | None:
     """Search for a brand and return its domain (CLI)."""
     if '.' in query and ' ' not in query:
         return query
 
-    url = "https://api.brandfetch.io/v2/search/" + query
-    headers = {"Authorization": f"Bearer {api_key}"}
-    resp = requests.get(url, headers=headers, timeout=15)
+    resp = _api_get(api_key, "search/" + query)
 
     if resp.status_code == 401:
-        print("[FAIL] Invalid API key. Check your key at https://brandfetch.com/api")
+        log("[FAIL] Invalid API key. Check your key at https://brandfetch.com/api")
         return None
     if resp.status_code == 404:
-        print(f"[FAIL] Brand '{query}' not found.")
+        log(f"[FAIL] Brand '{query}' not found.")
         return None
     resp.raise_for_status()
     data = resp.json()
@@ -65,38 +205,123 @@ def _search_brand_cli(api_key: str, query: str) -> str | None:
     return None
 
 
-def _fetch_brand_data_cli(api_key: str, domain: str) -> dict | None:
-    """Fetch full brand data from Brandfetch (CLI)."""
-    url = f"https://api.brandfetch.io/v2/brands/{domain}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-    resp = requests.get(url, headers=headers, timeout=15)
+def _fetch_brand_data_cli(api_key: str, domain: str, cache: BrandCache | None = None,
+                          log=print) -> dict | None:
+    """Fetch full brand data from Brandfetch (CLI), revalidating any cached copy."""
+    entry = cache.get(domain) if cache else None
+    resp = _api_get(api_key, f"brands/{domain}", BrandCache.conditional_headers(entry))
+    if resp.status_code == 304 and entry:
+        log("[OK]   Brand data unchanged (cached)")
+        return entry["data"]
     resp.raise_for_status()
-    return resp.json()
+    data = resp.json()
+    if cache:
+        cache.put(domain, data, resp.headers)
+    return data
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_logo_manifest(folder: Path) -> dict:
+    try:
+        return json.loads((folder / LOGO_MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
 
 
-def _download_one_logo(src: str, filepath: Path, label: str) -> tuple[str, bool]:
-    """Download a single logo file. Returns (label, success)."""
+def _save_logo_manifest(folder: Path, manifest: dict) -> None:
+    """Best-effort atomic write of the per-brand {filename: entry} manifest."""
+    try:
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        _replace(tmp, folder / LOGO_MANIFEST)
+    except OSError:
+        pass
+
+
+def _link_or_copy(existing: Path, filepath: Path) -> None:
+    """Replace filepath with a hard link to existing (a copy where links are unsupported)."""
+    fd, tmp = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        os.link(existing, tmp)          # shares existing's inode and mode
+    except OSError:
+        shutil.copyfile(existing, tmp)  # plain create: umask default mode
+    os.replace(tmp, filepath)
+
+
+def _download_one_logo(src: str, filepath: Path, label: str,
+                       prev: dict | None = None) -> tuple[str, str, dict | None]:
+    """
+    Stream a single logo file to disk. Returns (label, action, manifest entry);
+    action is "downloaded", "unchanged" or "failed" (label then carries the error).
+
+    When *prev* (the manifest entry from the last run) still matches the file
+    on disk, the request is conditional and a 304 costs no body. Otherwise the
+    body is streamed to a temp file and hashed on the way; content identical
+    to the current file is dropped, anything else is renamed into place.
+    """
+    tmp = None
     try:
-        resp = requests.get(src, timeout=30)
-        resp.raise_for_status()
-        with open(filepath, 'wb') as f:
-            f.write(resp.content)
-        return (label, True)
+        current = filepath.stat() if filepath.exists() else None
+        intact = bool(prev and current and prev.get('src') == src
+                      and (current.st_size, current.st_mtime_ns) == (prev.get('size'), prev.get('mtime_ns')))
+        headers = BrandCache.conditional_headers(prev) if intact else {}
+
+        with _http().get(src, headers=headers, stream=True, timeout=30) as resp:
+            if resp.status_code == 304 and intact:
+                return (label, "unchanged", prev)
+            resp.raise_for_status()
+            digest, size = hashlib.sha256(), 0
+            fd, tmp = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            entry = {'src': src, 'sha256': digest.hexdigest(), 'size': size,
+                     'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified')}
+
+        old_hash = prev['sha256'] if intact else (_sha256_file(filepath) if current else None)
+        action = "unchanged" if old_hash == entry['sha256'] else "downloaded"
+        if action == "downloaded":
+            _replace(tmp, filepath)
+            tmp = None
+        entry['mtime_ns'] = filepath.stat().st_mtime_ns
+        return (label, action, entry)
     except Exception as exc:
-        return (f"{label} — {exc}", False)
+        return (f"{label} — {exc}", "failed", None)
+    finally:
+        if tmp:
+            Path(tmp).unlink(missing_ok=True)
 
 
-def _download_logos_parallel(brand_data: dict, output_folder: Path) -> int:
-    """Download all logo files using ThreadPoolExecutor. Returns count."""
+def _download_logos_parallel(brand_data: dict, output_folder: Path, log=print) -> int:
+    """
+    Download all logo files using ThreadPoolExecutor. Returns the number of
+    logo files in place (downloaded, unchanged or linked).
+
+    Each URL is fetched once per brand; files with identical content (by
+    SHA-256) are hard-linked to one copy. The per-brand .logo_manifest.json
+    keeps hashes and validators so a re-run only transfers changed logos.
+    """
     logos = brand_data.get('logos', [])
     if not logos:
-        print("  [WARN] No logos found in brand data")
+        log("  [WARN] No logos found in brand data")
         return 0
 
-    print(f"  Found {len(logos)} logo variation(s)\n")
+    log(f"  Found {len(logos)} logo variation(s)\n")
 
     # Build work items
-    tasks: list[tuple[str, Path, str]] = []
+    tasks: dict[str, str] = {}            # filename -> src
     for logo_group in logos:
         logo_type = logo_group.get('type', 'unknown')
         for fmt in logo_group.get('formats', []):
@@ -106,26 +331,52 @@ def _download_logos_parallel(brand_data: dict, output_folder: Path) -> int:
             format_type = fmt.get('format', 'unknown')
             ext = format_type if format_type in ('svg', 'png', 'jpg', 'jpeg', 'webp') else 'png'
             filename = f"{logo_type}_{format_type}.{ext}"
-            tasks.append((src, output_folder / filename, filename))
+            tasks.setdefault(filename, src)
 
     if not tasks:
         return 0
 
-    downloaded = 0
-    with ThreadPoolExecutor(max_workers=4) as pool:
+    manifest = _load_logo_manifest(output_folder)
+    by_src: dict[str, list[str]] = {}     # one download per URL
+    for filename, src in tasks.items():
+        by_src.setdefault(src, []).append(filename)
+
+    entries: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=LOGO_WORKERS) as pool:
         futures = {
-            pool.submit(_download_one_logo, src, fp, label): label
-            for src, fp, label in tasks
+            pool.submit(_download_one_logo, src, output_folder / names[0], names[0],
+                        manifest.get(names[0])): names[0]
+            for src, names in by_src.items()
         }
         for future in as_completed(futures):
-            label, ok = future.result()
-            if ok:
-                print(f"    Downloaded {label} [OK]")
-                downloaded += 1
-            else:
-                print(f"    [FAIL] {label}")
-
-    return downloaded
+            label, action, entry = future.result()
+            if action == "failed":
+                log(f"    [FAIL] {label}")
+                continue
+            entries[futures[future]] = entry
+            log(f"    {'Downloaded' if action == 'downloaded' else 'Unchanged'} {label} [OK]")
+
+    # Same URL under another name, or same bytes from another URL: hard-link to one copy
+    first_by_hash: dict[str, str] = {}
+    for filename, src in tasks.items():
+        source_name = by_src[src][0]
+        entry = entries.get(source_name)
+        if entry is None:
+            continue
+        canonical = first_by_hash.setdefault(entry['sha256'], filename)
+        if canonical == filename:
+            continue
+        filepath, existing = output_folder / filename, output_folder / canonical
+        try:
+            if not (filepath.exists() and os.path.samefile(existing, filepath)):
+                _link_or_copy(existing, filepath)
+                log(f"    Linked {filename} -> {canonical} [OK]")
+            entries[filename] = {**entry, 'src': src, 'mtime_ns': filepath.stat().st_mtime_ns}
+        except OSError as exc:
+            log(f"    [FAIL] {filename} — {exc}")
+
+    _save_logo_manifest(output_folder, {**manifest, **entries})
+    return len(entries)
 
 
 def _save_brand_info(brand_data: dict, output_folder: Path) -> None:
@@ -144,7 +395,61 @@ def _save_brand_info(brand_data: dict, output_folder: Path) -> None:
         json.dump(info, f, indent=2, ensure_ascii=False)
 
 
-def run_cli(api_key: str, brand: str, output: str) -> None:
+def fetch_brand(api_key: str, brand: str, output_folder: Path,
+                cache: BrandCache | None = None, log=print) -> dict:
+    """
+    Resolve, fetch and download one brand into output_folder/<brand name>.
+
+    Returns {"brand", "domain", "name", "folder", "logos", "ok", "error"};
+    progress goes to *log* (one string per call).
+    """
+    result = {"brand": brand, "domain": None, "name": None, "folder": None,
+              "logos": 0, "ok": False, "error": None}
+    try:
+        output_folder.mkdir(parents=True, exist_ok=True)
+
+        # 1 — Resolve brand domain
+        log("[1/4] Searching for brand on Brandfetch...")
+        domain = _search_brand_cli(api_key, brand, log=log)
+        if not domain:
+            result["error"] = "Could not find brand. Try a different name or website."
+            log(f"[FAIL] {result['error']}")
+            return result
+        result["domain"] = domain
+        log(f"[OK]   Found brand: {domain}")
+
+        # 2 — Fetch brand data
+        log("\n[2/4] Fetching brand data...")
+        brand_data = _fetch_brand_data_cli(api_key, domain, cache, log=log)
+        if not brand_data:
+            result["error"] = "Could not fetch brand data."
+            log(f"[FAIL] {result['error']}")
+            return result
+        brand_name = brand_data.get('name') or brand
+        result["name"] = brand_name
+        log(f"[OK]   Brand: {brand_name}")
+
+        brand_folder = output_folder / _sanitize_filename(brand_name)
+        brand_folder.mkdir(parents=True, exist_ok=True)
+        result["folder"] = str(brand_folder)
+        log(f"[OK]   Saving to: {brand_folder}\n")
+
+        # 3 — Download logos (parallel)
+        log("[3/4] Downloading logo files...")
+        result["logos"] = _download_logos_parallel(brand_data, brand_folder, log=log)
+
+        # 4 — Save brand info JSON
+        log("\n[4/4] Saving brand information...")
+        _save_brand_info(brand_data, brand_folder)
+        log("[OK]   Brand info saved to brand_info.json")
+        result["ok"] = True
+    except (requests.RequestException, OSError, ValueError) as exc:
+        result["error"] = str(exc)
+        log(f"[FAIL] {exc}")
+    return result
+
+
+def run_cli(api_key: str, brand: str, output: str, cache: BrandCache | None = None) -> None:
     """Run the full download pipeline in headless CLI mode."""
     output_folder = Path(output)
 
@@ -154,45 +459,66 @@ def run_cli(api_key: str, brand: str, output: str) -> None:
     print(f"Output: {output_folder}")
     print("=" * 70 + "\n")
 
-    output_folder.mkdir(parents=True, exist_ok=True)
-
-    # 1 — Resolve brand domain
-    print("[1/4] Searching for brand on Brandfetch...")
-    domain = _search_brand_cli(api_key, brand)
-    if not domain:
-        print("[FAIL] Could not find brand. Try a different name or website.")
+    result = fetch_brand(api_key, brand, output_folder, cache)
+    if not result["ok"]:
         sys.exit(1)
-    print(f"[OK]   Found brand: {domain}")
 
-    # 2 — Fetch brand data
-    print("\n[2/4] Fetching brand data...")
-    brand_data = _fetch_brand_data_cli(api_key, domain)
-    if not brand_data:
-        print("[FAIL] Could not fetch brand data.")
-        sys.exit(1)
-    brand_name = brand_data.get('name', brand)
-    print(f"[OK]   Brand: {brand_name}")
+    print(f"\n{'=' * 70}")
+    if result["logos"] > 0:
+        print(f"SUCCESS! Downloaded {result['logos']} logo file(s)")
+    else:
+        print("WARNING: No logo files were downloaded")
+    print(f"Location: {result['folder']}")
+    print("=" * 70)
+
+
+def read_brands_file(path: str) -> list[str]:
+    """Brand names or domains, one per line; blank lines, # comments and repeats skipped."""
+    brands = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line and line not in brands:
+            brands.append(line)
+    return brands
 
-    brand_folder = output_folder / _sanitize_filename(brand_name)
-    brand_folder.mkdir(parents=True, exist_ok=True)
-    print(f"[OK]   Saving to: {brand_folder}\n")
 
-    # 3 — Download logos (parallel)
-    print("[3/4] Downloading logo files...")
-    logos_downloaded = _download_logos_parallel(brand_data, brand_folder)
+def run_batch(api_key: str, brands: list[str], output: str, cache: BrandCache | None = None,
+              workers: int = DEFAULT_WORKERS) -> list[dict]:
+    """Fetch many brands concurrently; one status line per brand, summary at the end."""
+    output_folder = Path(output)
+    started = time.perf_counter()
 
-    # 4 — Save brand info JSON
-    print("\n[4/4] Saving brand information...")
-    _save_brand_info(brand_data, brand_folder)
-    print("[OK]   Brand info saved to brand_info.json")
+    print("=" * 70)
+    print(f"Brandfetch Logo Downloader (batch)")
+    print(f"Brands: {len(brands)}  Workers: {workers}  Max API rps: {_api_limit.rate:g}")
+    print(f"Output: {output_folder}")
+    print("=" * 70 + "\n")
 
+    def one(brand):
+        lines = []
+        r = fetch_brand(api_key, brand, output_folder, cache, log=lines.append)
+        if not r["ok"]:   # report the first, most specific failure line
+            r["error"] = next((ln[7:] for ln in lines if ln.startswith("[FAIL]")), r["error"])
+        return r
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(one, b) for b in brands]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            if r["ok"]:
+                print(f"[OK]   {r['brand']} -> {r['name']} ({r['logos']} logo file(s))")
+            else:
+                print(f"[FAIL] {r['brand']} — {r['error']}")
+
+    ok = sum(r["ok"] for r in results)
     print(f"\n{'=' * 70}")
-    if logos_downloaded > 0:
-        print(f"SUCCESS! Downloaded {logos_downloaded} logo file(s)")
-    else:
-        print("WARNING: No logo files were downloaded")
-    print(f"Location: {brand_folder}")
+    print(f"Done: {ok}/{len(results)} brand(s), "
+          f"{sum(r['logos'] for r in results)} logo file(s) in {time.perf_counter() - started:.1f}s")
+    print(f"Location: {output_folder}")
     print("=" * 70)
+    return results
 
 
 # ===================================================================
@@ -205,16 +531,39 @@ def _parse_args():
         description="Brandfetch Logo Downloader — CLI mode",
     )
     parser.add_argument("--api-key", required=True, help="Brandfetch API key")
-    parser.add_argument("--brand", required=True, help="Brand name or domain (e.g. nike.com)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--brand", help="Brand name or domain (e.g. nike.com)")
+    target.add_argument("--brands-file", help="Text file with one brand name or domain per line")
     parser.add_argument("--output", default=None, help="Output directory for downloaded logos")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Brands fetched concurrently with --brands-file (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--max-rps", type=float, default=DEFAULT_MAX_RPS,
+                        help=f"Max Brandfetch API calls per second (default: {DEFAULT_MAX_RPS})")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Brand data cache folder (default: .brandfetch_cache next to this script)")
+    parser.add_argument("--no-cache", action="store_true", help="Always refetch brand data")
     return parser.parse_args()
 
 
 def main():
     """Main entry point — CLI mode only."""
+    global _api_limit
     args = _parse_args()
     output = args.output or str(Path.home() / "Downloads" / "brandfetch_logos")
-    run_cli(api_key=args.api_key, brand=args.brand, output=output)
+    cache = None if args.no_cache else BrandCache(Path(args.cache_dir) if args.cache_dir else DEFAULT_CACHE_DIR)
+    _api_limit = RateLimiter(max(args.max_rps, 0.1))
+
+    if args.brand:
+        _http(LOGO_WORKERS)
+        run_cli(api_key=args.api_key, brand=args.brand, output=output, cache=cache)
+        return
+
+    brands = read_brands_file(args.brands_file)
+    workers = max(1, args.workers)
+    _http(workers * LOGO_WORKERS)  # one pooled connection per concurrent download
+    results = run_batch(args.api_key, brands, output, cache, workers)
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":